@@ -16,7 +16,7 @@ async def search_tokens(
     chain: Optional[str] = Query(None, description="زنجیره (اختیاری)")
 ):
     """جستجوی توکن‌های مرتبط با کلیدواژه داده شده"""
-    return ave.search_tokens(keyword, chain)
+    return await ave.search_tokens(keyword, chain)
 
 # دریافت قیمت توکن‌ها
 @router.post("/tokens/price")
@@ -26,7 +26,9 @@ async def get_token_prices(
     tx_24h_volume_min: int = Body(0, description="حداقل حجم 24 ساعته برای شمول در نتیجه جستجو (پیش‌فرض: 0، 0 به معنی بدون آستانه)")
 ):
     """دریافت قیمت آخرین توکن"""
-    return ave.get_token_prices(token_ids, tvl_min, tx_24h_volume_min)
+    if not token_ids:
+        raise HTTPException(status_code=400, detail="حداقل یک شناسه توکن لازم است")
+    return await ave.get_token_prices(token_ids, tvl_min, tx_24h_volume_min)
 
 # دریافت جزئیات توکن
 @router.get("/tokens/{token_id}")
@@ -34,7 +36,7 @@ async def get_token_details(
     token_id: str = Path(..., description="شناسه توکن = {توکن}-{زنجیره}, مثال: 0x05ea877924ec89ee62eefe483a8af97e77daeefd-bsc")
 ):
     """دریافت جزئیات توکن"""
-    return ave.get_token_details(token_id)
+    return await ave.get_token_details(token_id)
 
 # دریافت 100 نگهدارنده برتر توکن
 @router.get("/tokens/top100/{token_id}")
@@ -42,7 +44,7 @@ async def get_token_top100_holders(
     token_id: str = Path(..., description="شناسه توکن = {توکن}-{زنجیره}, مثال: 0xd1fa42f9c7dcb525231e2cf6db0235290ada6381-bsc")
 ):
     """دریافت 100 نگهدارنده برتر توکن"""
-    return ave.get_token_top100_holders(token_id)
+    return await ave.get_token_top100_holders(token_id)
 
 # دریافت گزارش تشخیص ریسک قرارداد
 @router.get("/contracts/{token_id}")
@@ -50,4 +52,4 @@ async def get_contract_risk_detection_report(
     token_id: str = Path(..., description="شناسه توکن = {توکن}-{زنجیره}, مثال: 0x05ea877924ec89ee62eefe483a8af97e77daeefd-bsc")
 ):
     """دریافت گزارش تشخیص ریسک قرارداد"""
-    return ave.get_contract_risk_detection_report(token_id)
+    return await ave.get_contract_risk_detection_report(token_id)
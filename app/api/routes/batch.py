@@ -0,0 +1,118 @@
+import time
+import asyncio
+import json
+import logging
+from typing import Optional, List, Dict, Any
+import httpx
+from fastapi import APIRouter, Request, HTTPException
+from pydantic import BaseModel, Field
+from app.utils.rate_limiter import rate_limiter, get_client_ip
+from app.utils.request_context import get_request_deadline
+from app.config.settings import RATE_LIMITS, BATCH_MAX_ITEMS, BATCH_MAX_CONCURRENCY
+
+# تنظیم لاگر
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+# تنظیم محدودیت نرخ برای API
+rate_limiter.set_limit("/api/batch", RATE_LIMITS["BATCH"])
+
+# سربرگ‌های پاسخ زیردرخواست که به نتیجه منتقل می‌شوند
+FORWARDED_RESPONSE_HEADERS = ("x-cache", "retry-after", "x-ratelimit-limit", "x-ratelimit-remaining", "x-ratelimit-reset")
+
+# مسیرهای جریانی (SSE، WebSocket و NDJSON سوآپ‌ها) پایان ندارند و در درخواست گروهی مجاز نیستند
+STREAMING_PATH_PREFIXES = ("/api/stream",)
+STREAMING_PATH_SUFFIXES = ("/stream",)
+
+def _is_streaming_path(path: str) -> bool:
+    path = path.split("?", 1)[0].rstrip("/")
+    return path.startswith(STREAMING_PATH_PREFIXES) or path.endswith(STREAMING_PATH_SUFFIXES)
+
+class BatchItem(BaseModel):
+    """یک زیردرخواست به یکی از مسیرهای داخلی API"""
+    method: str = Field("GET", description="متد HTTP (GET یا POST)")
+    path: str = Field(..., description="مسیر داخلی، مثلاً /api/dexscreener/search")
+    params: Optional[Dict[str, Any]] = Field(None, description="پارامترهای کوئری")
+    body: Optional[Any] = Field(None, description="بدنه JSON برای درخواست‌های POST")
+
+class BatchRequest(BaseModel):
+    requests: List[BatchItem] = Field(..., description=f"لیست زیردرخواست‌ها، حداکثر {BATCH_MAX_ITEMS} مورد")
+
+async def _execute_item(
+    client: httpx.AsyncClient,
+    item: BatchItem,
+    headers: Dict[str, str],
+    semaphore: asyncio.Semaphore,
+    deadline: Optional[float],
+) -> Dict[str, Any]:
+    """
+    اجرای یک زیردرخواست از طریق خود برنامه (با همان میان‌افزارها، محدودیت نرخ و کش)
+    هر زیردرخواست حداکثر تا پایان مهلت درخواست گروهی منتظر می‌ماند
+    """
+    method = item.method.upper()
+    if method not in ("GET", "POST"):
+        return {"status": 405, "body": {"detail": f"متد HTTP غیرمجاز: {item.method}"}}
+    if not item.path.startswith("/api/") or item.path.startswith("/api/batch"):
+        return {"status": 400, "body": {"detail": f"مسیر نامعتبر برای درخواست گروهی: {item.path}"}}
+    if _is_streaming_path(item.path):
+        return {"status": 400, "body": {"detail": f"مسیرهای جریانی در درخواست گروهی مجاز نیستند: {item.path}"}}
+
+    async with semaphore:
+        # باقی‌مانده مهلت پس از انتظار برای نوبت اجرا
+        timeout = deadline - time.monotonic() if deadline is not None else None
+        if timeout is not None and timeout <= 0:
+            return {"status": 504, "body": {"detail": "مهلت درخواست گروهی به پایان رسید"}}
+        if timeout is not None:
+            headers = {**headers, "x-request-timeout": f"{max(0.1, timeout):.3f}"}
+        try:
+            response = await asyncio.wait_for(
+                client.request(
+                    method,
+                    item.path,
+                    params=item.params,
+                    json=item.body if method == "POST" else None,
+                    headers=headers,
+                ),
+                timeout,
+            )
+        except asyncio.TimeoutError:
+            logger.warning(f"زیردرخواست {item.path} در مهلت درخواست گروهی کامل نشد")
+            return {"status": 504, "body": {"detail": "مهلت درخواست گروهی به پایان رسید"}}
+        except Exception as e:
+            logger.error(f"خطا در اجرای زیردرخواست {item.path}: {str(e)}")
+            return {"status": 500, "body": {"detail": f"خطای داخلی: {str(e)}"}}
+
+    try:
+        body = response.json()
+    except json.JSONDecodeError:
+        body = response.text
+
+    result = {"status": response.status_code, "body": body}
+    forwarded = {name: response.headers[name] for name in FORWARDED_RESPONSE_HEADERS if name in response.headers}
+    if forwarded:
+        result["headers"] = forwarded
+    return result
+
+@router.post("")
+async def execute_batch(batch: BatchRequest, request: Request):
+    """
+    اجرای هم‌زمان چند درخواست به مسیرهای داخلی در یک رفت و برگشت
+    هر زیردرخواست مانند یک درخواست مستقل محدودیت نرخ و کش را رعایت می‌کند
+    """
+    if len(batch.requests) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"حداکثر {BATCH_MAX_ITEMS} زیردرخواست مجاز است")
+
+    # زیردرخواست‌ها با IP کلاینت اصلی (آدرس اتصال داخلی) و باقی‌مانده مهلت درخواست گروهی اجرا می‌شوند
+    # و فشرده نمی‌شوند (پاسخ گروهی در پایان یک بار فشرده می‌شود)
+    headers: Dict[str, str] = {"Accept-Encoding": "identity"}
+    deadline = get_request_deadline()
+
+    semaphore = asyncio.Semaphore(BATCH_MAX_CONCURRENCY)
+    transport = httpx.ASGITransport(app=request.app, client=(get_client_ip(request), 0))
+    async with httpx.AsyncClient(transport=transport, base_url="http://batch") as client:
+        results = await asyncio.gather(
+            *[_execute_item(client, item, headers, semaphore, deadline) for item in batch.requests]
+        )
+
+    return {"count": len(results), "results": results}
@@ -13,7 +13,7 @@ rate_limiter.set_limit("/api/coingecko", RATE_LIMITS["COINGECKO"])
 @router.get("/ping")
 async def ping():
     """وضعیت سرور API را بررسی می‌کند"""
-    return coingecko.ping()
+    return await coingecko.ping()
 
 # Coins endpoints
 @router.get("/coins/{id}/contract/{contract_address}")
@@ -22,7 +22,7 @@ async def get_coin_by_contract(
     contract_address: str = Path(..., description="آدرس قرارداد توکن")
 ):
     """همه متادیتا از صفحه رمزارز CoinGecko براساس پلتفرم دارایی و آدرس قرارداد توکن خاص دریافت می‌کند"""
-    return coingecko.get_coin_by_contract(id, contract_address)
+    return await coingecko.get_coin_by_contract(id, contract_address)
 
 @router.get("/coins/{id}/contract/{contract_address}/market_chart")
 async def get_coin_contract_market_chart(
@@ -32,32 +32,53 @@ async def get_coin_contract_market_chart(
     days: str = Query(..., description="تعداد روزها یا 'max'")
 ):
     """داده‌های نمودار تاریخی شامل زمان، قیمت، حجم بازار و حجم معاملات 24 ساعته براساس پلتفرم دارایی و آدرس قرارداد توکن خاص دریافت می‌کند"""
-    return coingecko.get_coin_contract_market_chart(id, contract_address, vs_currency, days)
+    return await coingecko.get_coin_contract_market_chart(id, contract_address, vs_currency, days)
+
+@router.get("/coins/{id}/contract/{contract_address}/market_chart/range")
+async def get_coin_contract_market_chart_range(
+    id: str = Path(..., description="شناسه پلتفرم (مثل 'ethereum')"),
+    contract_address: str = Path(..., description="آدرس قرارداد توکن"),
+    vs_currency: str = Query(..., description="ارز مقایسه (مثل 'usd')"),
+    from_timestamp: int = Query(..., alias="from", description="ابتدای بازه (UNIX timestamp)"),
+    to_timestamp: int = Query(..., alias="to", description="انتهای بازه (UNIX timestamp)")
+):
+    """داده‌های نمودار تاریخی در یک بازه زمانی براساس پلتفرم دارایی و آدرس قرارداد توکن خاص دریافت می‌کند"""
+    return await coingecko.get_coin_contract_market_chart_range(id, contract_address, vs_currency, from_timestamp, to_timestamp)
+
+# Simple endpoints
+@router.get("/simple/token_price/{id}")
+async def get_token_price(
+    id: str = Path(..., description="شناسه پلتفرم (مثل 'ethereum')"),
+    contract_addresses: str = Query(..., description="آدرس قرارداد توکن‌ها، جدا شده با کاما"),
+    vs_currencies: str = Query("usd", description="ارزهای مقایسه، جدا شده با کاما")
+):
+    """قیمت فعلی یک یا چند توکن را براساس پلتفرم دارایی و آدرس قرارداد دریافت می‌کند"""
+    return await coingecko.get_token_price(id, contract_addresses, vs_currencies)
 
 # Search endpoints
 @router.get("/search")
 async def search(query: str = Query(..., description="عبارت جستجو")):
     """جستجو برای رمزارزها، دسته‌بندی‌ها و بازارهای موجود در CoinGecko"""
-    return coingecko.search(query)
+    return await coingecko.search(query)
 
 @router.get("/search/trending")
 async def search_trending():
     """رمزارزهای داغ، NFT‌ها و دسته‌بندی‌ها در CoinGecko در 24 ساعت اخیر را دریافت می‌کند"""
-    return coingecko.search_trending()
+    return await coingecko.search_trending()
 
 # Global endpoints
 @router.get("/global")
 async def get_global():
     """داده‌های جهانی رمزارزها شامل رمزارزهای فعال، بازارها، حجم کل بازار رمزارزها و غیره را دریافت می‌کند"""
-    return coingecko.get_global()
+    return await coingecko.get_global()
 
 @router.get("/global/decentralized_finance_defi")
 async def get_global_defi():
     """داده‌های جهانی امور مالی غیرمتمرکز (DeFi) رمزارزها شامل حجم بازار DeFi، حجم معاملات را دریافت می‌کند"""
-    return coingecko.get_global_defi()
+    return await coingecko.get_global_defi()
 
 # Companies public treasury
 @router.get("/companies/public_treasury/{coin_id}")
 async def get_companies_public_treasury(coin_id: str = Path(..., description="شناسه کوین (مثل 'bitcoin')")):
     """اطلاعات ذخایر عمومی شرکت‌ها در بیتکوین یا اتریوم را دریافت می‌کند"""
-    return coingecko.get_companies_public_treasury(coin_id)
+    return await coingecko.get_companies_public_treasury(coin_id)
@@ -13,12 +13,12 @@ rate_limiter.set_limit("/api/coinstats", RATE_LIMITS["COINSTATS"])
 @router.get("/coins")
 async def get_coins():
     """دریافت لیست رمزارزها"""
-    return coinstats.get_coins()
+    return await coinstats.get_coins()
 
 @router.get("/coins/{coin_id}")
 async def get_coin(
     coin_id: str = Path(..., description="شناسه رمزارز")
 ):
     """دریافت اطلاعات یک رمزارز با شناسه خاص"""
-    return coinstats.get_coin(coin_id)
+    return await coinstats.get_coin(coin_id)
 
@@ -16,7 +16,7 @@ async def get_price(
     tsyms: str = Query(..., description="نمادهای ارز مقصد (با کاما جدا شده، مثلاً USD,JPY,EUR)")
 ):
     """دریافت قیمت فعلی رمزارز"""
-    return cryptocompare.get_price(fsym, tsyms)
+    return await cryptocompare.get_price(fsym, tsyms)
 
 # سیگنال‌های معاملاتی
 @router.get("/tradingsignals/intotheblock/latest")
@@ -24,7 +24,7 @@ async def get_trading_signals_latest(
     fsym: str = Query(..., description="نماد ارز (مثلاً BTC)")
 ):
     """دریافت آخرین سیگنال‌های معاملاتی"""
-    return cryptocompare.get_trading_signals_latest(fsym)
+    return await cryptocompare.get_trading_signals_latest(fsym)
 
 # اخبار
 @router.get("/v2/news")
@@ -32,19 +32,19 @@ async def get_news(
     lang: str = Query("EN", description="زبان (مثلاً EN)")
 ):
     """دریافت اخبار"""
-    return cryptocompare.get_news(lang)
+    return await cryptocompare.get_news(lang)
 
 @router.get("/news/feeds")
 async def get_news_feeds():
     """دریافت فیدهای خبری"""
-    return cryptocompare.get_news_feeds()
+    return await cryptocompare.get_news_feeds()
 
 @router.get("/news/categories")
 async def get_news_categories():
     """دریافت دسته‌بندی‌های خبری"""
-    return cryptocompare.get_news_categories()
+    return await cryptocompare.get_news_categories()
 
 @router.get("/news/feedsandcategories")
 async def get_news_feeds_and_categories():
     """دریافت فیدها و دسته‌بندی‌های خبری"""
-    return cryptocompare.get_news_feeds_and_categories()
+    return await cryptocompare.get_news_feeds_and_categories()
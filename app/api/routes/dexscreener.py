@@ -20,17 +20,17 @@ rate_limiter.set_limit("/api/dexscreener/tokens", RATE_LIMITS["DEXSCREENER_DEFAU
 @router.get("/token-profiles/latest")
 async def get_token_profiles():
     """دریافت آخرین پروفایل‌های توکن"""
-    return dexscreener.get_token_profiles()
+    return await dexscreener.get_token_profiles()
 
 @router.get("/token-boosts/latest")
 async def get_boosted_tokens():
     """دریافت آخرین توکن‌های تقویت‌شده"""
-    return dexscreener.get_boosted_tokens()
+    return await dexscreener.get_boosted_tokens()
 
 @router.get("/token-boosts/top")
 async def get_most_active_boosts():
     """دریافت توکن‌هایی با بیشترین تقویت‌های فعال"""
-    return dexscreener.get_most_active_boosts()
+    return await dexscreener.get_most_active_boosts()
 
 @router.get("/orders/{chain_id}/{token_address}")
 async def check_paid_orders(
@@ -38,7 +38,7 @@ async def check_paid_orders(
     token_address: str = Path(..., description="آدرس قرارداد توکن")
 ):
     """بررسی سفارش‌های پرداخت شده برای توکن"""
-    return dexscreener.check_paid_orders(chain_id, token_address)
+    return await dexscreener.check_paid_orders(chain_id, token_address)
 
 @router.get("/pairs/{chain_id}/{pair_id}")
 async def get_pairs_by_chain_and_address(
@@ -46,14 +46,14 @@ async def get_pairs_by_chain_and_address(
     pair_id: str = Path(..., description="آدرس جفت")
 ):
     """دریافت یک یا چند جفت بر اساس زنجیره و آدرس جفت"""
-    return dexscreener.get_pairs_by_chain_and_address(chain_id, pair_id)
+    return await dexscreener.get_pairs_by_chain_and_address(chain_id, pair_id)
 
 @router.get("/search")
 async def search_pairs(
     query: str = Query(..., description="عبارت جستجو")
 ):
     """جستجو برای جفت‌های مطابق با عبارت جستجو"""
-    return dexscreener.search_pairs(query)
+    return await dexscreener.search_pairs(query)
 
 @router.get("/token-pairs/{chain_id}/{token_address}")
 async def get_pools_by_token(
@@ -61,12 +61,12 @@ async def get_pools_by_token(
     token_address: str = Path(..., description="آدرس قرارداد توکن")
 ):
     """دریافت استخرهای یک توکن مشخص شده"""
-    return dexscreener.get_pools_by_token(chain_id, token_address)
+    return await dexscreener.get_pools_by_token(chain_id, token_address)
 
 @router.get("/tokens/{chain_id}/{token_addresses}")
 async def get_pairs_by_token(
     chain_id: str = Path(..., description="شناسه زنجیره بلاکی"),
-    token_addresses: str = Path(..., description="آدرس‌های قرارداد توکن (می‌تواند چندین آدرس جدا شده با کاما باشد)")
+    token_addresses: str = Path(..., description="آدرس‌های قرارداد توکن (هر تعداد آدرس جدا شده با کاما)")
 ):
-    """دریافت یک یا چند جفت بر اساس آدرس‌های توکن"""
-    return dexscreener.get_pairs_by_token(chain_id, token_addresses)
+    """دریافت جفت‌ها بر اساس آدرس‌های توکن (لیست‌های طولانی به صورت خودکار دسته‌بندی و ادغام می‌شوند)"""
+    return await dexscreener.get_pairs_by_token(chain_id, token_addresses)
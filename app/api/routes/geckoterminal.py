@@ -2,6 +2,7 @@ from fastapi import APIRouter, Query, Path, HTTPException
 from typing import Optional
 from app.services import geckoterminal
 from app.utils.rate_limiter import rate_limiter
+from app.utils.projection import Projection
 from app.config.settings import RATE_LIMITS
 
 router = APIRouter()
@@ -9,30 +10,23 @@ router = APIRouter()
 # تنظیم محدودیت نرخ برای API
 rate_limiter.set_limit("/api/geckoterminal", RATE_LIMITS["GECKOTERMINAL"])
 
+# محدود کردن تعداد نتایج لیست‌ها به 20 (شکل‌دهی درخواست‌شده کلاینت پس از آن اعمال می‌شود)؛
+# پاسخ شکل‌داده‌شده با ETag خودش کش می‌شود تا درخواست‌های تکراری بدون پارس و سریال‌سازی پاسخ بگیرند
+TOP_POOLS = Projection(limits={"pools": 20})
+TOP_TOKENS = Projection(limits={"tokens": 20})
+
 # Pools endpoints
 @router.get("/networks/trending_pools")
 async def get_trending_pools_all_networks():
     """استخرهای ترند در تمام شبکه‌ها را دریافت می‌کند"""
-    result = geckoterminal.get_trending_pools_all_networks()
-    
-    # محدود کردن تعداد نتایج به 20
-    if "pools" in result and isinstance(result["pools"], list):
-        result["pools"] = result["pools"][:20]
-    
-    return result
+    return await geckoterminal.get_trending_pools_all_networks(shape=TOP_POOLS)
 
 @router.get("/networks/{network}/trending_pools")
 async def get_trending_pools_by_network(
     network: str = Path(..., description="نام شبکه")
 ):
     """استخرهای ترند در یک شبکه خاص را دریافت می‌کند"""
-    result = geckoterminal.get_trending_pools_by_network(network)
-    
-    # محدود کردن تعداد نتایج به 20
-    if "pools" in result and isinstance(result["pools"], list):
-        result["pools"] = result["pools"][:20]
-    
-    return result
+    return await geckoterminal.get_trending_pools_by_network(network, shape=TOP_POOLS)
 
 @router.get("/networks/{network}/tokens/{address}/info")
 async def get_token_info(
@@ -40,13 +34,7 @@ async def get_token_info(
     address: str = Path(..., description="آدرس توکن")
 ):
     """اطلاعات خاص یک توکن در یک شبکه را دریافت می‌کند"""
-    result = geckoterminal.get_token_info(network, address)
-    
-    # محدود کردن تعداد نتایج به 20 اگر داده‌ای وجود داشته باشد
-    if "tokens" in result and isinstance(result["tokens"], list):
-        result["tokens"] = result["tokens"][:20]
-    
-    return result
+    return await geckoterminal.get_token_info(network, address, shape=TOP_TOKENS)
 
 @router.get("/networks/{network}/pools/{pool_address}/info")
 async def get_pool_tokens_info(
@@ -54,16 +42,10 @@ async def get_pool_tokens_info(
     pool_address: str = Path(..., description="آدرس استخر")
 ):
     """اطلاعات توکن‌های یک استخر در یک شبکه را دریافت می‌کند"""
-    return geckoterminal.get_pool_tokens_info(network, pool_address)
+    return await geckoterminal.get_pool_tokens_info(network, pool_address)
 
 @router.get("/tokens/info_recently_updated")
 async def get_recently_updated_tokens_info():
     """اطلاعات توکن‌های به‌روزرسانی شده اخیر در تمام شبکه‌ها را دریافت می‌کند"""
-    result = geckoterminal.get_recently_updated_tokens_info()
-    
-    # محدود کردن تعداد نتایج به 20
-    if "tokens" in result and isinstance(result["tokens"], list):
-        result["tokens"] = result["tokens"][:20]
-    
-    return result
+    return await geckoterminal.get_recently_updated_tokens_info(shape=TOP_TOKENS)
 
@@ -1,9 +1,10 @@
 from fastapi import APIRouter, Query, Path, HTTPException, Body
+from fastapi.responses import StreamingResponse
 from typing import Optional, List, Dict, Any
 import logging
-from app.services import moralis
+from app.services import moralis, swap_analytics, candles
 from app.utils.rate_limiter import rate_limiter
-from app.config.settings import RATE_LIMITS
+from app.config.settings import RATE_LIMITS, MORALIS_STREAM_MAX_RECORDS, SWAP_ANALYTICS_MAX_RECORDS
 
 # تنظیم لاگر
 logger = logging.getLogger(__name__)
@@ -19,7 +20,7 @@ async def get_trending_tokens(
     limit: int = Query(10, description="محدودیت تعداد نتایج", le=100)
 ):
     """دریافت توکن‌های محبوب"""
-    return moralis.get_trending_tokens(limit)
+    return await moralis.get_trending_tokens(limit)
 
 # Strategy Builder
 @router.get("/discovery/tokens")
@@ -32,7 +33,7 @@ async def get_filtered_tokens(
     min_market_cap: Optional[float] = Query(None, description="حداقل حجم بازار")
 ):
     """دریافت توکن‌های فیلتر شده"""
-    return moralis.get_filtered_tokens(chain, limit, min_price, max_price, min_volume_24h, min_market_cap)
+    return await moralis.get_filtered_tokens(chain, limit, min_price, max_price, min_volume_24h, min_market_cap)
 
 # Token Prices & Charts
 @router.get("/token/{network}/{address}/price")
@@ -48,7 +49,7 @@ async def get_token_price(
             status_code=400, 
             detail="برای API موریالیس سولانا فقط شبکه 'mainnet' مجاز است"
         )
-    return moralis.get_token_price("mainnet", address)  # ارسال صریح mainnet
+    return await moralis.get_token_price("mainnet", address)  # ارسال صریح mainnet
 
 # Token Metadata
 @router.get("/token/{network}/{address}/metadata")
@@ -64,7 +65,7 @@ async def get_token_metadata(
             status_code=400, 
             detail="برای API موریالیس سولانا فقط شبکه 'mainnet' مجاز است"
         )
-    return moralis.get_token_metadata("mainnet", address)
+    return await moralis.get_token_metadata("mainnet", address)
 
 # Token Holders
 @router.get("/token/mainnet/holders/{address}")
@@ -72,17 +73,23 @@ async def get_token_holder_stats(
     address: str = Path(..., description="آدرس توکن")
 ):
     """دریافت آمار دارندگان توکن"""
-    return moralis.get_token_holder_stats(address)
+    return await moralis.get_token_holder_stats(address)
 
 @router.get("/token/mainnet/holders/{address}/historical")
 async def get_historical_token_holders(
     address: str = Path(..., description="آدرس توکن"),
-    time_frame: str = Query("1d", description="بازه زمانی")
+    time_frame: str = Query("1d", description="بازه زمانی"),
+    from_date: Optional[str] = Query(None, description="ابتدای بازه زمانی (ISO 8601)، پیش‌فرض 30 روز قبل"),
+    to_date: Optional[str] = Query(None, description="انتهای بازه زمانی (ISO 8601)، پیش‌فرض اکنون"),
 ):
-    """دریافت آمار تاریخی دارندگان توکن"""
+    """
+    دریافت آمار تاریخی دارندگان توکن
+
+    پاسخ همان شکل Moralis است (result از جدید به قدیم و cursor) با این تفاوت که همه نقاط بازه در یک پاسخ
+    برمی‌گردند (cursor همیشه null است) و فیلدهای timeFrame، fromDate، toDate و total کنار آن اضافه شده‌اند
+    """
     logger.debug(f"درخواست تاریخی دارندگان توکن با آدرس: {address} و time_frame: {time_frame}")
-    # اصلاح پارامترها مطابق با داکیومنت موریالیس
-    return moralis.get_historical_token_holders(address, time_frame)
+    return await moralis.get_historical_token_holders(address, time_frame, from_date, to_date)
 
 # Token Pairs & Liquidity
 @router.get("/token/{network}/{address}/pairs")
@@ -98,7 +105,7 @@ async def get_token_pairs_by_address(
             status_code=400, 
             detail="برای API موریالیس سولانا فقط شبکه 'mainnet' مجاز است"
         )
-    return moralis.get_token_pairs_by_address("mainnet", address)
+    return await moralis.get_token_pairs_by_address("mainnet", address)
 
 @router.get("/token/{network}/pairs/{pair_address}/stats")
 async def get_token_pair_stats(
@@ -113,7 +120,7 @@ async def get_token_pair_stats(
             status_code=400, 
             detail="برای API موریالیس سولانا فقط شبکه 'mainnet' مجاز است"
         )
-    return moralis.get_token_pair_stats("mainnet", pair_address)
+    return await moralis.get_token_pair_stats("mainnet", pair_address)
 
 @router.get("/token/{network}/{address}/pairs/stats")
 async def get_aggregated_token_pair_stats(
@@ -128,7 +135,7 @@ async def get_aggregated_token_pair_stats(
             status_code=400, 
             detail="برای API موریالیس سولانا فقط شبکه 'mainnet' مجاز است"
         )
-    return moralis.get_aggregated_token_pair_stats("mainnet", address)
+    return await moralis.get_aggregated_token_pair_stats("mainnet", address)
 
 # Token Swaps
 @router.get("/token/{network}/pairs/{pair_address}/swaps")
@@ -146,7 +153,7 @@ async def get_swaps_by_pair_address(
             status_code=400, 
             detail="برای API موریالیس سولانا فقط شبکه 'mainnet' مجاز است"
         )
-    return moralis.get_swaps_by_pair_address("mainnet", pair_address, limit, min_value_usd)
+    return await moralis.get_swaps_by_pair_address("mainnet", pair_address, limit, min_value_usd)
 
 @router.get("/token/{network}/{token_address}/swaps")
 async def get_swaps_by_token_address(
@@ -163,7 +170,7 @@ async def get_swaps_by_token_address(
             status_code=400, 
             detail="برای API موریالیس سولانا فقط شبکه 'mainnet' مجاز است"
         )
-    return moralis.get_swaps_by_token_address("mainnet", token_address, limit, min_value_usd)
+    return await moralis.get_swaps_by_token_address("mainnet", token_address, limit, min_value_usd)
 
 @router.get("/account/{network}/{wallet_address}/swaps")
 async def get_swaps_by_wallet_address(
@@ -180,7 +187,138 @@ async def get_swaps_by_wallet_address(
             status_code=400, 
             detail="برای API موریالیس سولانا فقط شبکه 'mainnet' مجاز است"
         )
-    return moralis.get_swaps_by_wallet_address("mainnet", wallet_address, limit, min_value_usd)
+    return await moralis.get_swaps_by_wallet_address("mainnet", wallet_address, limit, min_value_usd)
+
+def _validate_stream_network(network: str) -> None:
+    # اعتبارسنجی شبکه
+    if network.lower() != "mainnet":
+        logger.warning(f"درخواست با شبکه نامعتبر: {network}. فقط 'mainnet' مجاز است.")
+        raise HTTPException(
+            status_code=400, 
+            detail="برای API موریالیس سولانا فقط شبکه 'mainnet' مجاز است"
+        )
+
+@router.get("/token/{network}/pairs/{pair_address}/swaps/stream")
+async def stream_swaps_by_pair_address(
+    network: str = Path(..., description="شبکه (فقط mainnet مجاز است)"),
+    pair_address: str = Path(..., description="آدرس جفت"),
+    min_value_usd: Optional[float] = Query(None, description="حداقل ارزش سوآپ به دلار"),
+    from_date: Optional[str] = Query(None, description="ابتدای بازه زمانی (ISO 8601)"),
+    to_date: Optional[str] = Query(None, description="انتهای بازه زمانی (ISO 8601)"),
+    max_records: int = Query(1000, description="حداکثر تعداد سوآپ‌های خروجی", ge=1, le=MORALIS_STREAM_MAX_RECORDS)
+):
+    """جریان NDJSON همه سوآپ‌ها بر اساس آدرس جفت با پیمایش خودکار صفحات"""
+    _validate_stream_network(network)
+    return StreamingResponse(
+        moralis.stream_swaps_by_pair_address(
+            "mainnet", pair_address,
+            min_value_usd=min_value_usd, from_date=from_date, to_date=to_date, max_records=max_records,
+        ),
+        media_type="application/x-ndjson",
+    )
+
+@router.get("/token/{network}/{token_address}/swaps/stream")
+async def stream_swaps_by_token_address(
+    network: str = Path(..., description="شبکه (فقط mainnet مجاز است)"),
+    token_address: str = Path(..., description="آدرس توکن"),
+    min_value_usd: Optional[float] = Query(None, description="حداقل ارزش سوآپ به دلار"),
+    from_date: Optional[str] = Query(None, description="ابتدای بازه زمانی (ISO 8601)"),
+    to_date: Optional[str] = Query(None, description="انتهای بازه زمانی (ISO 8601)"),
+    max_records: int = Query(1000, description="حداکثر تعداد سوآپ‌های خروجی", ge=1, le=MORALIS_STREAM_MAX_RECORDS)
+):
+    """جریان NDJSON همه سوآپ‌ها بر اساس آدرس توکن با پیمایش خودکار صفحات"""
+    _validate_stream_network(network)
+    return StreamingResponse(
+        moralis.stream_swaps_by_token_address(
+            "mainnet", token_address,
+            min_value_usd=min_value_usd, from_date=from_date, to_date=to_date, max_records=max_records,
+        ),
+        media_type="application/x-ndjson",
+    )
+
+@router.get("/account/{network}/{wallet_address}/swaps/stream")
+async def stream_swaps_by_wallet_address(
+    network: str = Path(..., description="شبکه (فقط mainnet مجاز است)"),
+    wallet_address: str = Path(..., description="آدرس کیف پول"),
+    min_value_usd: Optional[float] = Query(None, description="حداقل ارزش سوآپ به دلار"),
+    from_date: Optional[str] = Query(None, description="ابتدای بازه زمانی (ISO 8601)"),
+    to_date: Optional[str] = Query(None, description="انتهای بازه زمانی (ISO 8601)"),
+    max_records: int = Query(1000, description="حداکثر تعداد سوآپ‌های خروجی", ge=1, le=MORALIS_STREAM_MAX_RECORDS)
+):
+    """جریان NDJSON همه سوآپ‌ها بر اساس آدرس کیف پول با پیمایش خودکار صفحات"""
+    _validate_stream_network(network)
+    return StreamingResponse(
+        moralis.stream_swaps_by_wallet_address(
+            "mainnet", wallet_address,
+            min_value_usd=min_value_usd, from_date=from_date, to_date=to_date, max_records=max_records,
+        ),
+        media_type="application/x-ndjson",
+    )
+
+@router.get("/token/{network}/pairs/{pair_address}/swaps/analytics")
+async def get_pair_swap_analytics(
+    network: str = Path(..., description="شبکه (فقط mainnet مجاز است)"),
+    pair_address: str = Path(..., description="آدرس جفت"),
+    interval: str = Query("1h", description="طول بازه‌های زمانی (1m، 5m، 15m، 1h، 4h، 1d)"),
+    min_value_usd: Optional[float] = Query(None, description="حداقل ارزش سوآپ به دلار"),
+    from_date: Optional[str] = Query(None, description="ابتدای بازه زمانی (ISO 8601)"),
+    to_date: Optional[str] = Query(None, description="انتهای بازه زمانی (ISO 8601)"),
+    max_records: int = Query(SWAP_ANALYTICS_MAX_RECORDS, description="حداکثر تعداد سوآپ‌های تحلیل‌شده", ge=1, le=MORALIS_STREAM_MAX_RECORDS),
+    top_wallets: int = Query(10, description="تعداد کیف پول‌های برتر", ge=0, le=100)
+):
+    """تحلیل تجمیعی سوآپ‌ها بر اساس آدرس جفت: حجم و VWAP هر بازه، فشار خرید و فروش، کیف پول‌های برتر و هیستوگرام اندازه"""
+    _validate_stream_network(network)
+    return await swap_analytics.get_swap_analytics(
+        "pair", "mainnet", pair_address, interval, min_value_usd, from_date, to_date, max_records, top_wallets
+    )
+
+@router.get("/token/{network}/{token_address}/swaps/analytics")
+async def get_token_swap_analytics(
+    network: str = Path(..., description="شبکه (فقط mainnet مجاز است)"),
+    token_address: str = Path(..., description="آدرس توکن"),
+    interval: str = Query("1h", description="طول بازه‌های زمانی (1m، 5m، 15m، 1h، 4h، 1d)"),
+    min_value_usd: Optional[float] = Query(None, description="حداقل ارزش سوآپ به دلار"),
+    from_date: Optional[str] = Query(None, description="ابتدای بازه زمانی (ISO 8601)"),
+    to_date: Optional[str] = Query(None, description="انتهای بازه زمانی (ISO 8601)"),
+    max_records: int = Query(SWAP_ANALYTICS_MAX_RECORDS, description="حداکثر تعداد سوآپ‌های تحلیل‌شده", ge=1, le=MORALIS_STREAM_MAX_RECORDS),
+    top_wallets: int = Query(10, description="تعداد کیف پول‌های برتر", ge=0, le=100)
+):
+    """تحلیل تجمیعی سوآپ‌ها بر اساس آدرس توکن: حجم و VWAP هر بازه، فشار خرید و فروش، کیف پول‌های برتر و هیستوگرام اندازه"""
+    _validate_stream_network(network)
+    return await swap_analytics.get_swap_analytics(
+        "token", "mainnet", token_address, interval, min_value_usd, from_date, to_date, max_records, top_wallets
+    )
+
+@router.get("/account/{network}/{wallet_address}/swaps/analytics")
+async def get_wallet_swap_analytics(
+    network: str = Path(..., description="شبکه (فقط mainnet مجاز است)"),
+    wallet_address: str = Path(..., description="آدرس کیف پول"),
+    interval: str = Query("1h", description="طول بازه‌های زمانی (1m، 5m، 15m، 1h، 4h، 1d)"),
+    min_value_usd: Optional[float] = Query(None, description="حداقل ارزش سوآپ به دلار"),
+    from_date: Optional[str] = Query(None, description="ابتدای بازه زمانی (ISO 8601)"),
+    to_date: Optional[str] = Query(None, description="انتهای بازه زمانی (ISO 8601)"),
+    max_records: int = Query(SWAP_ANALYTICS_MAX_RECORDS, description="حداکثر تعداد سوآپ‌های تحلیل‌شده", ge=1, le=MORALIS_STREAM_MAX_RECORDS),
+    top_wallets: int = Query(10, description="تعداد کیف پول‌های برتر", ge=0, le=100)
+):
+    """تحلیل تجمیعی سوآپ‌ها بر اساس آدرس کیف پول: حجم و VWAP هر بازه، فشار خرید و فروش، کیف پول‌های برتر و هیستوگرام اندازه"""
+    _validate_stream_network(network)
+    return await swap_analytics.get_swap_analytics(
+        "wallet", "mainnet", wallet_address, interval, min_value_usd, from_date, to_date, max_records, top_wallets
+    )
+
+# OHLCV Candles
+@router.get("/token/{network}/pairs/{pair_address}/ohlcv")
+async def get_pair_ohlcv(
+    network: str = Path(..., description="شبکه (فقط mainnet مجاز است)"),
+    pair_address: str = Path(..., description="آدرس جفت"),
+    interval: str = Query("1m", description="بازه کندل (1m، 5m، 1h)"),
+    start: Optional[str] = Query(None, description="ابتدای بازه زمانی (ISO 8601)"),
+    end: Optional[str] = Query(None, description="انتهای بازه زمانی (ISO 8601)"),
+    limit: int = Query(500, description="حداکثر تعداد کندل‌ها (آخرین کندل‌ها)", ge=1, le=1440)
+):
+    """دریافت کندل‌های OHLCV جفت که به صورت افزایشی از سوآپ‌ها ساخته و در حافظه نگهداری می‌شوند"""
+    _validate_stream_network(network)
+    return await candles.get_ohlcv(pair_address, interval, start, end, limit)
 
 # Token Snipers
 @router.get("/token/{network}/pairs/{pair_address}/snipers")
@@ -196,7 +334,7 @@ async def get_snipers_by_pair_address(
             status_code=400, 
             detail="برای API موریالیس سولانا فقط شبکه 'mainnet' مجاز است"
         )
-    return moralis.get_snipers_by_pair_address("mainnet", pair_address)
+    return await moralis.get_snipers_by_pair_address("mainnet", pair_address)
 
 # Wallet API
 @router.get("/account/{network}/{address}/balance")
@@ -212,7 +350,7 @@ async def get_native_balance(
             status_code=400, 
             detail="برای API موریالیس سولانا فقط شبکه 'mainnet' مجاز است"
         )
-    return moralis.get_native_balance("mainnet", address)
+    return await moralis.get_native_balance("mainnet", address)
 
 @router.get("/account/{network}/{address}/tokens")
 async def get_spl(
@@ -227,7 +365,7 @@ async def get_spl(
             status_code=400, 
             detail="برای API موریالیس سولانا فقط شبکه 'mainnet' مجاز است"
         )
-    return moralis.get_spl("mainnet", address)
+    return await moralis.get_spl("mainnet", address)
 
 @router.get("/account/{network}/{address}/portfolio")
 async def get_portfolio(
@@ -242,4 +380,4 @@ async def get_portfolio(
             status_code=400, 
             detail="برای API موریالیس سولانا فقط شبکه 'mainnet' مجاز است"
         )
-    return moralis.get_portfolio("mainnet", address)
+    return await moralis.get_portfolio("mainnet", address)
@@ -0,0 +1,23 @@
+from fastapi import APIRouter, Query
+from typing import Optional
+from app.services import price
+from app.utils.rate_limiter import rate_limiter
+from app.config.settings import RATE_LIMITS
+
+router = APIRouter()
+
+# تنظیم محدودیت نرخ برای API
+rate_limiter.set_limit("/api/price", RATE_LIMITS["PRICE"])
+
+# قیمت یکپارچه از چند منبع
+@router.get("")
+async def get_consolidated_price(
+    chain: str = Query(..., description="زنجیره (solana، ethereum، bsc، base)"),
+    address: str = Query(..., description="آدرس قرارداد توکن"),
+    symbol: Optional[str] = Query(None, description="نماد توکن برای استفاده از CryptoCompare (اختیاری)"),
+    vs_currency: str = Query("usd", description="ارز مقایسه"),
+    mode: str = Query("first", pattern="^(first|median|quorum)$", description="first: اولین پاسخ معتبر با درخواست پشتیبان، median: میانه همه منابع، quorum: میانه پس از رسیدن به حد نصاب"),
+    quorum: int = Query(2, ge=1, description="تعداد پاسخ‌های معتبر لازم در حالت quorum")
+):
+    """دریافت قیمت توکن از چند منبع با جایگزینی خودکار در صورت کندی یا خطا و گزارش اختلاف قیمت منابع"""
+    return await price.get_consolidated_price(chain, address, symbol, vs_currency, mode, quorum)
@@ -0,0 +1,113 @@
+import asyncio
+import json
+import logging
+from typing import List
+from fastapi import APIRouter, Query, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from app.services.push import push_hub, Subscriber, format_sse, resolve_topic
+from app.utils.rate_limiter import rate_limiter
+from app.config.settings import RATE_LIMITS, PUSH_HEARTBEAT_INTERVAL, PUSH_MAX_TOPICS_PER_SUBSCRIBER
+
+# تنظیم لاگر
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+# تنظیم محدودیت نرخ برای API
+rate_limiter.set_limit("/api/stream", RATE_LIMITS["STREAM"])
+
+def _check_topics(topics: List[str]) -> None:
+    """بررسی موضوع‌ها پیش از شروع پاسخ تا خطا با کد وضعیت مناسب برگردد"""
+    if len(topics) > PUSH_MAX_TOPICS_PER_SUBSCRIBER:
+        raise HTTPException(status_code=400, detail=f"حداکثر {PUSH_MAX_TOPICS_PER_SUBSCRIBER} موضوع در هر اتصال مجاز است")
+    for topic in topics:
+        resolve_topic(topic)
+
+async def _sse_events(topics: List[str]):
+    # اشتراک داخل try ساخته می‌شود تا با قطع اتصال در هر مرحله (حتی پیش از اولین رویداد) حذف شود
+    # و اگر پاسخ هرگز شروع نشود اشتراکی ساخته نشده باشد
+    subscriber = Subscriber()
+    try:
+        for topic in topics:
+            try:
+                push_hub.subscribe(subscriber, topic)
+            except HTTPException as e:
+                yield format_sse({"topic": topic, "event": "error", "data": {"status_code": e.status_code, "detail": e.detail}})
+                return
+        yield "retry: 3000\n\n"
+        while True:
+            event = await subscriber.next_event(PUSH_HEARTBEAT_INTERVAL)
+            if event is None:
+                yield ": ping\n\n"
+                continue
+            yield format_sse(event)
+            if event["event"] == "close":
+                break
+    finally:
+        push_hub.unsubscribe(subscriber)
+
+@router.get("/sse")
+async def stream_sse(
+    topic: List[str] = Query(..., description="موضوع‌ها: trending_pools/{network}، token_boosts/latest، token_boosts/top، price/{chain}/{address}")
+):
+    """
+    اشتراک Server-Sent Events: ابتدا وضعیت کامل (snapshot) و سپس فقط تغییرات (patch به صورت JSON Merge Patch)
+    هر موضوع یک poller مشترک برای همه مشترکان دارد
+    """
+    _check_topics(topic)
+    return StreamingResponse(
+        _sse_events(topic),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.websocket("/ws")
+async def stream_websocket(websocket: WebSocket):
+    """
+    اشتراک WebSocket: پیام‌های {"action": "subscribe" | "unsubscribe", "topic": ...} از کلاینت
+    و رویدادهای snapshot، patch و error از سرور
+    """
+    await websocket.accept()
+    subscriber = Subscriber()
+
+    async def receive_commands():
+        while True:
+            try:
+                message = json.loads(await websocket.receive_text())
+                action, topic = message.get("action"), str(message.get("topic", ""))
+            except (json.JSONDecodeError, AttributeError):
+                subscriber.offer({"event": "error", "data": {"detail": "پیام نامعتبر"}})
+                continue
+            try:
+                if action == "subscribe":
+                    if len(subscriber.topics) >= PUSH_MAX_TOPICS_PER_SUBSCRIBER:
+                        raise HTTPException(status_code=400, detail=f"حداکثر {PUSH_MAX_TOPICS_PER_SUBSCRIBER} موضوع در هر اتصال مجاز است")
+                    push_hub.subscribe(subscriber, topic)
+                elif action == "unsubscribe":
+                    push_hub.unsubscribe(subscriber, topic)
+                else:
+                    raise HTTPException(status_code=400, detail=f"عملیات نامعتبر: {action}")
+            except HTTPException as e:
+                subscriber.offer({"topic": topic, "event": "error", "data": {"status_code": e.status_code, "detail": e.detail}})
+
+    receiver = asyncio.ensure_future(receive_commands())
+    try:
+        while True:
+            getter = asyncio.ensure_future(subscriber.next_event(PUSH_HEARTBEAT_INTERVAL))
+            done, _ = await asyncio.wait({getter, receiver}, return_when=asyncio.FIRST_COMPLETED)
+            if getter not in done:
+                # قطع اتصال از سمت کلاینت
+                getter.cancel()
+                break
+            event = getter.result()
+            await websocket.send_json(event if event is not None else {"event": "ping"})
+            if event is not None and event["event"] == "close":
+                await websocket.close(code=1013)
+                break
+    except WebSocketDisconnect:
+        pass
+    finally:
+        receiver.cancel()
+        push_hub.unsubscribe(subscriber)
+        # خواندن خطای قطع اتصال تا هشدار خطای بازیابی‌نشده ثبت نشود
+        await asyncio.gather(receiver, return_exceptions=True)
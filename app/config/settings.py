@@ -51,6 +51,11 @@ BASE_URLS = {
     "CRYPTOPANIC": "https://cryptopanic.com/api/v1",
 }
 
+# تنظیمات استخر اتصال HTTP برای هر ارائه‌دهنده
+HTTP_POOL_MAX_CONNECTIONS = int(os.getenv("HTTP_POOL_MAX_CONNECTIONS", "100"))
+HTTP_POOL_MAX_KEEPALIVE = int(os.getenv("HTTP_POOL_MAX_KEEPALIVE", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+
 # محدودیت‌های نرخ درخواست (درخواست در دقیقه)
 RATE_LIMITS = {
     "DEXSCREENER_DEFAULT": 300,
@@ -65,11 +70,231 @@ RATE_LIMITS = {
     "CRYPTOCOMPARE": 100,
     "SOLSNIFFER": 50,
     "CRYPTOPANIC": 50,
+    "BATCH": 60,
+    "PRICE": 120,
+    "STREAM": 30,
+}
+
+# سهمیه‌های خروجی هر ارائه‌دهنده: پیشوند مسیر (نسبت به BASE_URLS) -> کلید RATE_LIMITS
+# طولانی‌ترین پیشوند منطبق انتخاب می‌شود؛ ارائه‌دهنده‌هایی که یک کلید مشترک دارند یک سهمیه را تقسیم می‌کنند
+UPSTREAM_QUOTAS = {
+    "DEXSCREENER": {
+        "": "DEXSCREENER_DEFAULT",
+        "/token-profiles": "DEXSCREENER_TOKEN_PROFILES",
+        "/token-boosts": "DEXSCREENER_TOKEN_BOOSTS",
+        "/orders": "DEXSCREENER_ORDERS",
+    },
+    "GECKOTERMINAL": {"": "GECKOTERMINAL"},
+    "COINGECKO": {"": "COINGECKO"},
+    "MORALIS_SOLANA": {"": "MORALIS"},
+    "MORALIS_INDEX": {"": "MORALIS"},
+    "AVE": {"": "AVE"},
+    "COINSTATS": {"": "COINSTATS"},
+    "CRYPTOCOMPARE": {"": "CRYPTOCOMPARE"},
+    "SOLSNIFFER": {"": "SOLSNIFFER"},
+    "CRYPTOPANIC": {"": "CRYPTOPANIC"},
+}
+# تعداد درخواست‌هایی که می‌توانند بدون فاصله پشت سر هم ارسال شوند
+UPSTREAM_BURST = int(os.getenv("UPSTREAM_BURST", "5"))
+# حداکثر زمان انتظار در صف سهمیه خروجی (ثانیه)؛ بیشتر از آن درخواست فوراً رد می‌شود
+UPSTREAM_MAX_QUEUE_WAIT = float(os.getenv("UPSTREAM_MAX_QUEUE_WAIT", "10"))
+# تعداد worker ها؛ بدون ذخیره‌ساز مشترک هر worker سهم مساوی از سهمیه را مصرف می‌کند
+UPSTREAM_WORKERS = max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+
+# مهلت کل هر درخواست ورودی (ثانیه) به تفکیک پیشوند مسیر؛ زمان‌بندی و تلاش‌های مجدد بالادستی از همین بودجه کم می‌کنند
+# کلاینت می‌تواند با سربرگ X-Request-Timeout مهلت دیگری (حداکثر REQUEST_DEADLINE_MAX) تعیین کند
+REQUEST_DEADLINES = {
+    "": float(os.getenv("REQUEST_DEADLINE_DEFAULT", "25")),
+    "/api/moralis": 20,
+    "/api/coingecko": 20,
+}
+REQUEST_DEADLINE_MAX = float(os.getenv("REQUEST_DEADLINE_MAX", "60"))
+
+# تلاش مجدد درخواست‌های بالادستی: عقب‌نشینی نمایی با jitter (ثانیه)؛ Retry-After بیشتر از سقف باعث توقف تلاش می‌شود
+RETRY_BACKOFF_BASE = float(os.getenv("RETRY_BACKOFF_BASE", "0.5"))
+RETRY_BACKOFF_MAX = float(os.getenv("RETRY_BACKOFF_MAX", "10"))
+
+# قطع‌کننده مدار هر ارائه‌دهنده: تعداد خطای پیاپی تا باز شدن، مدت باز ماندن (ثانیه) و تعداد درخواست آزمایشی
+CIRCUIT_BREAKER_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_BREAKER_FAILURE_THRESHOLD", "5"))
+CIRCUIT_BREAKER_RECOVERY_TIMEOUT = float(os.getenv("CIRCUIT_BREAKER_RECOVERY_TIMEOUT", "30"))
+CIRCUIT_BREAKER_HALF_OPEN_PROBES = int(os.getenv("CIRCUIT_BREAKER_HALF_OPEN_PROBES", "1"))
+
+# حداکثر تعداد آدرس توکن در هر درخواست tokens/v1 به DexScreener
+DEXSCREENER_MAX_TOKEN_ADDRESSES = int(os.getenv("DEXSCREENER_MAX_TOKEN_ADDRESSES", "30"))
+
+# جمع‌آوری درخواست‌های قیمت Ave: پنجره انتظار (ثانیه) و حداکثر شناسه در هر درخواست دسته‌ای
+AVE_PRICE_BATCH_WINDOW = float(os.getenv("AVE_PRICE_BATCH_WINDOW", "0.015"))
+AVE_PRICE_BATCH_MAX = int(os.getenv("AVE_PRICE_BATCH_MAX", "200"))
+
+# درخواست گروهی (/api/batch): حداکثر تعداد زیردرخواست‌ها و تعداد اجرای هم‌زمان
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "50"))
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "10"))
+
+# پیمایش کامل تاریخچه سوآپ‌های موریالیس (خروجی NDJSON)
+MORALIS_STREAM_PAGE_SIZE = int(os.getenv("MORALIS_STREAM_PAGE_SIZE", "100"))
+MORALIS_STREAM_MAX_PAGES = int(os.getenv("MORALIS_STREAM_MAX_PAGES", "200"))
+MORALIS_STREAM_MAX_RECORDS = int(os.getenv("MORALIS_STREAM_MAX_RECORDS", "10000"))
+# مهلت هر صفحه (ثانیه)؛ جریان به جای مهلت کل درخواست از این مقدار برای هر صفحه استفاده می‌کند
+MORALIS_STREAM_PAGE_TIMEOUT = float(os.getenv("MORALIS_STREAM_PAGE_TIMEOUT", "20"))
+
+# تحلیل سوآپ‌ها: طول بازه‌های زمانی مجاز (ثانیه) و مرزهای هیستوگرام اندازه معاملات (دلار)
+SWAP_ANALYTICS_INTERVALS = {"1m": 60, "5m": 300, "15m": 900, "1h": 3600, "4h": 14400, "1d": 86400}
+SWAP_ANALYTICS_HISTOGRAM_BINS = [0, 10, 100, 1_000, 10_000, 100_000, 1_000_000]
+# مهلت کل پیمایش صفحات برای یک تحلیل (ثانیه)؛ پس از آن تحلیل روی سوآپ‌های دریافت‌شده انجام می‌شود (truncated)
+SWAP_ANALYTICS_TIMEOUT = float(os.getenv("SWAP_ANALYTICS_TIMEOUT", "30"))
+# تعداد پیش‌فرض سوآپ‌ها: صفحاتی که سهمیه موریالیس هر worker (انفجار اولیه + نرخ دقیقه‌ای) در این مهلت می‌رساند
+SWAP_ANALYTICS_MAX_RECORDS = int(os.getenv(
+    "SWAP_ANALYTICS_MAX_RECORDS",
+    str(int(UPSTREAM_BURST + RATE_LIMITS["MORALIS"] / 60 / UPSTREAM_WORKERS * SWAP_ANALYTICS_TIMEOUT * 0.8) * MORALIS_STREAM_PAGE_SIZE),
+))
+
+# کندل‌های OHLCV ساخته‌شده از سوآپ‌ها: بازه‌ها (ثانیه)، ظرفیت بافر حلقوی هر بازه و تعداد جفت‌های نگهداری‌شده
+CANDLE_INTERVALS = {"1m": 60, "5m": 300, "1h": 3600}
+CANDLE_CAPACITY = int(os.getenv("CANDLE_CAPACITY", "1440"))
+CANDLE_MAX_PAIRS = int(os.getenv("CANDLE_MAX_PAIRS", "200"))
+# حداقل فاصله (ثانیه) بین دو دریافت سوآپ‌های جدید یک جفت
+CANDLE_REFRESH_INTERVAL = float(os.getenv("CANDLE_REFRESH_INTERVAL", "10"))
+# بازه اولیه (ساعت) برای ساخت کندل‌های یک جفت جدید و حداکثر سوآپ در هر دریافت
+CANDLE_BACKFILL_HOURS = float(os.getenv("CANDLE_BACKFILL_HOURS", "24"))
+CANDLE_FETCH_MAX_RECORDS = int(os.getenv("CANDLE_FETCH_MAX_RECORDS", "5000"))
+# مهلت کل هر دریافت (ثانیه، کمتر از مهلت مسیر /api/moralis)؛ سوآپ‌های دریافت‌شده تا آن لحظه در کندل‌ها می‌مانند
+# و دریافت بعدی از همان‌جا ادامه می‌دهد
+CANDLE_FETCH_TIMEOUT = float(os.getenv("CANDLE_FETCH_TIMEOUT", "15"))
+
+# اشتراک‌های SSE/WebSocket: فاصله دریافت هر نوع موضوع (ثانیه، نه کمتر از TTL کش آن) و سقف عقب‌نشینی در خطای 429/503
+PUSH_POLL_INTERVALS = {"trending_pools": 60, "token_boosts": 30, "price": 10}
+PUSH_POLL_MAX_BACKOFF = float(os.getenv("PUSH_POLL_MAX_BACKOFF", "300"))
+PUSH_POLL_TIMEOUT = float(os.getenv("PUSH_POLL_TIMEOUT", "20"))
+PUSH_HEARTBEAT_INTERVAL = float(os.getenv("PUSH_HEARTBEAT_INTERVAL", "15"))
+# ظرفیت صف هر مشترک و تعداد سرریز مجاز پیش از قطع مشترک کند
+PUSH_SUBSCRIBER_QUEUE = int(os.getenv("PUSH_SUBSCRIBER_QUEUE", "32"))
+PUSH_SUBSCRIBER_MAX_OVERFLOWS = int(os.getenv("PUSH_SUBSCRIBER_MAX_OVERFLOWS", "5"))
+PUSH_MAX_TOPICS = int(os.getenv("PUSH_MAX_TOPICS", "200"))
+PUSH_MAX_TOPICS_PER_SUBSCRIBER = int(os.getenv("PUSH_MAX_TOPICS_PER_SUBSCRIBER", "10"))
+
+# گرم‌کننده کش: فهرست JSON فراخوانی‌ها، مثال:
+# [{"fn": "dexscreener.get_pairs_by_token", "args": ["solana", "..."]}, {"fn": "coingecko.get_global"}]
+CACHE_WARMER_WATCHLIST = os.getenv("CACHE_WARMER_WATCHLIST", "")
+# سهم گرم‌کننده از سهمیه خروجی هر ارائه‌دهنده (بقیه برای ترافیک واقعی می‌ماند)
+CACHE_WARMER_BUDGET_SHARE = float(os.getenv("CACHE_WARMER_BUDGET_SHARE", "0.2"))
+# به‌روزرسانی پس از گذشت این نسبت از TTL ورودی
+CACHE_WARMER_REFRESH_RATIO = float(os.getenv("CACHE_WARMER_REFRESH_RATIO", "0.8"))
+CACHE_WARMER_TICK = float(os.getenv("CACHE_WARMER_TICK", "1"))
+CACHE_WARMER_TIMEOUT = float(os.getenv("CACHE_WARMER_TIMEOUT", "20"))
+# تعداد اجراهای پیاپی بدون پاسخ کش‌شونده پیش از حذف یک آیتم از فهرست
+CACHE_WARMER_MAX_EMPTY_RUNS = int(os.getenv("CACHE_WARMER_MAX_EMPTY_RUNS", "3"))
+
+# ذخیره‌ساز محلی نمودارهای تاریخی CoinGecko: لایه‌های دقت (فاصله نقاط و مدت نگهداری به ثانیه، None = نامحدود)
+MARKET_CHART_STORE_DIR = os.getenv("MARKET_CHART_STORE_DIR", os.path.join("data", "market_chart"))
+MARKET_CHART_TIERS = {
+    "5m": (300, 86400),
+    "1h": (3600, 90 * 86400),
+    "1d": (86400, None),
+}
+# حداقل فاصله (ثانیه) بین دو دریافت دنباله یک سری
+MARKET_CHART_REFRESH_INTERVAL = float(os.getenv("MARKET_CHART_REFRESH_INTERVAL", "60"))
+# حداکثر سری‌های باز (memmap) در هر worker؛ سری‌هایی که اخیراً کمتر استفاده شده‌اند بسته می‌شوند
+MARKET_CHART_MAX_OPEN_SERIES = int(os.getenv("MARKET_CHART_MAX_OPEN_SERIES", "256"))
+# سقف اندازه پاسخ /market_chart/range (نقاط برای ذخیره‌ساز لازم‌اند و نباید کوتاه شوند)
+MARKET_CHART_MAX_RESPONSE_SIZE = int(os.getenv("MARKET_CHART_MAX_RESPONSE_SIZE", str(32 * 1024 * 1024)))
+
+# فشرده‌سازی پاسخ‌ها (brotli در صورت نصب بودن بسته brotli، در غیر این صورت gzip)
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "5"))
+# رویدادهای SSE فشرده نمی‌شوند تا هر رویداد بدون تأخیر برسد
+COMPRESSIBLE_MEDIA_TYPES = {"application/json", "application/x-ndjson", "text/plain", "text/html"}
+
+# ذخیره‌ساز SQLite نقاط تاریخی (آمار تاریخی دارندگان توکن)
+SNAPSHOT_STORE_PATH = os.getenv("SNAPSHOT_STORE_PATH", os.path.join("data", "snapshots.sqlite3"))
+# تعداد قفل‌های به‌روزرسانی سری‌ها در هر worker (سری‌ها بین این قفل‌ها تقسیم می‌شوند)
+SNAPSHOT_STORE_LOCK_STRIPES = int(os.getenv("SNAPSHOT_STORE_LOCK_STRIPES", "64"))
+# بازه پیش‌فرض آمار تاریخی دارندگان (روز) وقتی fromDate داده نشود
+MORALIS_HOLDERS_DEFAULT_DAYS = int(os.getenv("MORALIS_HOLDERS_DEFAULT_DAYS", "30"))
+# حداقل فاصله (ثانیه) بین دو دریافت نقاط جدید یک توکن
+MORALIS_HOLDERS_REFRESH_INTERVAL = float(os.getenv("MORALIS_HOLDERS_REFRESH_INTERVAL", "300"))
+MORALIS_HOLDERS_PAGE_SIZE = int(os.getenv("MORALIS_HOLDERS_PAGE_SIZE", "100"))
+MORALIS_HOLDERS_MAX_PAGES = int(os.getenv("MORALIS_HOLDERS_MAX_PAGES", "50"))
+# طول هر بازه زمانی آمار تاریخی دارندگان (ثانیه)؛ فاصله بیش از یک بازه تا انتهای پوشش همیشه دریافت می‌شود
+MORALIS_HOLDERS_TIME_FRAMES = {
+    "1min": 60, "5min": 300, "10min": 600, "30min": 1800, "1h": 3600, "4h": 14400,
+    "12h": 43200, "1d": 86400, "1w": 604800, "1M": 2592000,
+}
+
+# قیمت یکپارچه: نام هر زنجیره نزد هر منبع (منابعی که زنجیره را پشتیبانی نمی‌کنند حذف شده‌اند)
+PRICE_CHAINS = {
+    "solana": {"dexscreener": "solana", "coingecko": "solana", "moralis": "mainnet", "ave": "solana"},
+    "ethereum": {"dexscreener": "ethereum", "coingecko": "ethereum", "ave": "eth"},
+    "bsc": {"dexscreener": "bsc", "coingecko": "binance-smart-chain", "ave": "bsc"},
+    "base": {"dexscreener": "base", "coingecko": "base", "ave": "base"},
+}
+# ترتیب اولویت منابع در حالت first (منبع بعدی فقط در صورت کندی یا خطای منبع قبلی پرسیده می‌شود)
+PRICE_SOURCE_ORDER = os.getenv("PRICE_SOURCE_ORDER", "dexscreener,coingecko,moralis,ave,cryptocompare").split(",")
+# تأخیر پیش‌فرض (ثانیه) برای ارسال درخواست پشتیبان تا زمانی که نمونه کافی برای صدک 95 جمع نشده
+PRICE_HEDGE_DEFAULT_DELAY = float(os.getenv("PRICE_HEDGE_DEFAULT_DELAY", "0.5"))
+PRICE_LATENCY_SAMPLES = int(os.getenv("PRICE_LATENCY_SAMPLES", "200"))
+
+# محدودیت نرخ ورودی به تفکیک IP کلاینت (در غیر این صورت سهمیه هر مسیر بین همه کلاینت‌ها مشترک است)
+RATE_LIMIT_PER_CLIENT = os.getenv("RATE_LIMIT_PER_CLIENT", "False").lower() == "true"
+# حداکثر تعداد کلیدهای نگه‌داشته‌شده در محدودکننده نرخ
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "10000"))
+# پروکسی‌های معکوس مورد اعتماد (IP یا CIDR، جداشده با کاما)؛ X-Forwarded-For فقط از این آدرس‌ها پذیرفته می‌شود
+TRUSTED_PROXIES = os.getenv("TRUSTED_PROXIES", "")
+
+# مدت اعتبار کش پاسخ‌های بالادستی (ثانیه)
+# کلیدهای هم‌نام با BASE_URLS مقدار پیش‌فرض هر ارائه‌دهنده هستند و بقیه برای اندپوینت‌های خاص؛ 0 یعنی بدون کش
+CACHE_TTLS = {
+    "DEFAULT": 0,
+    "DEXSCREENER": 10,
+    "DEXSCREENER_TOKEN_PROFILES": 30,
+    "DEXSCREENER_TOKEN_BOOSTS": 30,
+    "DEXSCREENER_TOKEN_BOOSTS_TOP": 30,
+    "DEXSCREENER_TOKENS": 10,
+    "DEXSCREENER_TOKENS_CHUNK": 0,
+    "GECKOTERMINAL": 30,
+    "GECKOTERMINAL_TRENDING_POOLS": 60,
+    "GECKOTERMINAL_TRENDING_POOLS_ALL": 60,
+    "COINGECKO": 30,
+    "COINGECKO_PING": 0,
+    "COINGECKO_GLOBAL": 60,
+    "COINGECKO_TRENDING": 120,
+    "MORALIS_SOLANA": 10,
+    "MORALIS_INDEX": 30,
+    "AVE": 10,
+    "COINSTATS": 60,
+    "CRYPTOCOMPARE": 10,
+    "CRYPTOCOMPARE_NEWS": 60,
+    "CRYPTOCOMPARE_NEWS_FEEDS": 300,
+    "SOLSNIFFER": 60,
+    "CRYPTOPANIC": 60,
+}
+
+# حالت stale-while-revalidate: حداکثر زمان (ثانیه) پس از انقضای TTL که پاسخ قدیمی فوراً برگردانده
+# و هم‌زمان یک بار در پس‌زمینه به‌روز می‌شود؛ پس از TTL + این مقدار ورودی قطعاً منقضی است
+CACHE_MAX_STALE = {
+    "COINGECKO_GLOBAL": 300,
+    "COINGECKO_TRENDING": 600,
+    "GECKOTERMINAL_TRENDING_POOLS_ALL": 300,
+    "DEXSCREENER_TOKEN_BOOSTS_TOP": 120,
 }
 
-# تنظیمات مربوط به محدودسازی اندازه پاسخ‌ها
-MAX_RESPONSE_SIZE = 1024 * 1024  # 1 مگابایت
-MAX_ITEMS_PER_PAGE = 100
+# محدودیت‌های کش پاسخ‌ها (حذف LRU پس از رسیدن به هر کدام)
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "5000"))
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# ذخیره‌ساز مشترک بین worker ها (سازگار با پروتکل Redis) برای کش سطح دوم و شمارنده‌ها
+# اگر تنظیم نشود هر worker فقط از کش درون‌پردازه‌ای استفاده می‌کند
+REDIS_URL = os.getenv("REDIS_URL")
+SHARED_STORE_PREFIX = os.getenv("SHARED_STORE_PREFIX", "crypto-multi-api:")
+
+# تنظیمات مربوط به محدودسازی اندازه پاسخ‌ها: بدنه بزرگ‌تر از MAX_RESPONSE_SIZE (بایت، 0 = نامحدود) به صورت جریانی
+# پارس و لیست‌های آن به MAX_ITEMS_PER_PAGE عضو (و در مجموع حدود همین اندازه) کوتاه می‌شوند
+MAX_RESPONSE_SIZE = int(os.getenv("MAX_RESPONSE_SIZE", str(1024 * 1024)))  # 1 مگابایت
+MAX_ITEMS_PER_PAGE = int(os.getenv("MAX_ITEMS_PER_PAGE", "100"))
+
+# شکل‌دهی پاسخ با پارامترهای fields (مسیرهای نقطه‌دار) و limits (مسیر:تعداد)؛ حداکثر تعداد مسیرها و عمق هر مسیر
+PROJECTION_MAX_PATHS = int(os.getenv("PROJECTION_MAX_PATHS", "100"))
+PROJECTION_MAX_DEPTH = int(os.getenv("PROJECTION_MAX_DEPTH", "8"))
 
 # بررسی اعتبار تنظیمات
 if DEBUG:
@@ -3,19 +3,51 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 import time
 import uvicorn
+from contextlib import asynccontextmanager
 from app.config.settings import HOST, PORT, DEBUG
-from app.utils.rate_limiter import rate_limiter
+from app.utils.rate_limiter import rate_limiter, get_client_ip
+from app.utils.http_client import close_clients
+from app.utils.shared_store import close_shared_store
+from app.utils.snapshot_store import holders_store
+from app.utils.request_context import start_request_state, resolve_request_timeout
+from app.utils.circuit_breaker import circuit_breakers
+from app.utils.upstream_throttle import upstream_throttle
+from app.utils.cache import response_cache
+from app.utils.compression import CompressionMiddleware
+from app.utils.etag import ConditionalMiddleware
+from app.utils.projection import ShapedJSONResponse, parse_projection
+from app.services.price import latency_tracker
+from app.services.push import push_hub
+from app.services.cache_warmer import cache_warmer
 
 # وارد کردن روترها
+# (ماژول‌های مسیر solsniffer و cryptopanic هنوز پیاده‌سازی نشده‌اند و روتری ندارند)
 from app.api.routes import (
     dexscreener, geckoterminal, coingecko, moralis, 
-    ave, coinstats, cryptocompare, solsniffer, cryptopanic
+    ave, coinstats, cryptocompare, batch, price, stream
 )
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # شروع گرم‌کننده کش (اگر فهرستی تنظیم شده باشد)
+    cache_warmer.start()
+    try:
+        yield
+    finally:
+        # بستن استخرهای اتصال به سرویس‌های بالادستی هنگام خاموش شدن
+        await cache_warmer.stop()
+        await push_hub.close()
+        await close_clients()
+        await close_shared_store()
+        holders_store.close()
+
 app = FastAPI(
     title="Crypto Multi-API",
     description="API جامع برای دسترسی به چندین سرویس رمزارز معروف",
     version="1.0.0",
+    # شکل‌دهی پاسخ‌ها (fields / limits) پیش از سریال‌سازی JSON
+    default_response_class=ShapedJSONResponse,
+    lifespan=lifespan,
 )
 
 # تنظیم CORS
@@ -27,29 +59,54 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# ETag و پاسخ 304 برای درخواست‌های شرطی (پیش از فشرده‌سازی، روی بدنه خام)
+app.add_middleware(ConditionalMiddleware)
+
+# فشرده‌سازی پاسخ‌ها بر اساس Accept-Encoding (پاسخ‌های فشرده ذخیره‌شده در کش دوباره فشرده نمی‌شوند)
+app.add_middleware(CompressionMiddleware)
+
 # میان‌افزار برای ثبت زمان‌ پاسخگویی
 @app.middleware("http")
 async def add_process_time_header(request: Request, call_next):
     start_time = time.time()
-    
     # دریافت مسیر درخواست برای محدودیت نرخ
     path = request.url.path
+    
+    # وضعیت این درخواست (وضعیت کش، مهلت کل) که سرویس‌ها در حین اجرا از آن استفاده می‌کنند
+    request_timeout = resolve_request_timeout(path, request.headers.get("x-request-timeout"))
+    request_state = start_request_state(request_timeout)
+    request_state.accept_encoding = request.headers.get("accept-encoding")
+    if request.method in ("GET", "HEAD"):
+        request_state.if_none_match = request.headers.get("if-none-match")
+    
     try:
+        # شکل‌دهی درخواست‌شده برای پاسخ (فقط فیلدها و طول لیست‌های مورد نیاز کلاینت)
+        request_state.projection = parse_projection(request.query_params.get("fields"), request.query_params.get("limits"))
+        
         # بررسی محدودیت نرخ
-        rate_limiter.check_rate_limit(path)
+        rate_limit_status = rate_limiter.check_rate_limit(path, get_client_ip(request))
         
         response = await call_next(request)
         
+        if rate_limit_status is not None:
+            response.headers.update(rate_limit_status.headers())
+        
         # اضافه کردن سربرگ زمان پردازش
         process_time = time.time() - start_time
         response.headers["X-Process-Time"] = str(process_time)
+        
+        # سربرگ وضعیت کش پاسخ‌های بالادستی
+        cache_status = request_state.cache_header()
+        if cache_status:
+            response.headers["X-Cache"] = cache_status
         return response
     
     except HTTPException as exc:
         # اگر محدودیت نرخ تجاوز شده باشد
         return JSONResponse(
             status_code=exc.status_code,
-            content={"detail": exc.detail}
+            content={"detail": exc.detail},
+            headers=exc.headers
         )
 
 # مسیر اصلی
@@ -61,10 +118,23 @@ async def root():
         "apis_supported": [
             "DexScreener", "GeckoTerminal", "CoinGecko", 
             "Moralis", "Ave", "CoinStats", 
-            "CryptoCompare", "SolSniffer", "CryptoPanic"
+            "CryptoCompare"
         ]
     }
 
+# وضعیت سرویس‌های بالادستی برای پایش (قطع‌کننده‌های مدار، صف سهمیه خروجی و کش)
+@app.get("/health/upstreams")
+async def upstreams_health():
+    return {
+        "circuit_breakers": circuit_breakers.stats(),
+        "upstream_throttle": upstream_throttle.stats(),
+        "cache": response_cache.stats(),
+        "price_sources": latency_tracker.stats(),
+        "push_topics": push_hub.stats(),
+        "cache_warmer": cache_warmer.stats(),
+        "holders_store": holders_store.stats(),
+    }
+
 # اضافه کردن روترها
 app.include_router(dexscreener.router, prefix="/api/dexscreener", tags=["DexScreener"])
 app.include_router(geckoterminal.router, prefix="/api/geckoterminal", tags=["GeckoTerminal"])
@@ -73,8 +143,9 @@ app.include_router(moralis.router, prefix="/api/moralis", tags=["Moralis"])
 app.include_router(ave.router, prefix="/api/ave", tags=["Ave"])
 app.include_router(coinstats.router, prefix="/api/coinstats", tags=["CoinStats"])
 app.include_router(cryptocompare.router, prefix="/api/cryptocompare", tags=["CryptoCompare"])
-app.include_router(solsniffer.router, prefix="/api/solsniffer", tags=["SolSniffer"])
-app.include_router(cryptopanic.router, prefix="/api/cryptopanic", tags=["CryptoPanic"])
+app.include_router(batch.router, prefix="/api/batch", tags=["Batch"])
+app.include_router(price.router, prefix="/api/price", tags=["Price"])
+app.include_router(stream.router, prefix="/api/stream", tags=["Stream"])
 
 if __name__ == "__main__":
     uvicorn.run("app.main:app", host=HOST, port=PORT, reload=DEBUG)
@@ -1,6 +1,7 @@
-from typing import Dict, Any, Optional, List
-from app.config.settings import BASE_URLS, API_KEYS
+from typing import Dict, Any, Optional, List, Tuple
+from app.config.settings import BASE_URLS, API_KEYS, AVE_PRICE_BATCH_WINDOW, AVE_PRICE_BATCH_MAX
 from app.utils.helpers import make_request
+from app.utils.batcher import MicroBatcher
 
 AVE_BASE_URL = BASE_URLS["AVE"]
 API_KEY = API_KEYS["AVE"]
@@ -12,18 +13,25 @@ def get_headers():
     }
 
 # جستجوی توکن‌ها
-def search_tokens(keyword: str, chain: Optional[str] = None) -> Dict[str, Any]:
+async def search_tokens(keyword: str, chain: Optional[str] = None) -> Dict[str, Any]:
     """جستجوی توکن‌های مرتبط با کلیدواژه داده شده"""
     url = f"{AVE_BASE_URL}/tokens"
     params = {"keyword": keyword}
     if chain:
         params["chain"] = chain
     
-    return make_request(url=url, params=params, headers=get_headers())
+    return await make_request(url=url, params=params, headers=get_headers())
 
 # دریافت قیمت توکن‌ها
-def get_token_prices(token_ids: List[str], tvl_min: int = 1000, tx_24h_volume_min: int = 0) -> Dict[str, Any]:
-    """دریافت قیمت آخرین توکن"""
+async def get_token_prices(token_ids: List[str], tvl_min: int = 1000, tx_24h_volume_min: int = 0) -> Dict[str, Any]:
+    """دریافت قیمت آخرین توکن
+    درخواست‌های هم‌زمان با پارامترهای یکسان در یک پنجره کوتاه جمع شده و در یک درخواست دسته‌ای ارسال می‌شوند"""
+    responses = await _price_batcher.submit((tvl_min, tx_24h_volume_min), token_ids)
+    return _split_price_responses(responses, token_ids)
+
+async def _fetch_token_prices(group: Tuple[int, int], token_ids: List[str]) -> Dict[str, Any]:
+    """ارسال یک درخواست دسته‌ای قیمت برای همه شناسه‌های جمع‌آوری شده"""
+    tvl_min, tx_24h_volume_min = group
     url = f"{AVE_BASE_URL}/tokens/price"
     data = {
         "token_ids": token_ids,
@@ -31,22 +39,45 @@ def get_token_prices(token_ids: List[str], tvl_min: int = 1000, tx_24h_volume_mi
         "tx_24h_volume_min": tx_24h_volume_min
     }
     
-    return make_request(url=url, method="POST", data=data, headers=get_headers())
+    return await make_request(url=url, method="POST", data=data, headers=get_headers())
+
+def _split_price_responses(responses: List[Dict[str, Any]], token_ids: List[str]) -> Dict[str, Any]:
+    """جدا کردن قیمت‌های شناسه‌های درخواستی از پاسخ(های) دسته‌ای"""
+    wanted = set(token_ids)
+    # بدون شناسه درخواستی پاسخ دسته‌ای وجود ندارد
+    result = {key: value for key, value in responses[0].items() if key != "data"} if responses else {"data": {}}
+    
+    merged_data: Any = None
+    for response in responses:
+        data = response.get("data")
+        if isinstance(data, dict):
+            merged_data = merged_data if isinstance(merged_data, dict) else {}
+            merged_data.update({token_id: value for token_id, value in data.items() if token_id in wanted})
+        elif isinstance(data, list):
+            merged_data = merged_data if isinstance(merged_data, list) else []
+            merged_data.extend(item for item in data if isinstance(item, dict) and item.get("token_id") in wanted)
+    
+    if merged_data is not None:
+        result["data"] = merged_data
+    return result
+
+# جمع‌کننده درخواست‌های قیمت (گروه‌بندی بر اساس tvl_min و tx_24h_volume_min)
+_price_batcher = MicroBatcher(_fetch_token_prices, AVE_PRICE_BATCH_WINDOW, AVE_PRICE_BATCH_MAX)
 
 # دریافت جزئیات توکن
-def get_token_details(token_id: str) -> Dict[str, Any]:
+async def get_token_details(token_id: str) -> Dict[str, Any]:
     """دریافت جزئیات توکن"""
     url = f"{AVE_BASE_URL}/tokens/{token_id}"
-    return make_request(url=url, headers=get_headers())
+    return await make_request(url=url, headers=get_headers())
 
 # دریافت 100 نگهدارنده برتر توکن
-def get_token_top100_holders(token_id: str) -> Dict[str, Any]:
+async def get_token_top100_holders(token_id: str) -> Dict[str, Any]:
     """دریافت 100 نگهدارنده برتر توکن"""
     url = f"{AVE_BASE_URL}/tokens/top100/{token_id}"
-    return make_request(url=url, headers=get_headers())
+    return await make_request(url=url, headers=get_headers())
 
 # دریافت گزارش تشخیص ریسک قرارداد
-def get_contract_risk_detection_report(token_id: str) -> Dict[str, Any]:
+async def get_contract_risk_detection_report(token_id: str) -> Dict[str, Any]:
     """دریافت گزارش تشخیص ریسک قرارداد"""
     url = f"{AVE_BASE_URL}/contracts/{token_id}"
-    return make_request(url=url, headers=get_headers())
+    return await make_request(url=url, headers=get_headers())
@@ -0,0 +1,196 @@
+import asyncio
+import json
+import time
+import logging
+from typing import Dict, Any, Optional, List, Set
+from fastapi import HTTPException
+from app.config.settings import (
+    RATE_LIMITS,
+    UPSTREAM_QUOTAS,
+    UPSTREAM_WORKERS,
+    CACHE_WARMER_WATCHLIST,
+    CACHE_WARMER_BUDGET_SHARE,
+    CACHE_WARMER_REFRESH_RATIO,
+    CACHE_WARMER_TICK,
+    CACHE_WARMER_TIMEOUT,
+    CACHE_WARMER_MAX_EMPTY_RUNS,
+)
+from app.services import dexscreener, moralis, coingecko, geckoterminal
+from app.utils.cache import response_cache
+from app.utils.request_context import start_request_state, get_request_state
+
+# تنظیم لاگر
+logger = logging.getLogger(__name__)
+
+# سرویس‌های قابل استفاده در فهرست گرم‌کننده و ارائه‌دهنده پیش‌فرض هر کدام (پیش از اولین اجرا)
+WARMABLE_SERVICES = {
+    "dexscreener": (dexscreener, "DEXSCREENER"),
+    "moralis": (moralis, "MORALIS_SOLANA"),
+    "coingecko": (coingecko, "COINGECKO"),
+    "geckoterminal": (geckoterminal, "GECKOTERMINAL"),
+}
+
+class WatchItem:
+    """
+    یک فراخوانی سرویس در فهرست گرم‌کننده؛ کلیدهای کش و ارائه‌دهنده‌های آن پس از اولین اجرا شناخته می‌شوند
+    """
+
+    def __init__(self, name: str, fn, args: List[Any], kwargs: Dict[str, Any], provider: str):
+        self.name = name
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.providers: Set[str] = {provider}
+        self.keys: List[str] = []
+        self.interval: Optional[float] = None
+        self.next_run = 0.0
+        # امتیاز اولویت: تعداد دسترسی‌های واقعی به کلیدهای این آیتم با کاهش نمایی
+        self.score = 0.0
+        self.seen_accesses = 0
+        self.warms = 0
+        self.errors = 0
+        # اجراهای پیاپی بدون هیچ پاسخ کش‌شونده
+        self.empty_runs = 0
+        self.running = False
+
+    def update_score(self) -> None:
+        accesses = sum(response_cache.watched.get(key, 0) for key in self.keys)
+        self.score = self.score * 0.5 + (accesses - self.seen_accesses)
+        self.seen_accesses = accesses
+
+def parse_watchlist(raw: str) -> List[WatchItem]:
+    """
+    خواندن فهرست از JSON: [{"fn": "dexscreener.get_pairs_by_token", "args": ["solana", "..."], "kwargs": {}}]
+    """
+    if not raw:
+        return []
+    try:
+        entries = json.loads(raw)
+    except json.JSONDecodeError as e:
+        logger.error(f"فهرست گرم‌کننده کش نامعتبر است: {e}")
+        return []
+
+    items = []
+    for entry in entries:
+        service_name, _, fn_name = str(entry.get("fn", "")).partition(".")
+        service = WARMABLE_SERVICES.get(service_name)
+        fn = getattr(service[0], fn_name, None) if service and not fn_name.startswith("_") else None
+        if fn is None or not asyncio.iscoroutinefunction(fn):
+            logger.error(f"تابع نامعتبر در فهرست گرم‌کننده کش: {entry.get('fn')}")
+            continue
+        args, kwargs = list(entry.get("args", [])), dict(entry.get("kwargs", {}))
+        name = f"{entry['fn']}({', '.join(map(str, args))})"
+        items.append(WatchItem(name, fn, args, kwargs, service[1]))
+    return items
+
+class CacheWarmer:
+    """
+    پیش‌بارگذاری دوره‌ای فهرست مشخص پیش از انقضای کش؛ آیتم‌ها بر اساس تعداد دسترسی اولویت‌بندی
+    و فراخوانی‌های هر ارائه‌دهنده با فاصله یکنواخت در سهم CACHE_WARMER_BUDGET_SHARE از سهمیه آن پخش می‌شوند
+    """
+
+    def __init__(self, items: List[WatchItem]):
+        self.items = items
+        # ارائه‌دهنده -> زودترین زمان مجاز فراخوانی بعدی گرم‌کننده
+        self.provider_next: Dict[str, float] = {}
+        self.task: Optional[asyncio.Task] = None
+        self.running: Set[asyncio.Task] = set()
+        self.warms = 0
+        self.errors = 0
+        self.deferred = 0
+
+    def spacing(self, provider: str) -> float:
+        """فاصله بین دو فراخوانی گرم‌کننده برای یک ارائه‌دهنده (ثانیه) در هر worker"""
+        quota = (UPSTREAM_QUOTAS.get(provider) or {}).get("")
+        limit = RATE_LIMITS.get(quota, 60) if quota else 60
+        budget = max(limit * CACHE_WARMER_BUDGET_SHARE / UPSTREAM_WORKERS, 1e-3)
+        return 60.0 / budget
+
+    def start(self) -> None:
+        if self.items and self.task is None:
+            logger.info(f"شروع گرم‌کننده کش با {len(self.items)} آیتم")
+            self.task = asyncio.ensure_future(self.run())
+
+    async def stop(self) -> None:
+        tasks = list(self.running) + ([self.task] if self.task else [])
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.task = None
+
+    async def run(self) -> None:
+        while True:
+            self.tick(time.monotonic())
+            await asyncio.sleep(CACHE_WARMER_TICK)
+
+    def tick(self, now: float) -> None:
+        """اجرای آیتم‌های سررسیده به ترتیب اولویت در محدوده بودجه هر ارائه‌دهنده"""
+        due = [item for item in self.items if item.next_run <= now and not item.running]
+        for item in due:
+            item.update_score()
+        due.sort(key=lambda item: item.score, reverse=True)
+        for item in due:
+            if any(self.provider_next.get(p, 0.0) > now for p in item.providers):
+                self.deferred += 1
+                continue
+            for provider in item.providers:
+                self.provider_next[provider] = now + self.spacing(provider)
+            item.running = True
+            task = asyncio.ensure_future(self.warm(item))
+            self.running.add(task)
+            task.add_done_callback(self.running.discard)
+
+    async def warm(self, item: WatchItem) -> None:
+        # اجرا با وضعیت درخواست مستقل در حالت گرم‌کردن (کش خوانده نمی‌شود و کلیدهای نوشته‌شده ثبت می‌شوند)
+        start_request_state(CACHE_WARMER_TIMEOUT, warming=True)
+        try:
+            await item.fn(*item.args, **item.kwargs)
+        except Exception as e:
+            item.errors += 1
+            self.errors += 1
+            detail = e.detail if isinstance(e, HTTPException) else str(e)
+            logger.warning(f"گرم کردن {item.name} ناموفق بود: {detail}")
+            item.next_run = time.monotonic() + (item.interval or 60.0)
+            return
+        finally:
+            item.running = False
+
+        warmed = get_request_state().warmed_keys
+        if not warmed:
+            item.empty_runs += 1
+            if item.empty_runs >= CACHE_WARMER_MAX_EMPTY_RUNS:
+                logger.warning(f"{item.name} در {item.empty_runs} اجرای پیاپی هیچ پاسخ کش‌شونده‌ای نداشت و از گرم‌کننده حذف شد")
+                self.items.remove(item)
+                return
+            item.next_run = time.monotonic() + (item.interval or 60.0)
+            return
+        item.empty_runs = 0
+        for key, _, _ in warmed:
+            response_cache.watched.setdefault(key, 0)
+        item.keys = [key for key, _, _ in warmed]
+        item.providers = {provider for _, _, provider in warmed}
+        # به‌روزرسانی پیش از انقضای کوتاه‌ترین TTL
+        item.interval = min(ttl for _, ttl, _ in warmed) * CACHE_WARMER_REFRESH_RATIO
+        item.next_run = time.monotonic() + item.interval
+        item.warms += 1
+        self.warms += 1
+
+    def stats(self) -> Dict[str, Any]:
+        cache = response_cache.stats()
+        lookups = cache["hits"] + cache["stale_hits"] + cache["misses"]
+        return {
+            "items": len(self.items),
+            "warms": self.warms,
+            "errors": self.errors,
+            "deferred": self.deferred,
+            "warm_hits": response_cache.warm_hits,
+            # سهم پاسخ‌های داده‌شده از ورودی‌های گرم‌شده در کل جستجوهای کش
+            "hit_rate_contribution": round(response_cache.warm_hits / lookups, 4) if lookups else 0.0,
+            "top_items": [
+                {"name": item.name, "score": round(item.score, 2), "warms": item.warms, "errors": item.errors, "interval": item.interval}
+                for item in sorted(self.items, key=lambda item: item.score, reverse=True)[:10]
+            ],
+        }
+
+# نمونه سینگلتون از گرم‌کننده کش
+cache_warmer = CacheWarmer(parse_watchlist(CACHE_WARMER_WATCHLIST))
@@ -0,0 +1,274 @@
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from contextlib import aclosing
+from datetime import datetime, timezone, timedelta
+from typing import Dict, Any, Optional, List, Set
+import numpy as np
+from fastapi import HTTPException
+from app.config.settings import (
+    CANDLE_INTERVALS,
+    CANDLE_CAPACITY,
+    CANDLE_MAX_PAIRS,
+    CANDLE_REFRESH_INTERVAL,
+    CANDLE_BACKFILL_HOURS,
+    CANDLE_FETCH_MAX_RECORDS,
+    CANDLE_FETCH_TIMEOUT,
+    MORALIS_STREAM_PAGE_TIMEOUT,
+)
+from app.services import moralis
+from app.services.swap_analytics import SwapColumns
+from app.utils.singleflight import SingleFlight
+
+# تنظیم لاگر
+logger = logging.getLogger(__name__)
+
+# ستون‌های هر کندل در بافر حلقوی
+CANDLE_COLUMNS = ("time", "open", "high", "low", "close", "volume", "volume_usd", "trades")
+_TIME, _OPEN, _HIGH, _LOW, _CLOSE, _VOLUME, _VOLUME_USD, _TRADES = range(len(CANDLE_COLUMNS))
+
+class CandleRing:
+    """
+    بافر حلقوی کندل‌های یک بازه زمانی روی یک آرایه NumPy با اندازه ثابت
+    کندل‌ها به ترتیب زمان اضافه می‌شوند و با پر شدن ظرفیت قدیمی‌ترین‌ها بازنویسی می‌شوند
+    """
+
+    def __init__(self, interval: int, capacity: int = CANDLE_CAPACITY):
+        self.interval = interval
+        self.capacity = capacity
+        self.data = np.zeros((capacity, len(CANDLE_COLUMNS)), dtype=np.float64)
+        self.start = 0
+        self.size = 0
+
+    def ordered(self) -> np.ndarray:
+        """کندل‌ها به ترتیب زمان (کپی)"""
+        return np.roll(self.data, -self.start, axis=0)[:self.size]
+
+    def last_time(self) -> Optional[float]:
+        if self.size == 0:
+            return None
+        return self.data[(self.start + self.size - 1) % self.capacity, _TIME]
+
+    def merge(self, candles: np.ndarray) -> None:
+        """
+        افزودن کندل‌های جدید (مرتب بر اساس زمان)؛ کندلی که با آخرین کندل بافر هم‌زمان است با آن ادغام می‌شود
+        """
+        last = self.last_time()
+        if last is not None:
+            candles = candles[candles[:, _TIME] >= last]
+            if len(candles) and candles[0, _TIME] == last:
+                row = self.data[(self.start + self.size - 1) % self.capacity]
+                row[_HIGH] = max(row[_HIGH], candles[0, _HIGH])
+                row[_LOW] = min(row[_LOW], candles[0, _LOW])
+                row[_CLOSE] = candles[0, _CLOSE]
+                row[_VOLUME:] += candles[0, _VOLUME:]
+                candles = candles[1:]
+
+        count = len(candles)
+        if count == 0:
+            return
+        if count >= self.capacity:
+            self.data[:] = candles[-self.capacity:]
+            self.start, self.size = 0, self.capacity
+            return
+        positions = (self.start + self.size + np.arange(count)) % self.capacity
+        self.data[positions] = candles
+        overflow = max(0, self.size + count - self.capacity)
+        self.start = (self.start + overflow) % self.capacity
+        self.size = min(self.capacity, self.size + count)
+
+    def range(self, start_time: Optional[float], end_time: Optional[float], limit: int) -> np.ndarray:
+        """کندل‌های بازه [start_time, end_time]، حداکثر limit کندل آخر"""
+        candles = self.ordered()
+        times = candles[:, _TIME]
+        low = np.searchsorted(times, start_time, side="left") if start_time is not None else 0
+        high = np.searchsorted(times, end_time, side="right") if end_time is not None else len(candles)
+        return candles[max(low, high - limit):high]
+
+def build_candles(timestamps: np.ndarray, prices: np.ndarray, volumes: np.ndarray, values: np.ndarray, interval: int) -> np.ndarray:
+    """
+    ساخت کندل از معاملات مرتب بر اساس زمان در یک گذر برداری (reduceat روی مرز بازه‌ها)
+    """
+    buckets = (timestamps // interval) * interval
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(timestamps)]
+    candles = np.empty((len(starts), len(CANDLE_COLUMNS)), dtype=np.float64)
+    candles[:, _TIME] = buckets[starts]
+    candles[:, _OPEN] = prices[starts]
+    candles[:, _HIGH] = np.maximum.reduceat(prices, starts)
+    candles[:, _LOW] = np.minimum.reduceat(prices, starts)
+    candles[:, _CLOSE] = prices[ends - 1]
+    candles[:, _VOLUME] = np.add.reduceat(volumes, starts)
+    candles[:, _VOLUME_USD] = np.add.reduceat(values, starts)
+    candles[:, _TRADES] = ends - starts
+    return candles
+
+class PairCandles:
+    """
+    کندل‌های همه بازه‌های یک جفت به همراه watermark (زمان آخرین سوآپ پردازش‌شده)
+    """
+
+    def __init__(self, pair_address: str):
+        self.pair_address = pair_address
+        self.rings = {name: CandleRing(seconds) for name, seconds in CANDLE_INTERVALS.items()}
+        self.watermark: Optional[int] = None
+        # هش تراکنش‌های هم‌زمان با watermark تا در دریافت بعدی (fromDate شامل watermark است) تکراری شمرده نشوند
+        self.watermark_hashes: Set[str] = set()
+        self.refreshed_at = 0.0
+        self.swaps = 0
+
+    def is_fresh(self) -> bool:
+        return time.monotonic() - self.refreshed_at < CANDLE_REFRESH_INTERVAL
+
+    async def refresh(self) -> None:
+        """
+        دریافت فقط سوآپ‌های جدیدتر از watermark و افزودن آن‌ها به کندل‌ها
+        سوآپ‌ها صعودی دریافت می‌شوند تا اگر پیمایش با مهلت یا خطا نیمه‌کاره بماند، صفحات دریافت‌شده در کندل‌ها بمانند
+        و دریافت بعدی از watermark همان‌جا ادامه دهد
+        """
+        if self.watermark is None:
+            from_time = datetime.now(timezone.utc) - timedelta(hours=CANDLE_BACKFILL_HOURS)
+        else:
+            from_time = datetime.fromtimestamp(self.watermark, tz=timezone.utc)
+
+        columns = SwapColumns()
+        hashes: List[str] = []
+        progress: Dict[str, Any] = {}
+
+        async def collect() -> None:
+            swaps = moralis.iter_swaps(
+                moralis.swaps_url("pair", "mainnet", self.pair_address),
+                progress,
+                from_date=from_time.isoformat(),
+                max_records=CANDLE_FETCH_MAX_RECORDS,
+                page_timeout=MORALIS_STREAM_PAGE_TIMEOUT,
+                order="ASC",
+            )
+            async with aclosing(swaps):
+                async for swap in swaps:
+                    timestamp = moralis.parse_swap_timestamp(swap.get("blockTimestamp"))
+                    tx_hash = str(swap.get("transactionHash") or "")
+                    if timestamp is None or (self.watermark is not None and (
+                        timestamp.timestamp() < self.watermark
+                        or (timestamp.timestamp() == self.watermark and tx_hash in self.watermark_hashes)
+                    )):
+                        continue
+                    before = len(columns)
+                    columns.append(swap)
+                    if len(columns) > before:
+                        hashes.append(tx_hash)
+
+        complete = False
+        try:
+            await asyncio.wait_for(collect(), timeout=CANDLE_FETCH_TIMEOUT)
+            complete = not progress.get("truncated")
+            if not complete:
+                logger.warning(f"سوآپ‌های جدید جفت {self.pair_address} بیش از {CANDLE_FETCH_MAX_RECORDS} مورد بود؛ بقیه در دریافت بعدی")
+        except asyncio.TimeoutError:
+            logger.warning(f"دریافت سوآپ‌های جفت {self.pair_address} پس از {progress.get('pages', 0)} صفحه به مهلت رسید؛ بقیه در دریافت بعدی")
+        except HTTPException as e:
+            if len(columns) == 0:
+                raise
+            logger.warning(f"خطا در دریافت سوآپ‌های جفت {self.pair_address} پس از {progress.get('pages', 0)} صفحه: {e.detail}")
+
+        # پیمایش ناتمام تازه شمرده نمی‌شود تا درخواست بعدی ادامه آن را دریافت کند
+        if complete:
+            self.refreshed_at = time.monotonic()
+        self._merge(columns, hashes)
+
+    def _merge(self, columns: SwapColumns, hashes: List[str]) -> None:
+        if len(columns) == 0:
+            return
+
+        # watermark پیشرفت می‌کند حتی اگر سوآپ‌های جدید قابل قیمت‌گذاری نباشند
+        newest = max(columns.timestamps)
+        hashes_at_newest = {h for h, t in zip(hashes, columns.timestamps) if t == newest}
+        if newest == self.watermark:
+            self.watermark_hashes |= hashes_at_newest
+        else:
+            self.watermark_hashes = hashes_at_newest
+        self.watermark = newest
+
+        timestamps = np.frombuffer(columns.timestamps, dtype=np.int64)
+        values = np.frombuffer(columns.values, dtype=np.float64)
+        volumes = np.frombuffer(columns.base_amounts, dtype=np.float64)
+        # مرتب‌سازی پایدار ترتیب اجرای معاملات هم‌زمان را حفظ می‌کند
+        order = np.argsort(timestamps, kind="stable")
+        timestamps, values, volumes = timestamps[order], values[order], volumes[order]
+        priced = volumes > 0
+        timestamps, values, volumes = timestamps[priced], values[priced], volumes[priced]
+        if len(timestamps) == 0:
+            return
+        prices = values / volumes
+
+        for ring in self.rings.values():
+            ring.merge(build_candles(timestamps, prices, volumes, values, ring.interval))
+        self.swaps += len(timestamps)
+
+class CandleStore:
+    """
+    کندل‌های جفت‌ها در حافظه (LRU با حداکثر CANDLE_MAX_PAIRS جفت)
+    به‌روزرسانی هم‌زمان یک جفت فقط یک بار اجرا می‌شود
+    """
+
+    def __init__(self, max_pairs: int = CANDLE_MAX_PAIRS):
+        self.max_pairs = max_pairs
+        self.pairs: "OrderedDict[str, PairCandles]" = OrderedDict()
+        self.flights = SingleFlight()
+
+    def _get(self, pair_address: str) -> PairCandles:
+        pair = self.pairs.get(pair_address)
+        if pair is None:
+            pair = PairCandles(pair_address)
+            self.pairs[pair_address] = pair
+            while len(self.pairs) > self.max_pairs:
+                self.pairs.popitem(last=False)
+        self.pairs.move_to_end(pair_address)
+        return pair
+
+    async def get(self, pair_address: str) -> PairCandles:
+        pair = self._get(pair_address)
+        if not pair.is_fresh():
+            await self.flights.do(pair_address, pair.refresh)
+        return pair
+
+    def stats(self) -> Dict[str, Any]:
+        return {"pairs": len(self.pairs), "refresh": self.flights.stats()}
+
+# نمونه سینگلتون از ذخیره‌ساز کندل‌ها
+candle_store = CandleStore()
+
+async def get_ohlcv(
+    pair_address: str,
+    interval: str = "1m",
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    limit: int = 500,
+) -> Dict[str, Any]:
+    """کندل‌های OHLCV یک جفت از حافظه (پس از دریافت سوآپ‌های جدید در صورت نیاز)"""
+    if interval not in CANDLE_INTERVALS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"بازه نامعتبر: {interval}. مقادیر مجاز: {', '.join(CANDLE_INTERVALS)}",
+        )
+    start_time = moralis.parse_swap_timestamp(start)
+    end_time = moralis.parse_swap_timestamp(end)
+
+    pair = await candle_store.get(pair_address)
+    candles = pair.rings[interval].range(
+        start_time.timestamp() if start_time else None,
+        end_time.timestamp() if end_time else None,
+        limit,
+    )
+    rows = candles.tolist()
+    for row in rows:
+        row[_TIME] = int(row[_TIME])
+        row[_TRADES] = int(row[_TRADES])
+    return {
+        "pair_address": pair_address,
+        "interval": interval,
+        "watermark": datetime.fromtimestamp(pair.watermark, tz=timezone.utc).isoformat() if pair.watermark else None,
+        "columns": list(CANDLE_COLUMNS),
+        "candles": rows,
+    }
@@ -1,6 +1,7 @@
 from typing import Dict, Any, Optional, List
-from app.config.settings import BASE_URLS, API_KEYS
+from app.config.settings import BASE_URLS, API_KEYS, MARKET_CHART_MAX_RESPONSE_SIZE
 from app.utils.helpers import make_request
+from app.utils.timeseries_store import market_chart_store
 
 COINGECKO_BASE_URL = BASE_URLS["COINGECKO"]
 API_KEY = API_KEYS["COINGECKO"]  # این FREE است
@@ -13,53 +14,72 @@ def get_headers():
     return headers
 
 # بررسی وضعیت سرور API
-def ping() -> Dict[str, Any]:
+async def ping() -> Dict[str, Any]:
     """وضعیت سرور API را بررسی می‌کند"""
     url = f"{COINGECKO_BASE_URL}/ping"
-    return make_request(url=url, headers=get_headers())
+    return await make_request(url=url, headers=get_headers(), cache_policy="COINGECKO_PING", passthrough=True)
 
 # Coins endpoints
-def get_coin_by_contract(id: str, contract_address: str) -> Dict[str, Any]:
+async def get_coin_by_contract(id: str, contract_address: str) -> Dict[str, Any]:
     """همه متادیتا از صفحه رمزارز CoinGecko براساس پلتفرم دارایی و آدرس قرارداد توکن خاص دریافت می‌کند"""
     url = f"{COINGECKO_BASE_URL}/coins/{id}/contract/{contract_address}"
-    return make_request(url=url, headers=get_headers())
+    return await make_request(url=url, headers=get_headers(), passthrough=True)
 
-def get_coin_contract_market_chart(id: str, contract_address: str, vs_currency: str, days: str) -> Dict[str, Any]:
+async def get_coin_contract_market_chart(id: str, contract_address: str, vs_currency: str, days: str) -> Dict[str, Any]:
     """داده‌های نمودار تاریخی شامل زمان، قیمت، حجم بازار و حجم معاملات 24 ساعته 
-    براساس پلتفرم دارایی و آدرس قرارداد توکن خاص دریافت می‌کند"""
-    url = f"{COINGECKO_BASE_URL}/coins/{id}/contract/{contract_address}/market_chart"
+    براساس پلتفرم دارایی و آدرس قرارداد توکن خاص دریافت می‌کند
+    داده از ذخیره‌ساز محلی خوانده می‌شود و فقط نقاط جدید از /market_chart/range دریافت می‌شوند"""
+    async def fetch_range(from_timestamp: int, to_timestamp: int) -> Dict[str, Any]:
+        return await get_coin_contract_market_chart_range(id, contract_address, vs_currency, from_timestamp, to_timestamp)
+    return await market_chart_store.get((id, contract_address, vs_currency), days, fetch_range)
+
+async def get_coin_contract_market_chart_range(id: str, contract_address: str, vs_currency: str, from_timestamp: int, to_timestamp: int) -> Dict[str, Any]:
+    """داده‌های نمودار تاریخی در یک بازه زمانی (UNIX) براساس پلتفرم دارایی و آدرس قرارداد توکن خاص دریافت می‌کند"""
+    url = f"{COINGECKO_BASE_URL}/coins/{id}/contract/{contract_address}/market_chart/range"
     params = {
         "vs_currency": vs_currency,
-        "days": days
+        "from": from_timestamp,
+        "to": to_timestamp
+    }
+    # نقاط در ذخیره‌ساز نمودار نگه داشته می‌شوند و نباید کوتاه شوند
+    return await make_request(url=url, params=params, headers=get_headers(), max_response_size=MARKET_CHART_MAX_RESPONSE_SIZE)
+
+# Simple endpoints
+async def get_token_price(id: str, contract_addresses: str, vs_currencies: str) -> Dict[str, Any]:
+    """قیمت فعلی یک یا چند توکن را براساس پلتفرم دارایی و آدرس قرارداد دریافت می‌کند"""
+    url = f"{COINGECKO_BASE_URL}/simple/token_price/{id}"
+    params = {
+        "contract_addresses": contract_addresses,
+        "vs_currencies": vs_currencies
     }
-    return make_request(url=url, params=params, headers=get_headers())
+    return await make_request(url=url, params=params, headers=get_headers())
 
 # Search endpoints
-def search(query: str) -> Dict[str, Any]:
+async def search(query: str) -> Dict[str, Any]:
     """جستجو برای رمزارزها، دسته‌بندی‌ها و بازارهای موجود در CoinGecko"""
     url = f"{COINGECKO_BASE_URL}/search"
     params = {"query": query}
-    return make_request(url=url, params=params, headers=get_headers())
+    return await make_request(url=url, params=params, headers=get_headers(), passthrough=True)
 
-def search_trending() -> Dict[str, Any]:
+async def search_trending() -> Dict[str, Any]:
     """رمزارزهای داغ، NFT‌ها و دسته‌بندی‌ها در CoinGecko در 24 ساعت اخیر را دریافت می‌کند"""
     url = f"{COINGECKO_BASE_URL}/search/trending"
-    return make_request(url=url, headers=get_headers())
+    return await make_request(url=url, headers=get_headers(), cache_policy="COINGECKO_TRENDING", passthrough=True)
 
 # Global endpoints
-def get_global() -> Dict[str, Any]:
+async def get_global() -> Dict[str, Any]:
     """داده‌های جهانی رمزارزها شامل رمزارزهای فعال، بازارها، حجم کل بازار رمزارزها و غیره را دریافت می‌کند"""
     url = f"{COINGECKO_BASE_URL}/global"
-    return make_request(url=url, headers=get_headers())
+    return await make_request(url=url, headers=get_headers(), cache_policy="COINGECKO_GLOBAL", passthrough=True)
 
-def get_global_defi() -> Dict[str, Any]:
+async def get_global_defi() -> Dict[str, Any]:
     """داده‌های جهانی امور مالی غیرمتمرکز (DeFi) رمزارزها شامل حجم بازار DeFi، حجم معاملات را دریافت می‌کند"""
     url = f"{COINGECKO_BASE_URL}/global/decentralized_finance_defi"
-    return make_request(url=url, headers=get_headers())
+    return await make_request(url=url, headers=get_headers(), passthrough=True)
 
 # Companies public treasury
-def get_companies_public_treasury(coin_id: str) -> Dict[str, Any]:
+async def get_companies_public_treasury(coin_id: str) -> Dict[str, Any]:
     """اطلاعات ذخایر عمومی شرکت‌ها در بیتکوین یا اتریوم را دریافت می‌کند"""
     url = f"{COINGECKO_BASE_URL}/companies/public_treasury/{coin_id}"
-    return make_request(url=url, headers=get_headers())
+    return await make_request(url=url, headers=get_headers(), passthrough=True)
 
@@ -12,13 +12,13 @@ def get_headers():
     }
 
 # Coin endpoints
-def get_coins() -> Dict[str, Any]:
+async def get_coins() -> Dict[str, Any]:
     """دریافت لیست رمزارزها"""
     url = f"{COINSTATS_BASE_URL}/coins"
-    return make_request(url=url, headers=get_headers())
+    return await make_request(url=url, headers=get_headers(), passthrough=True)
 
-def get_coin(coin_id: str) -> Dict[str, Any]:
+async def get_coin(coin_id: str) -> Dict[str, Any]:
     """دریافت اطلاعات یک رمزارز با شناسه خاص"""
     url = f"{COINSTATS_BASE_URL}/coins/{coin_id}"
-    return make_request(url=url, headers=get_headers())
+    return await make_request(url=url, headers=get_headers(), passthrough=True)
 
@@ -13,41 +13,41 @@ def get_headers():
     return headers
 
 # قیمت‌های فعلی
-def get_price(fsym: str, tsyms: str) -> Dict[str, Any]:
+async def get_price(fsym: str, tsyms: str) -> Dict[str, Any]:
     """دریافت قیمت فعلی رمزارز"""
     url = f"{CRYPTOCOMPARE_BASE_URL}/price"
     params = {
         "fsym": fsym,
         "tsyms": tsyms
     }
-    return make_request(url=url, params=params, headers=get_headers())
+    return await make_request(url=url, params=params, headers=get_headers())
 
 # سیگنال‌های معاملاتی
-def get_trading_signals_latest(fsym: str) -> Dict[str, Any]:
+async def get_trading_signals_latest(fsym: str) -> Dict[str, Any]:
     """دریافت آخرین سیگنال‌های معاملاتی"""
     url = f"{CRYPTOCOMPARE_BASE_URL}/tradingsignals/intotheblock/latest"
     params = {"fsym": fsym}
-    return make_request(url=url, params=params, headers=get_headers())
+    return await make_request(url=url, params=params, headers=get_headers(), passthrough=True)
 
 # اخبار
-def get_news(lang: str = "EN") -> Dict[str, Any]:
+async def get_news(lang: str = "EN") -> Dict[str, Any]:
     """دریافت اخبار"""
     url = f"{CRYPTOCOMPARE_BASE_URL}/v2/news/"
     params = {"lang": lang}
-    return make_request(url=url, params=params, headers=get_headers())
+    return await make_request(url=url, params=params, headers=get_headers(), cache_policy="CRYPTOCOMPARE_NEWS", passthrough=True)
 
-def get_news_feeds() -> Dict[str, Any]:
+async def get_news_feeds() -> Dict[str, Any]:
     """دریافت فیدهای خبری"""
     url = f"{CRYPTOCOMPARE_BASE_URL}/news/feeds"
-    return make_request(url=url, headers=get_headers())
+    return await make_request(url=url, headers=get_headers(), cache_policy="CRYPTOCOMPARE_NEWS_FEEDS", passthrough=True)
 
-def get_news_categories() -> Dict[str, Any]:
+async def get_news_categories() -> Dict[str, Any]:
     """دریافت دسته‌بندی‌های خبری"""
     url = f"{CRYPTOCOMPARE_BASE_URL}/news/categories"
-    return make_request(url=url, headers=get_headers())
+    return await make_request(url=url, headers=get_headers(), cache_policy="CRYPTOCOMPARE_NEWS_FEEDS", passthrough=True)
 
-def get_news_feeds_and_categories() -> Dict[str, Any]:
+async def get_news_feeds_and_categories() -> Dict[str, Any]:
     """دریافت فیدها و دسته‌بندی‌های خبری"""
     url = f"{CRYPTOCOMPARE_BASE_URL}/news/feedsandcategories"
-    return make_request(url=url, headers=get_headers())
+    return await make_request(url=url, headers=get_headers(), cache_policy="CRYPTOCOMPARE_NEWS_FEEDS", passthrough=True)
 
@@ -1,59 +1,133 @@
+import asyncio
+import json
 from typing import Dict, Any, Optional, List
-from app.config.settings import BASE_URLS, API_KEYS
+from app.config.settings import BASE_URLS, API_KEYS, DEXSCREENER_MAX_TOKEN_ADDRESSES
 from app.utils.helpers import make_request
+from app.utils.cache import CacheEntry, get_cache_ttl, lookup_entry, store_entry, make_cache_key, response_cache
+from app.utils.request_context import record_cache_status, is_warming, record_warmed_key
 
 DEXSCREENER_BASE_URL = BASE_URLS["DEXSCREENER"]
 API_KEY = API_KEYS["DEXSCREENER"]
 
 # تابع‌های دریافت پروفایل‌های توکن
-def get_token_profiles() -> Dict[str, Any]:
+async def get_token_profiles() -> Dict[str, Any]:
     """دریافت آخرین پروفایل‌های توکن (محدودیت نرخ: 60 درخواست در دقیقه)"""
     url = f"{DEXSCREENER_BASE_URL}/token-profiles/latest/v1"
     headers = {"Accept": "*/*"}
-    return make_request(url=url, headers=headers)
+    return await make_request(url=url, headers=headers, cache_policy="DEXSCREENER_TOKEN_PROFILES", passthrough=True)
 
 # تابع‌های دریافت توکن‌های تقویت شده
-def get_boosted_tokens() -> Dict[str, Any]:
+async def get_boosted_tokens() -> Dict[str, Any]:
     """دریافت آخرین توکن‌های تقویت‌شده (محدودیت نرخ: 60 درخواست در دقیقه)"""
     url = f"{DEXSCREENER_BASE_URL}/token-boosts/latest/v1"
     headers = {"Accept": "*/*"}
-    return make_request(url=url, headers=headers)
+    return await make_request(url=url, headers=headers, cache_policy="DEXSCREENER_TOKEN_BOOSTS")
 
-def get_most_active_boosts() -> Dict[str, Any]:
+async def get_most_active_boosts() -> Dict[str, Any]:
     """دریافت توکن‌هایی با بیشترین تقویت‌های فعال (محدودیت نرخ: 60 درخواست در دقیقه)"""
     url = f"{DEXSCREENER_BASE_URL}/token-boosts/top/v1"
     headers = {"Accept": "*/*"}
-    return make_request(url=url, headers=headers)
+    return await make_request(url=url, headers=headers, cache_policy="DEXSCREENER_TOKEN_BOOSTS_TOP")
 
 # تابع بررسی سفارش‌های پرداخت شده برای توکن
-def check_paid_orders(chain_id: str, token_address: str) -> Dict[str, Any]:
+async def check_paid_orders(chain_id: str, token_address: str) -> Dict[str, Any]:
     """بررسی سفارش‌های پرداخت شده برای توکن (محدودیت نرخ: 60 درخواست در دقیقه)"""
     url = f"{DEXSCREENER_BASE_URL}/orders/v1/{chain_id}/{token_address}"
     headers = {"Accept": "*/*"}
-    return make_request(url=url, headers=headers)
+    return await make_request(url=url, headers=headers, passthrough=True)
 
 # تابع‌های دریافت جفت‌ها
-def get_pairs_by_chain_and_address(chain_id: str, pair_id: str) -> Dict[str, Any]:
+async def get_pairs_by_chain_and_address(chain_id: str, pair_id: str) -> Dict[str, Any]:
     """دریافت یک یا چند جفت بر اساس زنجیره و آدرس جفت (محدودیت نرخ: 300 درخواست در دقیقه)"""
     url = f"{DEXSCREENER_BASE_URL}/latest/dex/pairs/{chain_id}/{pair_id}"
     headers = {"Accept": "*/*"}
-    return make_request(url=url, headers=headers)
+    return await make_request(url=url, headers=headers, passthrough=True)
 
-def search_pairs(query: str) -> Dict[str, Any]:
+async def search_pairs(query: str) -> Dict[str, Any]:
     """جستجو برای جفت‌های مطابق با عبارت جستجو (محدودیت نرخ: 300 درخواست در دقیقه)"""
     url = f"{DEXSCREENER_BASE_URL}/latest/dex/search"
     params = {"q": query}
     headers = {"Accept": "*/*"}
-    return make_request(url=url, params=params, headers=headers)
+    return await make_request(url=url, params=params, headers=headers, passthrough=True)
 
-def get_pools_by_token(chain_id: str, token_address: str) -> Dict[str, Any]:
+async def get_pools_by_token(chain_id: str, token_address: str) -> Dict[str, Any]:
     """دریافت استخرهای یک توکن مشخص شده (محدودیت نرخ: 300 درخواست در دقیقه)"""
     url = f"{DEXSCREENER_BASE_URL}/token-pairs/v1/{chain_id}/{token_address}"
     headers = {"Accept": "*/*"}
-    return make_request(url=url, headers=headers)
+    return await make_request(url=url, headers=headers, passthrough=True)
 
-def get_pairs_by_token(chain_id: str, token_addresses: str) -> Dict[str, Any]:
-    """دریافت یک یا چند جفت بر اساس آدرس‌های توکن (محدودیت نرخ: 300 درخواست در دقیقه)"""
-    url = f"{DEXSCREENER_BASE_URL}/tokens/v1/{chain_id}/{token_addresses}"
+async def get_pairs_by_token(chain_id: str, token_addresses: str) -> List[Dict[str, Any]]:
+    """دریافت جفت‌ها بر اساس آدرس‌های توکن با هر تعداد آدرس (محدودیت نرخ: 300 درخواست در دقیقه)
+    آدرس‌ها در دسته‌های مجاز DexScreener به صورت هم‌زمان درخواست می‌شوند و فقط آدرس‌هایی که در کش نیستند ارسال می‌شوند"""
+    # حذف آدرس‌های تکراری با حفظ ترتیب
+    addresses = list(dict.fromkeys(a.strip() for a in token_addresses.split(",") if a.strip()))
+    ttl = get_cache_ttl("DEXSCREENER_TOKENS")
+    warming = is_warming()
+    
+    pairs_by_address: Dict[str, List[Dict[str, Any]]] = {}
+    missing: List[str] = []
+    for address in addresses:
+        if ttl <= 0 or warming:
+            missing.append(address)
+            continue
+        key = _token_pairs_cache_key(chain_id, address)
+        entry = await lookup_entry(key)
+        if entry is not None and entry.is_fresh():
+            response_cache.record_lookup("HIT", key, entry)
+            pairs_by_address[address] = json.loads(entry.body)
+        else:
+            response_cache.record_lookup("MISS", key, entry)
+            missing.append(address)
+    if ttl > 0 and not warming and addresses:
+        # پاسخ از کش فقط وقتی HIT است که همه آدرس‌ها در کش باشند
+        if not missing:
+            record_cache_status("HIT")
+        elif len(missing) == len(addresses):
+            record_cache_status("MISS")
+        else:
+            record_cache_status("PARTIAL")
+    
+    chunks = [missing[i:i + DEXSCREENER_MAX_TOKEN_ADDRESSES] for i in range(0, len(missing), DEXSCREENER_MAX_TOKEN_ADDRESSES)]
+    results = await asyncio.gather(*[_fetch_token_pairs_chunk(chain_id, chunk) for chunk in chunks])
+    
+    for chunk, pairs in zip(chunks, results):
+        for address in chunk:
+            key = address.lower()
+            address_pairs = [
+                pair for pair in pairs
+                if key in (
+                    str((pair.get("baseToken") or {}).get("address", "")).lower(),
+                    str((pair.get("quoteToken") or {}).get("address", "")).lower(),
+                )
+            ]
+            pairs_by_address[address] = address_pairs
+            if ttl > 0:
+                body = json.dumps(address_pairs).encode("utf-8")
+                key = _token_pairs_cache_key(chain_id, address)
+                await store_entry(key, CacheEntry(body, ttl, warmed=warming))
+                record_warmed_key(key, ttl, "DEXSCREENER")
+    
+    # ادغام نتایج و حذف جفت‌های تکراری (یک جفت ممکن است به دو آدرس درخواستی مربوط باشد)
+    merged: List[Dict[str, Any]] = []
+    seen = set()
+    for address in addresses:
+        for pair in pairs_by_address.get(address, []):
+            pair_id = (pair.get("chainId"), pair.get("pairAddress"))
+            if pair_id not in seen:
+                seen.add(pair_id)
+                merged.append(pair)
+    return merged
+
+async def _fetch_token_pairs_chunk(chain_id: str, addresses: List[str]) -> List[Dict[str, Any]]:
+    """دریافت جفت‌های یک دسته آدرس (حداکثر به اندازه محدودیت DexScreener) در یک درخواست"""
+    url = f"{DEXSCREENER_BASE_URL}/tokens/v1/{chain_id}/{','.join(addresses)}"
     headers = {"Accept": "*/*"}
-    return make_request(url=url, headers=headers)
+    # نتیجه هر آدرس جداگانه کش می‌شود، پس پاسخ کل دسته کش نمی‌شود
+    result = await make_request(url=url, headers=headers, cache_policy="DEXSCREENER_TOKENS_CHUNK")
+    if isinstance(result, dict):
+        return result.get("pairs") or []
+    return result if isinstance(result, list) else []
+
+def _token_pairs_cache_key(chain_id: str, address: str) -> str:
+    """کلید کش جفت‌های یک آدرس توکن"""
+    return make_cache_key("GET", f"{DEXSCREENER_BASE_URL}/tokens/v1/{chain_id}/{address}")
@@ -1,6 +1,8 @@
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Union
+from fastapi.responses import Response
 from app.config.settings import BASE_URLS, API_KEYS
 from app.utils.helpers import make_request
+from app.utils.projection import Projection
 
 GECKOTERMINAL_BASE_URL = BASE_URLS["GECKOTERMINAL"]
 API_KEY = API_KEYS["GECKOTERMINAL"]  # این FREE است
@@ -11,29 +13,31 @@ def get_headers():
         "Accept": "application/json;version=20230302"  # ورژن توصیه شده در مستندات
     }
 
+# با shape پاسخ به صورت passthrough و شکل‌داده‌شده برمی‌گردد (مسیرهای API) و بدون آن dict (poller و گرم‌کننده کش)
+
 # Pools endpoints
-def get_trending_pools_all_networks() -> Dict[str, Any]:
+async def get_trending_pools_all_networks(shape: Optional[Projection] = None) -> Union[Dict[str, Any], Response]:
     """استخرهای روند در تمام شبکه‌ها را دریافت می‌کند"""
     url = f"{GECKOTERMINAL_BASE_URL}/networks/trending_pools"
-    return make_request(url=url, headers=get_headers())
+    return await make_request(url=url, headers=get_headers(), cache_policy="GECKOTERMINAL_TRENDING_POOLS_ALL", passthrough=shape is not None, projection=shape)
 
-def get_trending_pools_by_network(network: str) -> Dict[str, Any]:
+async def get_trending_pools_by_network(network: str, shape: Optional[Projection] = None) -> Union[Dict[str, Any], Response]:
     """استخرهای روند در یک شبکه خاص را دریافت می‌کند"""
     url = f"{GECKOTERMINAL_BASE_URL}/networks/{network}/trending_pools"
-    return make_request(url=url, headers=get_headers())
+    return await make_request(url=url, headers=get_headers(), cache_policy="GECKOTERMINAL_TRENDING_POOLS", passthrough=shape is not None, projection=shape)
 
-def get_token_info(network: str, token_address: str) -> Dict[str, Any]:
+async def get_token_info(network: str, token_address: str, shape: Optional[Projection] = None) -> Union[Dict[str, Any], Response]:
     """اطلاعات خاص یک توکن در یک شبکه را دریافت می‌کند"""
     url = f"{GECKOTERMINAL_BASE_URL}/networks/{network}/tokens/{token_address}/info"
-    return make_request(url=url, headers=get_headers())
+    return await make_request(url=url, headers=get_headers(), passthrough=shape is not None, projection=shape)
 
-def get_pool_tokens_info(network: str, pool_address: str) -> Dict[str, Any]:
+async def get_pool_tokens_info(network: str, pool_address: str) -> Dict[str, Any]:
     """اطلاعات توکن‌های یک استخر در یک شبکه را دریافت می‌کند"""
     url = f"{GECKOTERMINAL_BASE_URL}/networks/{network}/pools/{pool_address}/info"
-    return make_request(url=url, headers=get_headers())
+    return await make_request(url=url, headers=get_headers(), passthrough=True)
 
-def get_recently_updated_tokens_info() -> Dict[str, Any]:
+async def get_recently_updated_tokens_info(shape: Optional[Projection] = None) -> Union[Dict[str, Any], Response]:
     """اطلاعات 100 توکن به‌روزرسانی شده اخیر در تمام شبکه‌ها را دریافت می‌کند"""
     url = f"{GECKOTERMINAL_BASE_URL}/tokens/info_recently_updated"
-    return make_request(url=url, headers=get_headers())
+    return await make_request(url=url, headers=get_headers(), passthrough=shape is not None, projection=shape)
 
@@ -1,7 +1,20 @@
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple, AsyncIterator
+import asyncio
+import json
+import time
 import logging
-from app.config.settings import BASE_URLS, API_KEYS
+from contextlib import aclosing
+from datetime import datetime, timezone
+from fastapi import HTTPException
+from app.config.settings import (
+    BASE_URLS, API_KEYS,
+    MORALIS_STREAM_PAGE_SIZE, MORALIS_STREAM_MAX_PAGES, MORALIS_STREAM_MAX_RECORDS, MORALIS_STREAM_PAGE_TIMEOUT,
+    MORALIS_HOLDERS_DEFAULT_DAYS, MORALIS_HOLDERS_REFRESH_INTERVAL, MORALIS_HOLDERS_PAGE_SIZE, MORALIS_HOLDERS_MAX_PAGES,
+    MORALIS_HOLDERS_TIME_FRAMES,
+)
 from app.utils.helpers import make_request
+from app.utils.request_context import start_request_state, is_warming
+from app.utils.snapshot_store import holders_store
 
 # تنظیم لاگر
 logger = logging.getLogger(__name__)
@@ -20,7 +33,7 @@ def get_headers():
     return headers
 
 # Token API
-def search_tokens(query: str, limit: int = 10) -> Dict[str, Any]:
+async def search_tokens(query: str, limit: int = 10) -> Dict[str, Any]:
     """جستجوی توکن‌ها"""
     try:
         url = f"{MORALIS_INDEX_BASE_URL}/tokens/search"
@@ -28,7 +41,7 @@ def search_tokens(query: str, limit: int = 10) -> Dict[str, Any]:
             "query": query,
             "limit": limit
         }
-        return make_request(url=url, params=params, headers=get_headers())
+        return await make_request(url=url, params=params, headers=get_headers())
     except Exception as e:
         if "not available on your plan" in str(e):
             return {
@@ -39,14 +52,14 @@ def search_tokens(query: str, limit: int = 10) -> Dict[str, Any]:
         return {"error": str(e)}
 
 # Token Discovery & Trending
-def get_trending_tokens(limit: int = 10) -> Dict[str, Any]:
+async def get_trending_tokens(limit: int = 10) -> Dict[str, Any]:
     """دریافت توکن‌های محبوب"""
     url = f"{MORALIS_INDEX_BASE_URL}/tokens/trending"
     params = {"limit": limit}
-    return make_request(url=url, params=params, headers=get_headers())
+    return await make_request(url=url, params=params, headers=get_headers())
 
 # Strategy Builder
-def get_filtered_tokens(chain: str = "solana", limit: int = 10, 
+async def get_filtered_tokens(chain: str = "solana", limit: int = 10, 
                       min_price: Optional[float] = None, max_price: Optional[float] = None,
                       min_volume_24h: Optional[float] = None, min_market_cap: Optional[float] = None) -> Dict[str, Any]:
     """دریافت توکن‌های فیلتر شده"""
@@ -65,10 +78,10 @@ def get_filtered_tokens(chain: str = "solana", limit: int = 10,
     if min_market_cap is not None:
         params["min_market_cap"] = min_market_cap
         
-    return make_request(url=url, params=params, headers=get_headers())
+    return await make_request(url=url, params=params, headers=get_headers())
 
 # Token Prices & Charts
-def get_token_price(network: str, address: str) -> Dict[str, Any]:
+async def get_token_price(network: str, address: str) -> Dict[str, Any]:
     """دریافت قیمت توکن"""
     # اطمینان از استفاده از mainnet
     if network.lower() != "mainnet":
@@ -76,10 +89,10 @@ def get_token_price(network: str, address: str) -> Dict[str, Any]:
         network = "mainnet"
     
     url = f"{MORALIS_SOLANA_BASE_URL}/token/{network}/{address}/price"
-    return make_request(url=url, headers=get_headers())
+    return await make_request(url=url, headers=get_headers())
 
 # Token Metadata
-def get_token_metadata(network: str, address: str) -> Dict[str, Any]:
+async def get_token_metadata(network: str, address: str) -> Dict[str, Any]:
     """دریافت متادیتای توکن"""
     # اطمینان از استفاده از mainnet
     if network.lower() != "mainnet":
@@ -87,41 +100,102 @@ def get_token_metadata(network: str, address: str) -> Dict[str, Any]:
         network = "mainnet"
     
     url = f"{MORALIS_SOLANA_BASE_URL}/token/{network}/{address}/metadata"
-    return make_request(url=url, headers=get_headers())
+    return await make_request(url=url, headers=get_headers())
 
 # Token Holders
-def get_token_holder_stats(address: str) -> Dict[str, Any]:
+async def get_token_holder_stats(address: str) -> Dict[str, Any]:
     """دریافت آمار دارندگان توکن"""
     url = f"{MORALIS_SOLANA_BASE_URL}/token/mainnet/holders/{address}"
-    return make_request(url=url, headers=get_headers())
+    return await make_request(url=url, headers=get_headers())
 
-def get_historical_token_holders(address: str, time_frame: str = "1d") -> Dict[str, Any]:
-    """دریافت آمار تاریخی دارندگان توکن"""
+def _iso_seconds(seconds: int) -> str:
+    return datetime.fromtimestamp(seconds, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+async def _fetch_historical_holders(address: str, time_frame: str, start: int, end: int) -> Tuple[List[Tuple[int, Dict[str, Any]]], int]:
+    """
+    دریافت همه صفحات آمار تاریخی دارندگان در بازه [start, end]
+    خروجی: نقاط (زمان، داده) و ابتدای بازه‌ای که واقعاً پوشش داده شد (در صورت قطع صفحه‌بندی)
+    """
     url = f"{MORALIS_SOLANA_BASE_URL}/token/mainnet/holders/{address}/historical"
-    
-    # بر اساس داکیومنت موریالیس، ترکیبی از پارامترها را امتحان می‌کنیم
-    params = {}
-    
-    # گزینه 1: در برخی داکیومنت‌ها timeFrame با F بزرگ
-    params["timeFrame"] = time_frame
-    
-    # گزینه 2: در برخی داکیومنت‌ها timeframe با f کوچک
-    params["timeframe"] = time_frame
-    
-    # گزینه 3: ممکن است به پارامترهای اضافی نیاز باشد
-    from datetime import datetime, timedelta
-    today = datetime.now()
-    from_date = (today - timedelta(days=30)).strftime("%Y-%m-%d")
-    to_date = today.strftime("%Y-%m-%d")
-    
-    params["fromDate"] = from_date
-    params["toDate"] = to_date
-    
+    # بر اساس داکیومنت موریالیس هر دو شکل نام پارامتر بازه زمانی ارسال می‌شود
+    params: Dict[str, Any] = {
+        "timeFrame": time_frame,
+        "timeframe": time_frame,
+        "fromDate": _iso_seconds(start),
+        "toDate": _iso_seconds(end),
+        "limit": MORALIS_HOLDERS_PAGE_SIZE,
+    }
     logger.debug(f"درخواست تاریخی دارندگان توکن با پارامترهای: {params}")
-    return make_request(url=url, params=params, headers=get_headers())
+
+    points: List[Tuple[int, Dict[str, Any]]] = []
+    cursor = None
+    for _ in range(MORALIS_HOLDERS_MAX_PAGES):
+        result = await make_request(url=url, params={**params, "cursor": cursor} if cursor else params, headers=get_headers())
+        items = (result.get("result") or []) if isinstance(result, dict) else []
+        for point in items:
+            timestamp = parse_swap_timestamp(point.get("timestamp"))
+            if timestamp is not None:
+                points.append((int(timestamp.timestamp()), point))
+        cursor = result.get("cursor") if isinstance(result, dict) else None
+        if not cursor or not items:
+            return points, start
+    # صفحه‌ها از جدید به قدیم‌اند؛ فقط تا قدیمی‌ترین نقطه دریافت‌شده پوشش داده شده است
+    logger.warning(f"آمار تاریخی دارندگان {address} بیش از {MORALIS_HOLDERS_MAX_PAGES} صفحه بود و ناقص ذخیره شد")
+    return points, min((ts for ts, _ in points), default=end)
+
+async def _sync_historical_holders(address: str, time_frame: str, start: int, end: int) -> None:
+    points, covered_from = await _fetch_historical_holders(address, time_frame, start, end)
+    await holders_store.save(address, time_frame, points, covered_from, end)
+
+async def get_historical_token_holders(
+    address: str,
+    time_frame: str = "1d",
+    from_date: Optional[str] = None,
+    to_date: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    دریافت آمار تاریخی دارندگان توکن از ذخیره‌ساز محلی؛ فقط نقاط جدیدتر از آخرین نقطه ذخیره‌شده
+    (و بخش قدیمی‌تر از بازه پوشش، برای بازه‌های طولانی‌تر) از Moralis دریافت می‌شود
+    """
+    now = int(time.time())
+    parsed_from, parsed_to = parse_swap_timestamp(from_date), parse_swap_timestamp(to_date)
+    if (from_date and parsed_from is None) or (to_date and parsed_to is None):
+        raise HTTPException(status_code=400, detail="قالب تاریخ نامعتبر است (ISO 8601)")
+    end = min(int(parsed_to.timestamp()), now) if parsed_to else now
+    start = int(parsed_from.timestamp()) if parsed_from else end - MORALIS_HOLDERS_DEFAULT_DAYS * 86400
+    if start >= end:
+        raise HTTPException(status_code=400, detail="ابتدای بازه باید قبل از انتهای آن باشد")
+
+    async with holders_store.lock(address, time_frame):
+        coverage = await holders_store.coverage(address, time_frame)
+        if coverage is None:
+            await _sync_historical_holders(address, time_frame, start, end)
+        else:
+            if start < coverage.covered_from:
+                await _sync_historical_holders(address, time_frame, start, coverage.covered_from)
+            # فاصله بیش از یک بازه تا انتهای پوشش همیشه دریافت می‌شود؛ stale فقط برای به‌روزرسانی بازه جاری (باز) است
+            # و گرم‌کننده کش همیشه نقاط جدید را دریافت می‌کند
+            stale = is_warming() or time.time() - coverage.refreshed_at >= MORALIS_HOLDERS_REFRESH_INTERVAL
+            gap = end - coverage.covered_to
+            if gap > MORALIS_HOLDERS_TIME_FRAMES.get(time_frame, 60) or (gap > 0 and stale):
+                # دریافت از آخرین نقطه ذخیره‌شده تا نقطه بازه جاری (که هنوز بسته نشده) به‌روز شود
+                tail_from = min(coverage.covered_to, coverage.last_point if coverage.last_point is not None else coverage.covered_to)
+                await _sync_historical_holders(address, time_frame, tail_from, end)
+
+    points = await holders_store.range(address, time_frame, start, end)
+    # شکل پاسخ Moralis (result و cursor) حفظ می‌شود؛ همه نقاط بازه در یک پاسخ برمی‌گردند و cursor همیشه خالی است
+    # و مشخصات بازه (timeFrame، fromDate، toDate، total) کنار آن اضافه می‌شود
+    return {
+        "result": points,
+        "cursor": None,
+        "timeFrame": time_frame,
+        "fromDate": _iso_seconds(start),
+        "toDate": _iso_seconds(end),
+        "total": len(points),
+    }
 
 # Token Pairs & Liquidity
-def get_token_pairs_by_address(network: str, address: str) -> Dict[str, Any]:
+async def get_token_pairs_by_address(network: str, address: str) -> Dict[str, Any]:
     """دریافت جفت‌های توکن بر اساس آدرس"""
     # اطمینان از استفاده از mainnet
     if network.lower() != "mainnet":
@@ -129,9 +203,9 @@ def get_token_pairs_by_address(network: str, address: str) -> Dict[str, Any]:
         network = "mainnet"
     
     url = f"{MORALIS_SOLANA_BASE_URL}/token/{network}/{address}/pairs"
-    return make_request(url=url, headers=get_headers())
+    return await make_request(url=url, headers=get_headers())
 
-def get_token_pair_stats(network: str, pair_address: str) -> Dict[str, Any]:
+async def get_token_pair_stats(network: str, pair_address: str) -> Dict[str, Any]:
     """دریافت آمار جفت توکن"""
     # اطمینان از استفاده از mainnet
     if network.lower() != "mainnet":
@@ -139,9 +213,9 @@ def get_token_pair_stats(network: str, pair_address: str) -> Dict[str, Any]:
         network = "mainnet"
     
     url = f"{MORALIS_SOLANA_BASE_URL}/token/{network}/pairs/{pair_address}/stats"
-    return make_request(url=url, headers=get_headers())
+    return await make_request(url=url, headers=get_headers())
 
-def get_aggregated_token_pair_stats(network: str, address: str) -> Dict[str, Any]:
+async def get_aggregated_token_pair_stats(network: str, address: str) -> Dict[str, Any]:
     """دریافت آمار تجمیعی جفت توکن"""
     # اطمینان از استفاده از mainnet
     if network.lower() != "mainnet":
@@ -149,10 +223,161 @@ def get_aggregated_token_pair_stats(network: str, address: str) -> Dict[str, Any
         network = "mainnet"
     
     url = f"{MORALIS_SOLANA_BASE_URL}/token/{network}/{address}/pairs/stats"
-    return make_request(url=url, headers=get_headers())
+    return await make_request(url=url, headers=get_headers())
 
 # Token Swaps
-def get_swaps_by_pair_address(network: str, pair_address: str, limit: int = 100, min_value_usd: Optional[float] = None) -> Dict[str, Any]:
+def _swaps_key(result: Dict[str, Any]) -> Optional[str]:
+    """کلید لیست سوآپ‌ها در پاسخ (نسخه‌های مختلف API از result یا data استفاده می‌کنند)"""
+    for key in ("result", "data"):
+        if isinstance(result.get(key), list):
+            return key
+    return None
+
+def swap_value_usd(swap: Dict[str, Any]) -> Optional[float]:
+    """ارزش دلاری سوآپ (totalValueUsd یا value_usd)"""
+    value = swap.get("totalValueUsd", swap.get("value_usd"))
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+def _filter_swaps(result: Dict[str, Any], min_value_usd: Optional[float]) -> Dict[str, Any]:
+    """اعمال فیلتر بر اساس مقدار دلاری سوآپ"""
+    key = _swaps_key(result)
+    if min_value_usd is None or key is None:
+        return result
+    filtered_data = [
+        swap for swap in result[key]
+        if swap_value_usd(swap) is not None and swap_value_usd(swap) >= min_value_usd
+    ]
+    result[key] = filtered_data
+    if 'total' in result:
+        result['total'] = len(filtered_data)
+    return result
+
+def parse_swap_timestamp(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+async def _fetch_swaps_page(url: str, params: Dict[str, Any], page_timeout: Optional[float]) -> Dict[str, Any]:
+    # با page_timeout هر صفحه در تسک خودش مهلت مستقل دارد (مهلت کل درخواست برای جریان‌های طولانی مناسب نیست)
+    # و بدون آن صفحات از مهلت درخواست جاری پیروی می‌کنند
+    if page_timeout is not None:
+        start_request_state(page_timeout)
+    return await make_request(url=url, params=params, headers=get_headers())
+
+async def iter_swaps(
+    url: str,
+    progress: Dict[str, Any],
+    min_value_usd: Optional[float] = None,
+    from_date: Optional[str] = None,
+    to_date: Optional[str] = None,
+    max_records: int = MORALIS_STREAM_MAX_RECORDS,
+    page_timeout: Optional[float] = None,
+    order: str = "DESC",
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    پیمایش همه صفحات سوآپ با دنبال کردن cursor؛ فیلترها روی هر صفحه هنگام دریافت اعمال می‌شوند
+    و حداکثر دو صفحه (جاری و بعدی) در حافظه است. آمار پیمایش (records، scanned، pages، truncated) در progress نوشته می‌شود
+    order="ASC" سوآپ‌ها را از قدیمی به جدید برمی‌گرداند (پیمایش ناتمام پیشوند پیوسته‌ای از بازه است)
+    """
+    params: Dict[str, Any] = {"limit": MORALIS_STREAM_PAGE_SIZE, "order": order}
+    if from_date:
+        params["fromDate"] = from_date
+    if to_date:
+        params["toDate"] = to_date
+    lower, upper = parse_swap_timestamp(from_date), parse_swap_timestamp(to_date)
+
+    progress.update(records=0, scanned=0, pages=0, truncated=False)
+    next_page: Optional[asyncio.Future] = asyncio.ensure_future(_fetch_swaps_page(url, params, page_timeout))
+    try:
+        while next_page is not None:
+            result = await next_page
+            next_page = None
+            progress["pages"] += 1
+            key = _swaps_key(result)
+            cursor = result.get("cursor")
+            # دریافت صفحه بعدی هم‌زمان با پردازش صفحه جاری
+            if cursor and key and result[key]:
+                if progress["pages"] < MORALIS_STREAM_MAX_PAGES:
+                    next_page = asyncio.ensure_future(_fetch_swaps_page(url, {**params, "cursor": cursor}, page_timeout))
+                else:
+                    progress["truncated"] = True
+
+            items = result[key] if key else []
+            for index, swap in enumerate(items):
+                progress["scanned"] += 1
+                timestamp = parse_swap_timestamp(swap.get("blockTimestamp"))
+                if timestamp is not None:
+                    if upper is not None and timestamp > upper:
+                        continue
+                    if lower is not None and timestamp < lower:
+                        # در ترتیب نزولی با رسیدن به ابتدای بازه بقیه تاریخچه لازم نیست
+                        if order == "DESC":
+                            return
+                        continue
+                if min_value_usd is not None:
+                    value = swap_value_usd(swap)
+                    if value is None or value < min_value_usd:
+                        continue
+                yield swap
+                progress["records"] += 1
+                if progress["records"] >= max_records:
+                    if next_page is not None or index < len(items) - 1:
+                        progress["truncated"] = True
+                    return
+    finally:
+        if next_page is not None:
+            next_page.cancel()
+
+async def stream_swaps(url: str, **filters: Any) -> AsyncIterator[str]:
+    """
+    خروجی NDJSON پیمایش iter_swaps (هر سطر یک سوآپ)
+    سطر آخر خلاصه جریان ({"_summary": ...}) و در صورت خطای میانه راه سطر {"_error": ...} است
+    """
+    progress: Dict[str, Any] = {}
+    try:
+        async with aclosing(iter_swaps(url, progress, page_timeout=MORALIS_STREAM_PAGE_TIMEOUT, **filters)) as swaps:
+            async for swap in swaps:
+                yield json.dumps(swap, ensure_ascii=False) + "\n"
+    except HTTPException as e:
+        logger.error(f"خطا در پیمایش سوآپ‌ها پس از {progress.get('pages', 0)} صفحه: {e.detail}")
+        yield json.dumps({"_error": {"status_code": e.status_code, "detail": e.detail}}, ensure_ascii=False) + "\n"
+
+    yield json.dumps({"_summary": progress}) + "\n"
+
+# مسیر سوآپ‌ها برای هر نوع آدرس
+SWAP_PATHS = {
+    "pair": "/token/{network}/pairs/{address}/swaps",
+    "token": "/token/{network}/{address}/swaps",
+    "wallet": "/account/{network}/{address}/swaps",
+}
+
+def swaps_url(scope: str, network: str, address: str) -> str:
+    """آدرس کامل سوآپ‌ها برای scope (pair، token یا wallet)"""
+    # اطمینان از استفاده از mainnet
+    if network.lower() != "mainnet":
+        logger.warning(f"شبکه نامعتبر: {network} - استفاده از 'mainnet' به جای آن")
+    return MORALIS_SOLANA_BASE_URL + SWAP_PATHS[scope].format(network="mainnet", address=address)
+
+def stream_swaps_by_pair_address(network: str, pair_address: str, **filters: Any) -> AsyncIterator[str]:
+    """جریان کامل سوآپ‌ها بر اساس آدرس جفت"""
+    return stream_swaps(swaps_url("pair", network, pair_address), **filters)
+
+def stream_swaps_by_token_address(network: str, token_address: str, **filters: Any) -> AsyncIterator[str]:
+    """جریان کامل سوآپ‌ها بر اساس آدرس توکن"""
+    return stream_swaps(swaps_url("token", network, token_address), **filters)
+
+def stream_swaps_by_wallet_address(network: str, wallet_address: str, **filters: Any) -> AsyncIterator[str]:
+    """جریان کامل سوآپ‌ها بر اساس آدرس کیف پول"""
+    return stream_swaps(swaps_url("wallet", network, wallet_address), **filters)
+
+async def get_swaps_by_pair_address(network: str, pair_address: str, limit: int = 100, min_value_usd: Optional[float] = None) -> Dict[str, Any]:
     """دریافت سوآپ‌ها بر اساس آدرس جفت"""
     # اطمینان از استفاده از mainnet
     if network.lower() != "mainnet":
@@ -162,21 +387,10 @@ def get_swaps_by_pair_address(network: str, pair_address: str, limit: int = 100,
     url = f"{MORALIS_SOLANA_BASE_URL}/token/{network}/pairs/{pair_address}/swaps"
     params = {"limit": limit}
     
-    result = make_request(url=url, params=params, headers=get_headers())
-    
-    # اعمال فیلتر بر اساس مقدار دلاری سوآپ
-    if min_value_usd is not None and 'data' in result and isinstance(result['data'], list):
-        filtered_data = [
-            swap for swap in result['data'] 
-            if 'value_usd' in swap and swap['value_usd'] is not None and float(swap['value_usd']) >= min_value_usd
-        ]
-        result['data'] = filtered_data
-        if 'total' in result:
-            result['total'] = len(filtered_data)
-    
-    return result
+    result = await make_request(url=url, params=params, headers=get_headers())
+    return _filter_swaps(result, min_value_usd)
 
-def get_swaps_by_token_address(network: str, token_address: str, limit: int = 100, min_value_usd: Optional[float] = None) -> Dict[str, Any]:
+async def get_swaps_by_token_address(network: str, token_address: str, limit: int = 100, min_value_usd: Optional[float] = None) -> Dict[str, Any]:
     """دریافت سوآپ‌ها بر اساس آدرس توکن"""
     # اطمینان از استفاده از mainnet
     if network.lower() != "mainnet":
@@ -186,21 +400,10 @@ def get_swaps_by_token_address(network: str, token_address: str, limit: int = 10
     url = f"{MORALIS_SOLANA_BASE_URL}/token/{network}/{token_address}/swaps"
     params = {"limit": limit}
     
-    result = make_request(url=url, params=params, headers=get_headers())
-    
-    # اعمال فیلتر بر اساس مقدار دلاری سوآپ
-    if min_value_usd is not None and 'data' in result and isinstance(result['data'], list):
-        filtered_data = [
-            swap for swap in result['data'] 
-            if 'value_usd' in swap and swap['value_usd'] is not None and float(swap['value_usd']) >= min_value_usd
-        ]
-        result['data'] = filtered_data
-        if 'total' in result:
-            result['total'] = len(filtered_data)
-    
-    return result
+    result = await make_request(url=url, params=params, headers=get_headers())
+    return _filter_swaps(result, min_value_usd)
 
-def get_swaps_by_wallet_address(network: str, wallet_address: str, limit: int = 100, min_value_usd: Optional[float] = None) -> Dict[str, Any]:
+async def get_swaps_by_wallet_address(network: str, wallet_address: str, limit: int = 100, min_value_usd: Optional[float] = None) -> Dict[str, Any]:
     """دریافت سوآپ‌ها بر اساس آدرس کیف پول"""
     # اطمینان از استفاده از mainnet
     if network.lower() != "mainnet":
@@ -210,22 +413,11 @@ def get_swaps_by_wallet_address(network: str, wallet_address: str, limit: int =
     url = f"{MORALIS_SOLANA_BASE_URL}/account/{network}/{wallet_address}/swaps"
     params = {"limit": limit}
     
-    result = make_request(url=url, params=params, headers=get_headers())
-    
-    # اعمال فیلتر بر اساس مقدار دلاری سوآپ
-    if min_value_usd is not None and 'data' in result and isinstance(result['data'], list):
-        filtered_data = [
-            swap for swap in result['data'] 
-            if 'value_usd' in swap and swap['value_usd'] is not None and float(swap['value_usd']) >= min_value_usd
-        ]
-        result['data'] = filtered_data
-        if 'total' in result:
-            result['total'] = len(filtered_data)
-    
-    return result
+    result = await make_request(url=url, params=params, headers=get_headers())
+    return _filter_swaps(result, min_value_usd)
 
 # Token Snipers
-def get_snipers_by_pair_address(network: str, pair_address: str) -> Dict[str, Any]:
+async def get_snipers_by_pair_address(network: str, pair_address: str) -> Dict[str, Any]:
     """دریافت sniper ها بر اساس آدرس جفت"""
     # اطمینان از استفاده از mainnet
     if network.lower() != "mainnet":
@@ -233,10 +425,10 @@ def get_snipers_by_pair_address(network: str, pair_address: str) -> Dict[str, An
         network = "mainnet"
     
     url = f"{MORALIS_SOLANA_BASE_URL}/token/{network}/pairs/{pair_address}/snipers"
-    return make_request(url=url, headers=get_headers())
+    return await make_request(url=url, headers=get_headers())
 
 # Wallet API
-def get_native_balance(network: str, address: str) -> Dict[str, Any]:
+async def get_native_balance(network: str, address: str) -> Dict[str, Any]:
     """دریافت موجودی بومی بر اساس آدرس کیف پول"""
     # اطمینان از استفاده از mainnet
     if network.lower() != "mainnet":
@@ -244,9 +436,9 @@ def get_native_balance(network: str, address: str) -> Dict[str, Any]:
         network = "mainnet"
     
     url = f"{MORALIS_SOLANA_BASE_URL}/account/{network}/{address}/balance"
-    return make_request(url=url, headers=get_headers())
+    return await make_request(url=url, headers=get_headers())
 
-def get_spl(network: str, address: str) -> Dict[str, Any]:
+async def get_spl(network: str, address: str) -> Dict[str, Any]:
     """دریافت موجودی توکن بر اساس آدرس کیف پول"""
     # اطمینان از استفاده از mainnet
     if network.lower() != "mainnet":
@@ -254,9 +446,9 @@ def get_spl(network: str, address: str) -> Dict[str, Any]:
         network = "mainnet"
     
     url = f"{MORALIS_SOLANA_BASE_URL}/account/{network}/{address}/tokens"
-    return make_request(url=url, headers=get_headers())
+    return await make_request(url=url, headers=get_headers())
 
-def get_portfolio(network: str, address: str) -> Dict[str, Any]:
+async def get_portfolio(network: str, address: str) -> Dict[str, Any]:
     """دریافت داده‌های پرتفولیو بر اساس آدرس کیف پول"""
     # اطمینان از استفاده از mainnet
     if network.lower() != "mainnet":
@@ -264,4 +456,4 @@ def get_portfolio(network: str, address: str) -> Dict[str, Any]:
         network = "mainnet"
     
     url = f"{MORALIS_SOLANA_BASE_URL}/account/{network}/{address}/portfolio"
-    return make_request(url=url, headers=get_headers())
+    return await make_request(url=url, headers=get_headers())
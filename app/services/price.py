@@ -0,0 +1,245 @@
+import asyncio
+import time
+import logging
+import statistics
+from collections import defaultdict, deque
+from typing import Dict, Any, Optional, List, Tuple, Callable, Awaitable
+from fastapi import HTTPException
+from app.config.settings import PRICE_CHAINS, PRICE_SOURCE_ORDER, PRICE_HEDGE_DEFAULT_DELAY, PRICE_LATENCY_SAMPLES
+from app.services import dexscreener, coingecko, moralis, ave, cryptocompare
+from app.utils.request_context import get_request_state
+
+# تنظیم لاگر
+logger = logging.getLogger(__name__)
+
+PriceFetcher = Callable[[], Awaitable[float]]
+
+class LatencyTracker:
+    """
+    نگهداری زمان پاسخ اخیر هر منبع قیمت برای محاسبه صدک 95 (زمان ارسال درخواست پشتیبان)
+    """
+
+    def __init__(self, size: int = PRICE_LATENCY_SAMPLES):
+        self.samples: Dict[str, deque] = defaultdict(lambda: deque(maxlen=size))
+
+    def record(self, source: str, seconds: float) -> None:
+        self.samples[source].append(seconds)
+
+    def p95(self, source: str) -> Optional[float]:
+        samples = self.samples.get(source)
+        if not samples or len(samples) < 5:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+    def hedge_delay(self, source: str) -> float:
+        p95 = self.p95(source)
+        return p95 if p95 is not None else PRICE_HEDGE_DEFAULT_DELAY
+
+    def stats(self) -> Dict[str, Any]:
+        stats = {}
+        for source, samples in self.samples.items():
+            p95 = self.p95(source)
+            stats[source] = {"samples": len(samples), "p95_ms": round(p95 * 1000, 1) if p95 is not None else None}
+        return stats
+
+# نمونه سینگلتون از ردیاب زمان پاسخ منابع
+latency_tracker = LatencyTracker()
+
+def _to_price(value: Any) -> float:
+    if value is None:
+        raise ValueError("قیمت در پاسخ یافت نشد")
+    price = float(value)
+    if price <= 0:
+        raise ValueError(f"قیمت نامعتبر: {value}")
+    return price
+
+async def _price_from_dexscreener(chain: str, address: str) -> float:
+    pairs = await dexscreener.get_pairs_by_token(chain, address)
+    # جفت با بیشترین نقدینگی که توکن در آن توکن پایه است
+    candidates = [
+        pair for pair in pairs
+        if str((pair.get("baseToken") or {}).get("address", "")).lower() == address.lower() and pair.get("priceUsd")
+    ]
+    if not candidates:
+        raise ValueError("جفتی برای این توکن یافت نشد")
+    best = max(candidates, key=lambda pair: float((pair.get("liquidity") or {}).get("usd") or 0))
+    return _to_price(best.get("priceUsd"))
+
+async def _price_from_coingecko(platform: str, address: str, vs_currency: str) -> float:
+    result = await coingecko.get_token_price(platform, address, vs_currency)
+    prices = result.get(address) or result.get(address.lower()) or {}
+    return _to_price(prices.get(vs_currency))
+
+async def _price_from_moralis(network: str, address: str) -> float:
+    result = await moralis.get_token_price(network, address)
+    return _to_price(result.get("usdPrice"))
+
+async def _price_from_ave(chain: str, address: str) -> float:
+    token_id = f"{address}-{chain}"
+    result = await ave.get_token_prices([token_id], tvl_min=0)
+    data = result.get("data")
+    item = data.get(token_id) if isinstance(data, dict) else (data[0] if data else None)
+    if not isinstance(item, dict):
+        raise ValueError("قیمت در پاسخ یافت نشد")
+    return _to_price(item.get("current_price_usd") or item.get("price"))
+
+async def _price_from_cryptocompare(symbol: str, vs_currency: str) -> float:
+    result = await cryptocompare.get_price(symbol.upper(), vs_currency.upper())
+    return _to_price(result.get(vs_currency.upper()))
+
+def _relevant_sources(chain: str, address: str, symbol: Optional[str], vs_currency: str) -> List[Tuple[str, PriceFetcher]]:
+    """
+    منابع قابل استفاده برای این توکن به ترتیب اولویت PRICE_SOURCE_ORDER
+    منابعی که فقط دلار برمی‌گردانند برای ارزهای دیگر استفاده نمی‌شوند
+    """
+    aliases = PRICE_CHAINS.get(chain.lower(), {})
+    usd = vs_currency.lower() == "usd"
+    available: Dict[str, PriceFetcher] = {}
+    if usd and "dexscreener" in aliases:
+        available["dexscreener"] = lambda: _price_from_dexscreener(aliases["dexscreener"], address)
+    if "coingecko" in aliases:
+        available["coingecko"] = lambda: _price_from_coingecko(aliases["coingecko"], address, vs_currency.lower())
+    if usd and "moralis" in aliases:
+        available["moralis"] = lambda: _price_from_moralis(aliases["moralis"], address)
+    if usd and "ave" in aliases:
+        available["ave"] = lambda: _price_from_ave(aliases["ave"], address)
+    if symbol:
+        available["cryptocompare"] = lambda: _price_from_cryptocompare(symbol, vs_currency)
+    return [(name, available[name]) for name in PRICE_SOURCE_ORDER if name in available]
+
+async def _timed(source: str, fetch: PriceFetcher) -> Dict[str, Any]:
+    """
+    اجرای یک منبع و ثبت زمان پاسخ؛ خطا به جای انتشار در نتیجه ثبت می‌شود
+    """
+    start = time.monotonic()
+    try:
+        price = await fetch()
+    except HTTPException as e:
+        return {"status": "error", "error": str(e.detail), "latency_ms": round((time.monotonic() - start) * 1000, 1)}
+    except (ValueError, TypeError, KeyError, AttributeError) as e:
+        return {"status": "error", "error": str(e), "latency_ms": round((time.monotonic() - start) * 1000, 1)}
+    elapsed = time.monotonic() - start
+    latency_tracker.record(source, elapsed)
+    return {"status": "ok", "price": price, "latency_ms": round(elapsed * 1000, 1)}
+
+def _remaining_budget() -> Optional[float]:
+    state = get_request_state()
+    return state.remaining() if state is not None else None
+
+async def _cancel_pending(pending: Dict["asyncio.Task", str], results: Dict[str, Dict[str, Any]]) -> None:
+    for task, name in pending.items():
+        task.cancel()
+        results[name] = {"status": "cancelled"}
+    if pending:
+        await asyncio.gather(*pending, return_exceptions=True)
+    pending.clear()
+
+async def _hedged_first(sources: List[Tuple[str, PriceFetcher]], results: Dict[str, Dict[str, Any]]) -> Optional[str]:
+    """
+    درخواست به منبع اول؛ اگر تا صدک 95 زمان پاسخ آن جوابی نیامد (یا خطا داد) منبع بعدی هم پرسیده می‌شود
+    اولین پاسخ معتبر برنده است و بقیه درخواست‌ها لغو می‌شوند
+    """
+    waiting = list(sources)
+    pending: Dict[asyncio.Task, str] = {}
+    last_launched = None
+
+    def launch() -> None:
+        nonlocal last_launched
+        name, fetch = waiting.pop(0)
+        pending[asyncio.ensure_future(_timed(name, fetch))] = name
+        last_launched = name
+
+    launch()
+    while pending:
+        timeout = latency_tracker.hedge_delay(last_launched) if waiting else None
+        budget = _remaining_budget()
+        if budget is not None:
+            timeout = budget if timeout is None else min(timeout, budget)
+            if budget <= 0:
+                break
+
+        done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+        if not done:
+            if waiting:
+                logger.debug(f"منبع {last_launched} از صدک 95 کندتر است؛ ارسال درخواست پشتیبان")
+                launch()
+            continue
+
+        for task in done:
+            name = pending.pop(task)
+            results[name] = task.result()
+            if results[name]["status"] == "ok":
+                await _cancel_pending(pending, results)
+                return name
+            if waiting:
+                launch()
+
+    await _cancel_pending(pending, results)
+    return None
+
+async def _gather_prices(sources: List[Tuple[str, PriceFetcher]], needed: int, results: Dict[str, Dict[str, Any]]) -> None:
+    """
+    پرسیدن هم‌زمان همه منابع تا رسیدن به needed پاسخ معتبر یا پایان مهلت
+    """
+    pending = {asyncio.ensure_future(_timed(name, fetch)): name for name, fetch in sources}
+    ok = 0
+    while pending and ok < needed:
+        budget = _remaining_budget()
+        if budget is not None and budget <= 0:
+            break
+        done, _ = await asyncio.wait(pending, timeout=budget, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            name = pending.pop(task)
+            results[name] = task.result()
+            if results[name]["status"] == "ok":
+                ok += 1
+    await _cancel_pending(pending, results)
+
+async def get_consolidated_price(
+    chain: str,
+    address: str,
+    symbol: Optional[str] = None,
+    vs_currency: str = "usd",
+    mode: str = "first",
+    quorum: int = 2,
+) -> Dict[str, Any]:
+    """دریافت قیمت یکپارچه توکن از چند منبع (اولین پاسخ معتبر، میانه یا حد نصاب)"""
+    sources = _relevant_sources(chain, address, symbol, vs_currency)
+    if not sources:
+        raise HTTPException(status_code=400, detail=f"هیچ منبع قیمتی برای زنجیره '{chain}' و ارز '{vs_currency}' در دسترس نیست")
+
+    results: Dict[str, Dict[str, Any]] = {}
+    winner = None
+    if mode == "first":
+        winner = await _hedged_first(sources, results)
+    else:
+        needed = len(sources) if mode == "median" else min(quorum, len(sources))
+        await _gather_prices(sources, needed, results)
+
+    prices = {name: r["price"] for name, r in results.items() if r["status"] == "ok"}
+    if not prices or (mode == "quorum" and len(prices) < min(quorum, len(sources))):
+        raise HTTPException(
+            status_code=502,
+            detail={"message": "قیمت معتبری از منابع دریافت نشد", "sources": results},
+        )
+
+    price = prices[winner] if winner else statistics.median(prices.values())
+    response: Dict[str, Any] = {
+        "chain": chain,
+        "address": address,
+        "vs_currency": vs_currency.lower(),
+        "mode": mode,
+        "price": price,
+        "source": winner,
+        "sources": results,
+    }
+    if len(prices) > 1:
+        low, high = min(prices.values()), max(prices.values())
+        response["divergence"] = {
+            "min": low,
+            "max": high,
+            "spread_pct": round((high - low) / price * 100, 4),
+            "deviation_pct": {name: round((p - price) / price * 100, 4) for name, p in prices.items()},
+        }
+    return response
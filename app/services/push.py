@@ -0,0 +1,239 @@
+import asyncio
+import json
+import logging
+from typing import Dict, Any, Optional, Set, Callable, Awaitable, Tuple
+from fastapi import HTTPException
+from app.config.settings import (
+    PUSH_POLL_INTERVALS,
+    PUSH_POLL_MAX_BACKOFF,
+    PUSH_POLL_TIMEOUT,
+    PUSH_SUBSCRIBER_QUEUE,
+    PUSH_SUBSCRIBER_MAX_OVERFLOWS,
+    PUSH_MAX_TOPICS,
+)
+from app.services import geckoterminal, dexscreener, price
+from app.utils.request_context import start_request_state
+
+# تنظیم لاگر
+logger = logging.getLogger(__name__)
+
+def merge_patch(old: Any, new: Any) -> Any:
+    """
+    تفاوت دو وضعیت به صورت JSON Merge Patch (RFC 7396): کلیدهای حذف‌شده null و مقادیر غیر دیکشنری کامل جایگزین می‌شوند
+    اگر تغییری نباشد None برگردانده می‌شود
+    """
+    if not isinstance(old, dict) or not isinstance(new, dict):
+        return None if old == new else new
+    patch: Dict[str, Any] = {}
+    for key in old.keys() - new.keys():
+        patch[key] = None
+    for key, value in new.items():
+        if key not in old:
+            patch[key] = value
+        elif old[key] != value:
+            nested = merge_patch(old[key], value)
+            if nested is not None:
+                patch[key] = nested
+    return patch or None
+
+def _keyed(items: Any, key: Callable[[Dict[str, Any]], str]) -> Dict[str, Any]:
+    """تبدیل لیست به دیکشنری کلیددار (همراه با رتبه) تا تغییرات هر آیتم جداگانه ارسال شود"""
+    if isinstance(items, dict):
+        items = items.get("data", [])
+    return {key(item): dict(item, rank=rank) for rank, item in enumerate(items or []) if isinstance(item, dict)}
+
+def _price_snapshot(result: Dict[str, Any]) -> Dict[str, Any]:
+    # زمان پاسخ منابع در هر نوبت تغییر می‌کند و در وضعیت منتشرشده حذف می‌شود
+    snapshot = {key: value for key, value in result.items() if key != "sources"}
+    snapshot["sources"] = {
+        name: {k: v for k, v in source.items() if k != "latency_ms"}
+        for name, source in result.get("sources", {}).items()
+    }
+    return snapshot
+
+def resolve_topic(topic: str) -> Tuple[str, Callable[[], Awaitable[Any]], Callable[[Any], Dict[str, Any]]]:
+    """
+    تبدیل نام موضوع به (نوع، تابع دریافت، تابع ساخت وضعیت)
+    موضوع‌ها: trending_pools/{network}، token_boosts/latest، token_boosts/top، price/{chain}/{address}
+    """
+    parts = topic.strip("/").split("/")
+    if parts[0] == "trending_pools" and len(parts) == 2:
+        return "trending_pools", lambda: geckoterminal.get_trending_pools_by_network(parts[1]), lambda r: _keyed(r, lambda p: str(p.get("id")))
+    if parts[0] == "token_boosts" and len(parts) == 2 and parts[1] in ("latest", "top"):
+        fetch = dexscreener.get_boosted_tokens if parts[1] == "latest" else dexscreener.get_most_active_boosts
+        return "token_boosts", fetch, lambda r: _keyed(r, lambda t: f"{t.get('chainId')}:{t.get('tokenAddress')}")
+    if parts[0] == "price" and len(parts) == 3:
+        return "price", lambda: price.get_consolidated_price(parts[1], parts[2]), _price_snapshot
+    raise HTTPException(status_code=404, detail=f"موضوع نامعتبر: {topic}")
+
+class Subscriber:
+    """
+    مشترک یک یا چند موضوع با صف محدود؛ اگر مصرف‌کننده عقب بماند تغییرات در صف حذف
+    و به جای آن‌ها وضعیت کامل موضوع‌ها ارسال می‌شود. پس از چند بار سرریز اتصال قطع می‌شود
+    """
+
+    def __init__(self, maxsize: int = PUSH_SUBSCRIBER_QUEUE):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self.topics: Dict[str, "Topic"] = {}
+        self.overflows = 0
+        self.closed = False
+
+    def offer(self, event: Dict[str, Any]) -> None:
+        if self.closed:
+            return
+        try:
+            self.queue.put_nowait(event)
+            return
+        except asyncio.QueueFull:
+            pass
+        self.overflows += 1
+        # خالی کردن صف و ارسال وضعیت کامل به جای تغییرات از دست رفته
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        if self.overflows > PUSH_SUBSCRIBER_MAX_OVERFLOWS:
+            logger.warning("مشترک کند پس از سرریزهای مکرر قطع شد")
+            self.closed = True
+            self.queue.put_nowait({"event": "close", "data": {"reason": "slow_consumer"}})
+            return
+        for topic in self.topics.values():
+            if topic.state is not None and not self.queue.full():
+                self.queue.put_nowait(topic.snapshot_event())
+
+    async def next_event(self, timeout: float) -> Optional[Dict[str, Any]]:
+        """رویداد بعدی یا None اگر تا timeout رویدادی نرسد"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+class Topic:
+    """
+    یک موضوع با یک poller مشترک برای همه مشترکان؛ فقط تغییرات وضعیت منتشر می‌شود
+    """
+
+    def __init__(self, name: str, kind: str, fetch: Callable[[], Awaitable[Any]], snapshot: Callable[[Any], Dict[str, Any]]):
+        self.name = name
+        self.fetch = fetch
+        self.snapshot = snapshot
+        self.interval = PUSH_POLL_INTERVALS[kind]
+        self.subscribers: Set[Subscriber] = set()
+        self.state: Optional[Dict[str, Any]] = None
+        self.seq = 0
+        self.polls = 0
+        self.errors = 0
+        self.task: Optional[asyncio.Task] = None
+
+    def snapshot_event(self) -> Dict[str, Any]:
+        return {"topic": self.name, "event": "snapshot", "seq": self.seq, "data": self.state}
+
+    def publish(self, event: Dict[str, Any]) -> None:
+        for subscriber in list(self.subscribers):
+            subscriber.offer(event)
+
+    async def run(self) -> None:
+        delay = self.interval
+        while True:
+            # هر نوبت در تسک poller با مهلت مستقل اجرا می‌شود (نه مهلت درخواستی که poller را ایجاد کرده)
+            start_request_state(PUSH_POLL_TIMEOUT)
+            try:
+                result = await self.fetch()
+                self.polls += 1
+                state = self.snapshot(result)
+                delay = self.interval
+            except HTTPException as e:
+                self.errors += 1
+                # در محدودیت نرخ یا قطع مدار فاصله دریافت افزایش می‌یابد (با رعایت Retry-After)
+                retry_after = (e.headers or {}).get("Retry-After")
+                if e.status_code in (429, 503):
+                    delay = min(PUSH_POLL_MAX_BACKOFF, max(delay * 2, float(retry_after or 0)))
+                logger.warning(f"خطا در دریافت موضوع {self.name}: {e.detail}؛ تلاش بعدی پس از {delay} ثانیه")
+                self.publish({"topic": self.name, "event": "error", "seq": self.seq, "data": {"status_code": e.status_code, "detail": e.detail}})
+                await asyncio.sleep(delay)
+                continue
+            except Exception as e:
+                # خطای غیرمنتظره (مثلاً پاسخ با ساختار نامعتبر) poller را متوقف نمی‌کند؛ فقط لغو تسک آن را پایان می‌دهد
+                self.errors += 1
+                delay = min(PUSH_POLL_MAX_BACKOFF, delay * 2)
+                logger.error(f"خطای غیرمنتظره در دریافت موضوع {self.name}: {str(e)}؛ تلاش بعدی پس از {delay} ثانیه")
+                self.publish({"topic": self.name, "event": "error", "seq": self.seq, "data": {"status_code": 500, "detail": "خطای داخلی در دریافت موضوع"}})
+                await asyncio.sleep(delay)
+                continue
+
+            if self.state is None:
+                self.state = state
+                self.seq += 1
+                self.publish(self.snapshot_event())
+            else:
+                patch = merge_patch(self.state, state)
+                if patch is not None:
+                    self.state = state
+                    self.seq += 1
+                    self.publish({"topic": self.name, "event": "patch", "seq": self.seq, "data": patch})
+            await asyncio.sleep(delay)
+
+class PushHub:
+    """
+    مدیریت موضوع‌ها: poller هر موضوع با اولین مشترک شروع و با رفتن آخرین مشترک متوقف می‌شود
+    """
+
+    def __init__(self, max_topics: int = PUSH_MAX_TOPICS):
+        self.max_topics = max_topics
+        self.topics: Dict[str, Topic] = {}
+
+    def subscribe(self, subscriber: Subscriber, name: str) -> Topic:
+        name = name.strip("/")
+        topic = self.topics.get(name)
+        if topic is None:
+            kind, fetch, snapshot = resolve_topic(name)
+            if len(self.topics) >= self.max_topics:
+                raise HTTPException(status_code=503, detail="تعداد موضوع‌های فعال به حداکثر رسیده است")
+            topic = Topic(name, kind, fetch, snapshot)
+            self.topics[name] = topic
+            topic.task = asyncio.ensure_future(topic.run())
+            logger.info(f"شروع poller موضوع {name}")
+        topic.subscribers.add(subscriber)
+        subscriber.topics[name] = topic
+        if topic.state is not None:
+            subscriber.offer(topic.snapshot_event())
+        return topic
+
+    def unsubscribe(self, subscriber: Subscriber, name: Optional[str] = None) -> None:
+        names = [name.strip("/")] if name else list(subscriber.topics)
+        for topic_name in names:
+            topic = subscriber.topics.pop(topic_name, None)
+            if topic is None:
+                continue
+            topic.subscribers.discard(subscriber)
+            if not topic.subscribers:
+                topic.task.cancel()
+                del self.topics[topic_name]
+                logger.info(f"توقف poller موضوع {topic_name}")
+
+    async def close(self) -> None:
+        tasks = [topic.task for topic in self.topics.values()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.topics.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            name: {
+                "subscribers": len(topic.subscribers),
+                "seq": topic.seq,
+                "polls": topic.polls,
+                "errors": topic.errors,
+            }
+            for name, topic in self.topics.items()
+        }
+
+# نمونه سینگلتون از مدیریت موضوع‌ها
+push_hub = PushHub()
+
+def format_sse(event: Dict[str, Any]) -> str:
+    """قالب‌بندی رویداد برای Server-Sent Events"""
+    lines = [f"event: {event['event']}"]
+    if "seq" in event:
+        lines.append(f"id: {event['seq']}")
+    lines.append(f"data: {json.dumps(event, ensure_ascii=False)}")
+    return "\n".join(lines) + "\n\n"
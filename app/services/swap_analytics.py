@@ -0,0 +1,211 @@
+import asyncio
+import logging
+from array import array
+from contextlib import aclosing
+from datetime import datetime, timezone
+from typing import Dict, Any, Optional, List
+import numpy as np
+from fastapi import HTTPException
+from app.config.settings import (
+    SWAP_ANALYTICS_INTERVALS, SWAP_ANALYTICS_HISTOGRAM_BINS, SWAP_ANALYTICS_TIMEOUT, SWAP_ANALYTICS_MAX_RECORDS,
+    MORALIS_STREAM_PAGE_TIMEOUT,
+)
+from app.services import moralis
+
+# تنظیم لاگر
+logger = logging.getLogger(__name__)
+
+class SwapColumns:
+    """
+    سوآپ‌ها به صورت ستونی (آرایه‌های فشرده array) جمع‌آوری می‌شوند تا بدون نگهداری JSON خام به NumPy تبدیل شوند
+    """
+
+    def __init__(self):
+        self.timestamps = array("q")
+        self.values = array("d")
+        self.base_amounts = array("d")
+        # 1 خرید، -1 فروش، 0 نامشخص
+        self.sides = array("b")
+        self.wallets: List[str] = []
+
+    def append(self, swap: Dict[str, Any]) -> None:
+        timestamp = moralis.parse_swap_timestamp(swap.get("blockTimestamp"))
+        value = moralis.swap_value_usd(swap)
+        if timestamp is None or value is None:
+            return
+        side = str(swap.get("transactionType", "")).lower()
+        self.timestamps.append(int(timestamp.timestamp()))
+        self.values.append(abs(value))
+        self.base_amounts.append(_base_amount(swap, side))
+        self.sides.append(1 if side == "buy" else -1 if side == "sell" else 0)
+        self.wallets.append(str(swap.get("walletAddress") or ""))
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+def _base_amount(swap: Dict[str, Any], side: str) -> float:
+    """مقدار توکن پایه در سوآپ (برای محاسبه VWAP)"""
+    base = swap.get("baseToken")
+    legs = [swap.get("bought") or {}, swap.get("sold") or {}]
+    leg = next((leg for leg in legs if base and leg.get("address") == base), None)
+    if leg is None:
+        # بدون توکن پایه: در خرید توکن خریداری‌شده و در فروش توکن فروخته‌شده
+        leg = legs[1] if side == "sell" else legs[0]
+    try:
+        return abs(float(leg.get("amount") or 0))
+    except (TypeError, ValueError):
+        return 0.0
+
+def _iso(seconds: int) -> str:
+    return datetime.fromtimestamp(int(seconds), tz=timezone.utc).isoformat()
+
+def _safe_ratio(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    return np.divide(numerator, denominator, out=np.zeros_like(numerator), where=denominator > 0)
+
+def compute_swap_analytics(columns: SwapColumns, interval: int, top_wallets: int = 10) -> Dict[str, Any]:
+    """
+    محاسبه تجمیعی سوآپ‌ها در چند گذر برداری: حجم و VWAP هر بازه، تعداد و جریان دلاری خرید و فروش،
+    کیف پول‌های برتر و هیستوگرام اندازه معاملات
+    """
+    ts = np.frombuffer(columns.timestamps, dtype=np.int64)
+    values = np.frombuffer(columns.values, dtype=np.float64)
+    base = np.frombuffer(columns.base_amounts, dtype=np.float64)
+    sides = np.frombuffer(columns.sides, dtype=np.int8)
+    is_buy = (sides == 1).astype(np.float64)
+    is_sell = (sides == -1).astype(np.float64)
+    signed_values = values * sides
+
+    # بازه‌های زمانی
+    buckets, bucket_index = np.unique((ts // interval) * interval, return_inverse=True)
+    bucket_volume = np.bincount(bucket_index, weights=values)
+    bucket_base = np.bincount(bucket_index, weights=base)
+    bucket_counts = np.bincount(bucket_index)
+    bucket_buys = np.bincount(bucket_index, weights=is_buy)
+    bucket_sells = np.bincount(bucket_index, weights=is_sell)
+    bucket_buy_usd = np.bincount(bucket_index, weights=values * is_buy)
+    bucket_sell_usd = np.bincount(bucket_index, weights=values * is_sell)
+    bucket_vwap = _safe_ratio(bucket_volume, bucket_base)
+
+    # کیف پول‌ها
+    wallets, wallet_index = np.unique(np.array(columns.wallets, dtype=object), return_inverse=True)
+    wallet_volume = np.bincount(wallet_index, weights=values)
+    wallet_net = np.bincount(wallet_index, weights=signed_values)
+    wallet_counts = np.bincount(wallet_index)
+    top = np.argsort(-wallet_volume, kind="stable")[:top_wallets]
+
+    # هیستوگرام اندازه معاملات
+    edges = np.array(SWAP_ANALYTICS_HISTOGRAM_BINS + [np.inf], dtype=np.float64)
+    bin_index = np.clip(np.searchsorted(edges, values, side="right") - 1, 0, len(edges) - 2)
+    bin_counts = np.bincount(bin_index, minlength=len(edges) - 1)
+    bin_volume = np.bincount(bin_index, weights=values, minlength=len(edges) - 1)
+
+    total_volume = float(values.sum())
+    total_base = float(base.sum())
+    buy_usd = float((values * is_buy).sum())
+    sell_usd = float((values * is_sell).sum())
+    return {
+        "summary": {
+            "swaps": int(len(values)),
+            "from": _iso(ts.min()),
+            "to": _iso(ts.max()),
+            "volume_usd": total_volume,
+            "vwap_usd": total_volume / total_base if total_base > 0 else None,
+            "buys": int(is_buy.sum()),
+            "sells": int(is_sell.sum()),
+            "buy_usd": buy_usd,
+            "sell_usd": sell_usd,
+            "net_flow_usd": buy_usd - sell_usd,
+            "buy_pressure": buy_usd / (buy_usd + sell_usd) if buy_usd + sell_usd > 0 else None,
+            "unique_wallets": int(len(wallets)),
+        },
+        "buckets": [
+            {
+                "time": _iso(buckets[i]),
+                "swaps": int(bucket_counts[i]),
+                "volume_usd": float(bucket_volume[i]),
+                "vwap_usd": float(bucket_vwap[i]) if bucket_base[i] > 0 else None,
+                "buys": int(bucket_buys[i]),
+                "sells": int(bucket_sells[i]),
+                "buy_usd": float(bucket_buy_usd[i]),
+                "sell_usd": float(bucket_sell_usd[i]),
+                "net_flow_usd": float(bucket_buy_usd[i] - bucket_sell_usd[i]),
+            }
+            for i in range(len(buckets))
+        ],
+        "top_wallets": [
+            {
+                "wallet": wallets[i],
+                "swaps": int(wallet_counts[i]),
+                "volume_usd": float(wallet_volume[i]),
+                "net_flow_usd": float(wallet_net[i]),
+            }
+            for i in top
+        ],
+        "size_histogram": [
+            {
+                "min_usd": float(edges[i]),
+                "max_usd": float(edges[i + 1]) if np.isfinite(edges[i + 1]) else None,
+                "swaps": int(bin_counts[i]),
+                "volume_usd": float(bin_volume[i]),
+            }
+            for i in range(len(edges) - 1)
+        ],
+    }
+
+async def get_swap_analytics(
+    scope: str,
+    network: str,
+    address: str,
+    interval: str = "1h",
+    min_value_usd: Optional[float] = None,
+    from_date: Optional[str] = None,
+    to_date: Optional[str] = None,
+    max_records: int = SWAP_ANALYTICS_MAX_RECORDS,
+    top_wallets: int = 10,
+) -> Dict[str, Any]:
+    """
+    تحلیل تجمیعی سوآپ‌های یک جفت، توکن یا کیف پول
+    هر صفحه مهلت مستقل دارد و کل پیمایش به SWAP_ANALYTICS_TIMEOUT محدود است؛ اگر مهلت تمام شود یا صفحه‌ای
+    (مثلاً به دلیل سهمیه) ناموفق باشد، تحلیل روی سوآپ‌های دریافت‌شده انجام و scan.truncated علامت زده می‌شود
+    """
+    if interval not in SWAP_ANALYTICS_INTERVALS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"بازه نامعتبر: {interval}. مقادیر مجاز: {', '.join(SWAP_ANALYTICS_INTERVALS)}",
+        )
+
+    columns = SwapColumns()
+    progress: Dict[str, Any] = {}
+    swaps = moralis.iter_swaps(
+        moralis.swaps_url(scope, network, address),
+        progress,
+        min_value_usd=min_value_usd,
+        from_date=from_date,
+        to_date=to_date,
+        max_records=max_records,
+        page_timeout=MORALIS_STREAM_PAGE_TIMEOUT,
+    )
+
+    async def collect() -> None:
+        async with aclosing(swaps):
+            async for swap in swaps:
+                columns.append(swap)
+
+    try:
+        await asyncio.wait_for(collect(), timeout=SWAP_ANALYTICS_TIMEOUT)
+    except asyncio.TimeoutError:
+        logger.warning(f"مهلت پیمایش سوآپ‌های {address} تمام شد؛ تحلیل روی {len(columns)} سوآپ دریافت‌شده")
+        progress["truncated"] = True
+    except HTTPException as e:
+        if len(columns) == 0:
+            raise
+        logger.warning(f"پیمایش سوآپ‌های {address} پس از {progress.get('pages', 0)} صفحه متوقف شد: {e.detail}")
+        progress.update(truncated=True, error=e.detail)
+
+    logger.debug(f"تحلیل {len(columns)} سوآپ از {progress.get('pages', 0)} صفحه برای {address}")
+    result: Dict[str, Any] = {"address": address, "scope": scope, "interval": interval, "scan": progress}
+    if len(columns) == 0:
+        result.update(summary={"swaps": 0}, buckets=[], top_wallets=[], size_histogram=[])
+        return result
+    result.update(compute_swap_analytics(columns, SWAP_ANALYTICS_INTERVALS[interval], top_wallets))
+    return result
@@ -0,0 +1,114 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Set
+from app.utils.request_context import RequestState, get_request_state, start_request_state, record_cache_status, record_warmed_key
+
+# تنظیم لاگر
+logger = logging.getLogger(__name__)
+
+class _PendingBatch:
+    """دسته در حال جمع‌آوری: اقلام یکتا و آینده‌ای که نتیجه دسته را به منتظرها می‌رساند"""
+
+    def __init__(self):
+        self.items: Dict[Hashable, None] = {}
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.timer: Optional[asyncio.TimerHandle] = None
+        self.started = False
+        # وضعیت درخواست منتظرها (برای مهلت دسته) و وضعیت مستقل اجرای دسته
+        self.submitters: List[Optional[RequestState]] = []
+        self.state: Optional[RequestState] = None
+
+    def deadline(self) -> Optional[float]:
+        """دیرترین مهلت بین منتظرها؛ اگر یکی مهلتی نداشته باشد دسته هم مهلتی ندارد"""
+        deadlines = [state.deadline if state is not None else None for state in self.submitters]
+        if not deadlines or None in deadlines:
+            return None
+        return max(deadlines)
+
+class MicroBatcher:
+    """
+    جمع‌آوری درخواست‌های هم‌زمان در یک پنجره زمانی کوتاه و ارسال آن‌ها در یک فراخوانی دسته‌ای
+    fn(group, items) یک بار برای هر دسته اجرا می‌شود؛ هر منتظر نتایج همه دسته‌هایی را که اقلامش در آن‌ها بوده دریافت می‌کند
+    """
+
+    def __init__(self, fn: Callable[[Hashable, List[Any]], Awaitable[Any]], window: float, max_batch: int):
+        self.fn = fn
+        self.window = window
+        self.max_batch = max_batch
+        # گروه (پارامترهای مشترک فراخوانی) -> دسته در حال جمع‌آوری
+        self.pending: Dict[Hashable, _PendingBatch] = {}
+        # تسک‌های در حال اجرا (نگهداری ارجاع تا پیش از پایان جمع‌آوری نشوند)
+        self.running: Set[asyncio.Task] = set()
+        self.submitted = 0
+        self.batches = 0
+
+    async def submit(self, group: Hashable, items: List[Any]) -> List[Any]:
+        """
+        افزودن اقلام به دسته جاری گروه و انتظار برای نتیجه
+        """
+        self.submitted += 1
+        request_state = get_request_state()
+        batches: List[_PendingBatch] = []
+        for item in dict.fromkeys(items):
+            batch = self.pending.get(group)
+            if batch is None:
+                batch = _PendingBatch()
+                batch.timer = asyncio.get_running_loop().call_later(self.window, self._flush, group, batch)
+                self.pending[group] = batch
+            batch.items[item] = None
+            if not batches or batches[-1] is not batch:
+                batches.append(batch)
+                batch.submitters.append(request_state)
+            if len(batch.items) >= self.max_batch:
+                self._flush(group, batch)
+        # shield تا لغو شدن یک منتظر آینده مشترک دسته را لغو نکند
+        results = list(await asyncio.gather(*[asyncio.shield(b.future) for b in batches]))
+        # وضعیت کش (و کلیدهای گرم‌شده) اجرای دسته برای درخواست هر منتظر جداگانه ثبت می‌شود
+        for batch in batches:
+            if batch.state is None:
+                continue
+            for status in batch.state.cache_statuses:
+                record_cache_status(status)
+            for key, ttl, provider in batch.state.warmed_keys:
+                record_warmed_key(key, ttl, provider)
+        return results
+
+    def _flush(self, group: Hashable, batch: _PendingBatch) -> None:
+        if self.pending.get(group) is batch:
+            del self.pending[group]
+        if batch.timer is not None:
+            batch.timer.cancel()
+        if batch.started:
+            return
+        batch.started = True
+        self.batches += 1
+        logger.debug(f"ارسال دسته با {len(batch.items)} قلم برای گروه {group}")
+        task = asyncio.ensure_future(self._run(group, batch))
+        self.running.add(task)
+        task.add_done_callback(self.running.discard)
+
+    async def _run(self, group: Hashable, batch: _PendingBatch) -> None:
+        # دسته در context هر منتظری که _flush را فراخوانده باشد (تایمر یا پر شدن دسته) اجرا می‌شود؛
+        # وضعیت تازه با دیرترین مهلت منتظرها جایگزین آن می‌شود تا مهلت و وضعیت کش یک درخواست به بقیه نرسد
+        batch.state = start_request_state(
+            warming=bool(batch.submitters) and all(state is not None and state.warming for state in batch.submitters),
+        )
+        batch.state.deadline = batch.deadline()
+        try:
+            result = await self.fn(group, list(batch.items))
+        except asyncio.CancelledError:
+            batch.future.cancel()
+            raise
+        except Exception as e:
+            batch.future.set_exception(e)
+            # خواندن خطا تا اگر همه منتظرها لغو شده باشند هشدار خطای بازیابی‌نشده ثبت نشود
+            batch.future.exception()
+        else:
+            batch.future.set_result(result)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "submitted": self.submitted,
+            "batches": self.batches,
+            "pending": sum(len(b.items) for b in self.pending.values()),
+        }
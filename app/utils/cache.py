@@ -0,0 +1,255 @@
+import hashlib
+import json
+import time
+import logging
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+from app.config.settings import CACHE_TTLS, CACHE_MAX_STALE, CACHE_MAX_ENTRIES, CACHE_MAX_BYTES
+from app.utils.shared_store import get_shared_store
+from app.utils.compression import compress
+from app.utils.etag import compute_etag
+
+# تنظیم لاگر
+logger = logging.getLogger(__name__)
+
+class CacheEntry:
+    """
+    یک پاسخ ذخیره‌شده در کش؛ بدنه به صورت بایت خام نگه داشته می‌شود
+    تا هر خواننده نسخه مستقل خود را پارس کند و داده مشترک تغییر نکند
+    """
+
+    __slots__ = ("body", "ttl", "stored_at", "warmed", "variants", "validators", "_etag")
+
+    def __init__(
+        self,
+        body: bytes,
+        ttl: float,
+        stored_at: Optional[float] = None,
+        warmed: bool = False,
+        validators: Optional[Dict[str, str]] = None,
+    ):
+        self.body = body
+        self.ttl = ttl
+        self.stored_at = stored_at if stored_at is not None else time.time()
+        # ورودی توسط گرم‌کننده کش نوشته شده (فقط در کش محلی نگهداری می‌شود)
+        self.warmed = warmed
+        # نسخه‌های فشرده بدنه (کدگذاری -> بایت‌ها) که فقط یک بار ساخته می‌شوند (فقط در کش محلی)
+        self.variants: Dict[str, bytes] = {}
+        # سربرگ‌های ETag و Last-Modified پاسخ بالادستی برای درخواست شرطی هنگام به‌روزرسانی
+        self.validators: Dict[str, str] = validators or {}
+        self._etag: Optional[str] = None
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + sum(len(variant) for variant in self.variants.values())
+
+    @property
+    def etag(self) -> str:
+        """ETag قوی بدنه که فقط یک بار محاسبه می‌شود"""
+        if self._etag is None:
+            self._etag = compute_etag(self.body)
+        return self._etag
+
+    def age(self, now: Optional[float] = None) -> float:
+        return (now if now is not None else time.time()) - self.stored_at
+
+    def is_fresh(self, now: Optional[float] = None) -> bool:
+        return self.age(now) < self.ttl
+
+    def to_bytes(self) -> bytes:
+        """
+        سریال‌سازی برای ذخیره‌ساز مشترک: یک خط سرآیند (زمان ذخیره، TTL و در صورت وجود validatorهای بالادستی) و سپس بدنه خام
+        """
+        header = f"{self.stored_at} {self.ttl}"
+        if self.validators:
+            header += " " + json.dumps(self.validators, ensure_ascii=True, separators=(",", ":"))
+        return (header + "\n").encode("ascii") + self.body
+
+    @classmethod
+    def from_bytes(cls, raw: bytes) -> "CacheEntry":
+        header, _, body = raw.partition(b"\n")
+        stored_at, ttl, *rest = header.decode("ascii").split(" ", 2)
+        validators = json.loads(rest[0]) if rest else None
+        return cls(body, float(ttl), float(stored_at), validators=validators)
+
+    def is_servable_stale(self, max_stale: float, now: Optional[float] = None) -> bool:
+        """
+        آیا ورودی منقضی‌شده هنوز در بازه مجاز stale-while-revalidate است
+        (انقضای قطعی = TTL + حداکثر کهنگی)
+        """
+        return max_stale > 0 and self.age(now) < self.ttl + max_stale
+
+class ResponseCache:
+    """
+    کش LRU پاسخ‌های بالادستی با محدودیت تعداد و حجم کل
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        # کلید -> ورودی کش (ترتیب درج نشان‌دهنده ترتیب استفاده است)
+        self.entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self.total_bytes = 0
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # پاسخ‌هایی که از ورودی‌های نوشته‌شده توسط گرم‌کننده کش داده شده‌اند
+        self.warm_hits = 0
+        # به‌روزرسانی‌هایی که سرویس بالادستی با 304 پاسخ داد (بدنه قبلی دوباره استفاده شد)
+        self.not_modified = 0
+        # کلیدهای تحت نظر گرم‌کننده کش -> تعداد جستجوهای واقعی
+        self.watched: Dict[str, int] = {}
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        """
+        دریافت ورودی کش (حتی اگر منقضی شده باشد) و علامت‌گذاری آن به عنوان اخیراً استفاده‌شده
+        تصمیم درباره تازگی ورودی با فراخواننده است
+        """
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+        return entry
+
+    def record_lookup(self, status: str, key: Optional[str] = None, entry: Optional[CacheEntry] = None) -> None:
+        """
+        ثبت نتیجه یک جستجو در کش (HIT، STALE یا MISS) برای آمار
+        """
+        if key is not None and key in self.watched:
+            self.watched[key] += 1
+        if entry is not None and entry.warmed and status != "MISS":
+            self.warm_hits += 1
+        if status == "HIT":
+            self.hits += 1
+        elif status == "STALE":
+            self.stale_hits += 1
+        else:
+            self.misses += 1
+
+    def set(self, key: str, entry: CacheEntry) -> None:
+        """
+        ذخیره ورودی و حذف قدیمی‌ترین ورودی‌ها تا رسیدن به محدودیت‌های تعداد و حجم
+        """
+        if entry.size > self.max_bytes:
+            logger.debug(f"پاسخ بزرگ‌تر از ظرفیت کش است و ذخیره نمی‌شود ({entry.size} بایت)")
+            return
+        self.delete(key)
+        self.entries[key] = entry
+        self.total_bytes += entry.size
+        self._evict()
+
+    def variant(self, key: str, entry: CacheEntry, encoding: str) -> bytes:
+        """
+        نسخه فشرده بدنه ورودی؛ در اولین درخواست ساخته و اگر ورودی هنوز در کش باشد همراه آن نگهداری می‌شود
+        """
+        data = entry.variants.get(encoding)
+        if data is not None:
+            return data
+        data = compress(entry.body, encoding)
+        if self.entries.get(key) is entry:
+            entry.variants[encoding] = data
+            self.total_bytes += len(data)
+            self._evict()
+        return data
+
+    def _evict(self) -> None:
+        while len(self.entries) > self.max_entries or self.total_bytes > self.max_bytes:
+            _, evicted = self.entries.popitem(last=False)
+            self.total_bytes -= evicted.size
+            self.evictions += 1
+
+    def delete(self, key: str) -> None:
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.total_bytes -= entry.size
+
+    def clear(self) -> None:
+        self.entries.clear()
+        self.total_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        آمار کش برای پایش
+        """
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "bytes": self.total_bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "warm_hits": self.warm_hits,
+            "not_modified": self.not_modified,
+            "hit_rate": round((self.hits + self.stale_hits) / lookups, 4) if lookups else 0.0,
+        }
+
+def get_cache_ttl(policy: str) -> float:
+    """
+    مدت اعتبار کش برای یک سیاست (نام اندپوینت یا ارائه‌دهنده در CACHE_TTLS)
+    """
+    return CACHE_TTLS.get(policy, CACHE_TTLS["DEFAULT"])
+
+def get_cache_max_stale(policy: str) -> float:
+    """
+    حداکثر کهنگی مجاز (ثانیه پس از TTL) برای حالت stale-while-revalidate؛ 0 یعنی غیرفعال
+    """
+    return CACHE_MAX_STALE.get(policy, 0)
+
+def make_cache_key(
+    method: str,
+    url: str,
+    params: Optional[Dict[str, Any]] = None,
+    data: Optional[Any] = None,
+) -> str:
+    """
+    ساخت کلید کش از متد، آدرس، پارامترها و بدنه درخواست
+    """
+    raw = json.dumps(
+        [method.upper(), url, params or {}, data],
+        sort_keys=True,
+        default=str,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+# نمونه سینگلتون از کش پاسخ‌ها (سطح اول، درون هر پردازه)
+response_cache = ResponseCache(CACHE_MAX_ENTRIES, CACHE_MAX_BYTES)
+
+async def lookup_entry(key: str) -> Optional[CacheEntry]:
+    """
+    جستجو در کش دوسطحی: ابتدا کش درون‌پردازه‌ای و اگر ورودی تازه‌ای نبود ذخیره‌ساز مشترک
+    ورودی پیدا شده در ذخیره‌ساز مشترک در کش محلی هم قرار می‌گیرد
+    """
+    entry = response_cache.get(key)
+    if entry is not None and entry.is_fresh():
+        return entry
+    
+    store = get_shared_store()
+    if store is None:
+        return entry
+    
+    raw = await store.get(key)
+    if raw is None:
+        return entry
+    try:
+        shared_entry = CacheEntry.from_bytes(raw)
+    except (ValueError, UnicodeDecodeError) as e:
+        logger.warning(f"ورودی نامعتبر در ذخیره‌ساز مشترک: {e}")
+        return entry
+    
+    if entry is None or shared_entry.stored_at > entry.stored_at:
+        response_cache.set(key, shared_entry)
+        return shared_entry
+    return entry
+
+async def store_entry(key: str, entry: CacheEntry, max_stale: float = 0) -> None:
+    """
+    ذخیره ورودی در هر دو سطح کش؛ انقضای ذخیره‌ساز مشترک برابر انقضای قطعی (TTL + حداکثر کهنگی) است
+    """
+    response_cache.set(key, entry)
+    store = get_shared_store()
+    if store is not None:
+        await store.set(key, entry.to_bytes(), entry.ttl + max_stale)
@@ -0,0 +1,120 @@
+import math
+import time
+import logging
+from typing import Any, Dict
+from fastapi import HTTPException
+from app.config.settings import (
+    CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+    CIRCUIT_BREAKER_RECOVERY_TIMEOUT,
+    CIRCUIT_BREAKER_HALF_OPEN_PROBES,
+)
+
+# تنظیم لاگر
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+class CircuitBreaker:
+    """
+    قطع‌کننده مدار برای یک ارائه‌دهنده: پس از چند خطای پیاپی باز می‌شود و درخواست‌ها را فوراً با 503 رد می‌کند،
+    پس از مدت بازیابی نیمه‌باز شده و با چند درخواست آزمایشی وضعیت سرویس را می‌سنجد
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+        recovery_timeout: float = CIRCUIT_BREAKER_RECOVERY_TIMEOUT,
+        half_open_probes: int = CIRCUIT_BREAKER_HALF_OPEN_PROBES,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_probes = half_open_probes
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.probes_in_flight = 0
+        self.last_probe_at = 0.0
+        self.total_failures = 0
+        self.rejected = 0
+
+    def before_request(self) -> None:
+        """
+        بررسی اجازه ارسال درخواست؛ در صورت باز بودن مدار HTTPException 503 ایجاد می‌شود
+        """
+        now = time.monotonic()
+        if self.state == OPEN:
+            if now - self.opened_at < self.recovery_timeout:
+                self._reject(self.recovery_timeout - (now - self.opened_at))
+            self.state = HALF_OPEN
+            self.probes_in_flight = 0
+            logger.info(f"مدار {self.name} نیمه‌باز شد؛ ارسال درخواست آزمایشی")
+
+        if self.state == HALF_OPEN:
+            # آزمایش‌هایی که نتیجه‌شان گزارش نشده (مثلاً لغو شده‌اند) پس از مدت بازیابی نادیده گرفته می‌شوند
+            if self.probes_in_flight >= self.half_open_probes and now - self.last_probe_at < self.recovery_timeout:
+                self._reject(self.recovery_timeout - (now - self.last_probe_at))
+            if self.probes_in_flight >= self.half_open_probes:
+                self.probes_in_flight = 0
+            self.probes_in_flight += 1
+            self.last_probe_at = now
+
+    def _reject(self, retry_after: float) -> None:
+        self.rejected += 1
+        raise HTTPException(
+            status_code=503,
+            detail=f"سرویس {self.name} موقتاً در دسترس نیست. لطفاً بعداً تلاش کنید.",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+        )
+
+    def record_success(self) -> None:
+        if self.state != CLOSED:
+            logger.info(f"مدار {self.name} بسته شد؛ سرویس دوباره در دسترس است")
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.probes_in_flight = 0
+
+    def record_failure(self) -> None:
+        self.total_failures += 1
+        self.consecutive_failures += 1
+        if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != OPEN:
+                logger.error(f"مدار {self.name} پس از {self.consecutive_failures} خطای پیاپی باز شد")
+            self.state = OPEN
+            self.opened_at = time.monotonic()
+            self.probes_in_flight = 0
+
+    def stats(self) -> Dict[str, Any]:
+        stats = {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "total_failures": self.total_failures,
+            "rejected": self.rejected,
+        }
+        if self.state == OPEN:
+            stats["retry_in"] = round(max(0.0, self.recovery_timeout - (time.monotonic() - self.opened_at)), 2)
+        return stats
+
+class CircuitBreakerRegistry:
+    """
+    یک قطع‌کننده مدار برای هر ارائه‌دهنده (کلیدهای BASE_URLS)
+    """
+
+    def __init__(self):
+        self.breakers: Dict[str, CircuitBreaker] = {}
+
+    def get(self, provider: str) -> CircuitBreaker:
+        breaker = self.breakers.get(provider)
+        if breaker is None:
+            breaker = CircuitBreaker(provider)
+            self.breakers[provider] = breaker
+        return breaker
+
+    def stats(self) -> Dict[str, Any]:
+        return {name: breaker.stats() for name, breaker in self.breakers.items()}
+
+# نمونه سینگلتون از قطع‌کننده‌های مدار
+circuit_breakers = CircuitBreakerRegistry()
@@ -0,0 +1,200 @@
+import gzip
+import zlib
+import logging
+from typing import Dict, Optional, Tuple
+from app.config.settings import (
+    COMPRESSION_MIN_SIZE,
+    COMPRESSION_GZIP_LEVEL,
+    COMPRESSION_BROTLI_QUALITY,
+    COMPRESSIBLE_MEDIA_TYPES,
+)
+from app.utils.etag import encoded_etag
+
+try:
+    import brotli
+except ImportError:  # وابستگی اختیاری؛ بدون آن فقط gzip ارائه می‌شود
+    brotli = None
+
+# تنظیم لاگر
+logger = logging.getLogger(__name__)
+
+# کدگذاری‌هایی که پاسخ‌ها با آن‌ها فشرده می‌شوند، به ترتیب اولویت
+SUPPORTED_ENCODINGS: Tuple[str, ...] = ("br", "gzip") if brotli is not None else ("gzip",)
+# کدگذاری‌هایی که بدنه آن‌ها قابل بازگشایی است (برای ذخیره پاسخ فشرده بالادستی در کش)
+DECODABLE_ENCODINGS: Tuple[str, ...] = SUPPORTED_ENCODINGS + ("deflate",)
+
+def parse_accept_encoding(header: Optional[str]) -> Dict[str, float]:
+    """تبدیل سربرگ Accept-Encoding به کدگذاری -> وزن q"""
+    accepted: Dict[str, float] = {}
+    for part in (header or "").split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[name] = q
+    return accepted
+
+def accepts_encoding(header: Optional[str], encoding: str) -> bool:
+    accepted = parse_accept_encoding(header)
+    return accepted.get(encoding, accepted.get("*", 0.0)) > 0
+
+def negotiate_encoding(header: Optional[str]) -> Optional[str]:
+    """
+    انتخاب بهترین کدگذاری پشتیبانی‌شده بر اساس Accept-Encoding کلاینت (None = بدون فشرده‌سازی)
+    """
+    accepted = parse_accept_encoding(header)
+    best, best_q = None, 0.0
+    for encoding in SUPPORTED_ENCODINGS:
+        q = accepted.get(encoding, accepted.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=COMPRESSION_BROTLI_QUALITY)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=COMPRESSION_GZIP_LEVEL, mtime=0)
+    raise ValueError(f"کدگذاری پشتیبانی نمی‌شود: {encoding}")
+
+def decompress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.decompress(body)
+    if encoding == "gzip":
+        return zlib.decompress(body, wbits=31)
+    if encoding == "deflate":
+        try:
+            return zlib.decompress(body)
+        except zlib.error:
+            # برخی سرورها deflate خام (بدون سرآیند zlib) ارسال می‌کنند
+            return zlib.decompress(body, wbits=-15)
+    raise ValueError(f"کدگذاری پشتیبانی نمی‌شود: {encoding}")
+
+class StreamDecompressor:
+    """بازگشایی تکه‌تکه بدنه فشرده (برای خواندن جریانی پاسخ بالادستی بدون نگه داشتن کل بدنه)"""
+
+    def __init__(self, encoding: str):
+        if encoding not in DECODABLE_ENCODINGS:
+            raise ValueError(f"کدگذاری پشتیبانی نمی‌شود: {encoding}")
+        self.encoding = encoding
+        self.started = False
+        if encoding == "br":
+            self.decoder = brotli.Decompressor()
+        else:
+            self.decoder = zlib.decompressobj(31 if encoding == "gzip" else 15)
+
+    def decompress(self, chunk: bytes) -> bytes:
+        if self.encoding == "br":
+            return self.decoder.process(chunk)
+        try:
+            data = self.decoder.decompress(chunk)
+        except zlib.error:
+            if self.encoding != "deflate" or self.started:
+                raise
+            # برخی سرورها deflate خام (بدون سرآیند zlib) ارسال می‌کنند
+            self.decoder = zlib.decompressobj(-15)
+            data = self.decoder.decompress(chunk)
+        self.started = self.started or bool(chunk)
+        return data
+
+    def flush(self) -> bytes:
+        return b"" if self.encoding == "br" else self.decoder.flush()
+
+def is_compressible(media_type: Optional[str]) -> bool:
+    return (media_type or "").split(";")[0].strip().lower() in COMPRESSIBLE_MEDIA_TYPES
+
+class _StreamCompressor:
+    """فشرده‌سازی تکه‌تکه؛ هر تکه flush می‌شود تا پاسخ‌های جریانی بدون تأخیر به کلاینت برسند"""
+
+    def __init__(self, encoding: str):
+        if encoding == "br":
+            self.compressor = brotli.Compressor(quality=COMPRESSION_BROTLI_QUALITY)
+            self.compress = self.compressor.process
+            self.flush = self.compressor.flush
+            self.finish = self.compressor.finish
+        else:
+            self.compressor = zlib.compressobj(COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)
+            self.compress = self.compressor.compress
+            self.flush = lambda: self.compressor.flush(zlib.Z_SYNC_FLUSH)
+            self.finish = self.compressor.flush
+
+class CompressionMiddleware:
+    """
+    میان‌افزار ASGI برای فشرده‌سازی پاسخ‌ها بر اساس Accept-Encoding (brotli یا gzip)
+    پاسخ‌هایی که از قبل Content-Encoding دارند (مثلاً نسخه فشرده ذخیره‌شده در کش) بدون تغییر ارسال می‌شوند
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        header = next((value.decode("latin-1") for name, value in scope["headers"] if name == b"accept-encoding"), None)
+        encoding = negotiate_encoding(header)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Optional[Dict] = None
+        compressor: Optional[_StreamCompressor] = None
+        passthrough = False
+
+        async def send_compressed(message) -> None:
+            nonlocal start_message, compressor, passthrough
+            if message["type"] == "http.response.start":
+                headers = {name.lower() for name, _ in message.get("headers", [])}
+                content_type = next((value.decode("latin-1") for name, value in message.get("headers", []) if name.lower() == b"content-type"), None)
+                if b"content-encoding" in headers or not is_compressible(content_type):
+                    passthrough = True
+                    await send(message)
+                else:
+                    # ارسال سربرگ‌ها تا رسیدن اولین تکه بدنه (برای تصمیم بر اساس اندازه) به تعویق می‌افتد
+                    start_message = message
+                return
+            if passthrough or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if start_message is not None:
+                start, start_message = start_message, None
+                if not more_body and len(body) < COMPRESSION_MIN_SIZE:
+                    passthrough = True
+                    await send(start)
+                    await send(message)
+                    return
+                headers = [(name, value) for name, value in start.get("headers", []) if name.lower() not in (b"content-length", b"vary", b"etag")]
+                # ETag نسخه فشرده با پسوند کدگذاری از ETag نسخه خام متمایز می‌شود
+                headers += [
+                    (name, encoded_etag(value.decode("latin-1"), encoding).encode("latin-1"))
+                    for name, value in start.get("headers", []) if name.lower() == b"etag"
+                ]
+                vary = [value for name, value in start.get("headers", []) if name.lower() == b"vary"]
+                headers.append((b"content-encoding", encoding.encode("latin-1")))
+                headers.append((b"vary", b", ".join(vary + [b"Accept-Encoding"])))
+                if not more_body:
+                    # پاسخ کامل: فشرده‌سازی یکجا و تعیین طول
+                    compressed = compress(body, encoding)
+                    headers.append((b"content-length", str(len(compressed)).encode("latin-1")))
+                    await send({**start, "headers": headers})
+                    await send({"type": "http.response.body", "body": compressed})
+                    return
+                compressor = _StreamCompressor(encoding)
+                await send({**start, "headers": headers})
+
+            chunk = compressor.compress(body)
+            chunk += compressor.flush() if more_body else compressor.finish()
+            await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
@@ -0,0 +1,105 @@
+import hashlib
+import logging
+from typing import Dict, Optional, List, Tuple
+
+# تنظیم لاگر
+logger = logging.getLogger(__name__)
+
+def compute_etag(body: bytes) -> str:
+    """ETag قوی از هش محتوای بدنه (بدون فشرده‌سازی)"""
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+def encoded_etag(etag: str, encoding: Optional[str]) -> str:
+    """ETag نسخه فشرده یک بدنه (هر کدگذاری نمایش جداگانه‌ای است)"""
+    if not encoding:
+        return etag
+    return etag[:-1] + "-" + encoding + '"'
+
+def _opaque_tag(tag: str) -> str:
+    # مقایسه ضعیف (RFC 7232) و نادیده گرفتن پسوند کدگذاری: نسخه فشرده و خام یک محتوا یکسان‌اند
+    tag = tag.strip()
+    if tag.startswith("W/"):
+        tag = tag[2:]
+    for suffix in ('-br"', '-gzip"', '-deflate"'):
+        if tag.endswith(suffix):
+            return tag[:-len(suffix)] + '"'
+    return tag
+
+def etag_matches(if_none_match: Optional[str], etag: Optional[str]) -> bool:
+    """آیا سربرگ If-None-Match کلاینت با ETag پاسخ منطبق است"""
+    if not if_none_match or not etag:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    target = _opaque_tag(etag)
+    return any(_opaque_tag(tag) == target for tag in if_none_match.split(","))
+
+# سربرگ‌هایی که در پاسخ 304 هم ارسال می‌شوند
+NOT_MODIFIED_HEADERS = (b"etag", b"vary", b"cache-control", b"content-location", b"expires", b"date")
+
+class ConditionalMiddleware:
+    """
+    میان‌افزار ASGI برای ETag و درخواست‌های شرطی: به پاسخ‌های کامل 200 (بدون ETag) ETag قوی از هش بدنه
+    افزوده و در صورت انطباق با If-None-Match به جای بدنه 304 ارسال می‌شود
+    پاسخ‌های جریانی بدون ETag ارسال می‌شوند
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD"):
+            await self.app(scope, receive, send)
+            return
+        if_none_match = next((value.decode("latin-1") for name, value in scope["headers"] if name == b"if-none-match"), None)
+
+        start_message: Optional[Dict] = None
+        state = {"passthrough": False, "not_modified": False}
+
+        async def send_not_modified(start: Dict, headers: List[Tuple[bytes, bytes]]) -> None:
+            state["not_modified"] = True
+            kept = [(name, value) for name, value in headers if name.lower() in NOT_MODIFIED_HEADERS or name.lower().startswith(b"x-")]
+            await send({"type": "http.response.start", "status": 304, "headers": kept})
+            await send({"type": "http.response.body", "body": b""})
+
+        async def send_with_etag(message) -> None:
+            nonlocal start_message
+            if state["not_modified"]:
+                # بدنه پاسخ 304 ارسال نمی‌شود
+                return
+            if message["type"] == "http.response.start":
+                headers = message.get("headers", [])
+                etag = next((value.decode("latin-1") for name, value in headers if name.lower() == b"etag"), None)
+                if message["status"] != 200:
+                    state["passthrough"] = True
+                    await send(message)
+                elif etag is not None:
+                    state["passthrough"] = True
+                    if etag_matches(if_none_match, etag):
+                        await send_not_modified(message, headers)
+                    else:
+                        await send(message)
+                else:
+                    # ارسال سربرگ‌ها تا رسیدن بدنه کامل (برای محاسبه هش) به تعویق می‌افتد
+                    start_message = message
+                return
+            if state["passthrough"] or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            start, start_message = start_message, None
+            state["passthrough"] = True
+            if message.get("more_body", False):
+                # پاسخ جریانی: بدون ETag
+                await send(start)
+                await send(message)
+                return
+            etag = compute_etag(message.get("body", b""))
+            headers = list(start.get("headers", [])) + [(b"etag", etag.encode("latin-1"))]
+            if etag_matches(if_none_match, etag):
+                await send_not_modified(start, headers)
+                return
+            await send({**start, "headers": headers})
+            await send(message)
+
+        await self.app(scope, receive, send_with_etag)
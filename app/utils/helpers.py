@@ -1,13 +1,80 @@
+import asyncio
 import json
+import math
+import random
+import time
 import logging
-from typing import Dict, Any, Optional, Union, List
-import requests
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Any, Optional, Union, List, Set, Tuple, Callable, Awaitable
+import httpx
 from fastapi import HTTPException
+from fastapi.responses import Response, StreamingResponse
+from app.utils.http_client import get_client, resolve_provider
+from app.utils.cache import (
+    CacheEntry, response_cache, get_cache_ttl, get_cache_max_stale, make_cache_key,
+    lookup_entry, store_entry,
+)
+from app.utils.request_context import (
+    record_cache_status, get_request_deadline, is_warming, record_warmed_key, get_accept_encoding, get_if_none_match,
+    get_projection,
+)
+from app.utils.compression import DECODABLE_ENCODINGS, StreamDecompressor, accepts_encoding, negotiate_encoding
+from app.utils.json_stream import LimitedBody
+from app.utils.etag import encoded_etag, etag_matches
+from app.utils.projection import Projection
+from app.utils.singleflight import upstream_flights
+from app.utils.upstream_throttle import upstream_throttle
+from app.utils.circuit_breaker import circuit_breakers
+from app.config.settings import RETRY_BACKOFF_BASE, RETRY_BACKOFF_MAX, COMPRESSION_MIN_SIZE, MAX_RESPONSE_SIZE
 
 # تنظیم لاگر
 logger = logging.getLogger(__name__)
 
-def make_request(
+# تسک‌های به‌روزرسانی پس‌زمینه کش (نگهداری ارجاع تا پیش از پایان جمع‌آوری نشوند)
+_revalidations: Set["asyncio.Task"] = set()
+
+# نوع محتوای پاسخ‌های passthrough که از کش داده می‌شوند (همه سرویس‌های بالادستی JSON برمی‌گردانند)
+PASSTHROUGH_MEDIA_TYPE = "application/json"
+
+class PassthroughSink:
+    """
+    انتقال بدنه پاسخ موفق بالادستی به کلاینت به صورت تکه‌تکه و هم‌زمان با دریافت آن (بدون پارس JSON)
+    """
+
+    def __init__(self, accept_encoding: Optional[str] = None):
+        # با رسیدن سربرگ‌های پاسخ موفق نوع محتوا و کدگذاری بدنه در آن قرار می‌گیرد
+        self.started: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.chunks: asyncio.Queue = asyncio.Queue()
+        self.accept_encoding = accept_encoding
+        # بدنه فشرده بالادستی که بدون تغییر ارسال شد (کدگذاری، بایت‌ها) تا همراه ورودی کش ذخیره شود
+        self.encoded: Optional[Tuple[str, bytes]] = None
+
+    def accepts(self, encoding: Optional[str]) -> bool:
+        """آیا بدنه فشرده بالادستی با این کدگذاری مستقیم به کلاینت ارسال شود"""
+        return encoding in DECODABLE_ENCODINGS and accepts_encoding(self.accept_encoding, encoding)
+
+    def start(self, media_type: Optional[str], encoding: Optional[str] = None) -> None:
+        if not self.started.done():
+            self.started.set_result((media_type or PASSTHROUGH_MEDIA_TYPE, encoding))
+
+    def write(self, chunk: bytes) -> None:
+        self.chunks.put_nowait(chunk)
+
+    def finish(self, error: Optional[BaseException] = None) -> None:
+        self.chunks.put_nowait(error)
+
+    async def body(self):
+        while True:
+            chunk = await self.chunks.get()
+            if chunk is None:
+                return
+            if isinstance(chunk, BaseException):
+                # پس از ارسال سربرگ‌ها فقط می‌توان اتصال را قطع کرد
+                raise chunk
+            yield chunk
+
+async def make_request(
     url: str, 
     method: str = "GET", 
     params: Optional[Dict[str, Any]] = None,
@@ -15,14 +82,23 @@ def make_request(
     data: Optional[Dict[str, Any]] = None,
     timeout: int = 30,
     max_retries: int = 3,
-) -> Dict[str, Any]:
+    cache_policy: Optional[str] = None,
+    passthrough: bool = False,
+    max_response_size: Optional[int] = MAX_RESPONSE_SIZE,
+    projection: Optional[Projection] = None,
+) -> Union[Dict[str, Any], Response]:
     """
-    تابع عمومی برای ارسال درخواست‌های HTTP با قابلیت تلاش مجدد در صورت خطا
+    تابع عمومی غیرهمزمان برای ارسال درخواست‌های HTTP با قابلیت تلاش مجدد در صورت خطا
     همراه با لاگ‌گذاری گسترده برای عیب‌یابی بهتر
+    پاسخ‌های موفق بر اساس cache_policy (کلیدی از CACHE_TTLS، پیش‌فرض: نام ارائه‌دهنده) کش می‌شوند
+    با passthrough بدنه بدون پارس به صورت Response برگردانده می‌شود (برای مسیرهایی که داده را تغییر نمی‌دهند)
+    و در صورت نبود در کش هم‌زمان با دریافت از سرویس بالادستی به کلاینت ارسال می‌شود؛
+    فقط اگر کلاینت شکل‌دهی (fields / limits) خواسته باشد بدنه پارس و در شکل نهایی کش می‌شود
+    بدنه بزرگ‌تر از max_response_size بایت (None = نامحدود) با پارسر جریانی خوانده و لیست‌های آن کوتاه می‌شوند
+    projection شکل‌دهی ثابت مسیر برای پاسخ passthrough است که پیش از شکل‌دهی درخواست‌شده کلاینت اعمال می‌شود
     """
     headers = headers or {}
     params = params or {}
-    data_json = json.dumps(data) if data else None
     
     # لاگ اطلاعات درخواست برای عیب‌یابی
     logger.debug(f"API Request: {method} {url}")
@@ -31,33 +107,293 @@ def make_request(
     if data:
         logger.debug(f"Data: {data}")
     
+    if method not in ("GET", "POST", "PUT", "DELETE"):
+        raise ValueError(f"متد HTTP غیرمجاز: {method}")
+    
+    provider = resolve_provider(url)
+    
+    request_key = make_cache_key(method, url, params, data)
+    cache_ttl = get_cache_ttl(cache_policy or provider)
+    max_stale = get_cache_max_stale(cache_policy or provider)
+    warming = is_warming()
+    
+    projections = [p for p in (projection, get_projection()) if p is not None] if passthrough else []
+    if projections:
+        return await _shaped_request(
+            projections, request_key, cache_ttl,
+            lambda: make_request(
+                url, method, params, headers, data, timeout, max_retries, cache_policy, max_response_size=max_response_size,
+            ),
+        )
+    
+    def fetcher(
+        deadline: float,
+        sink: Optional[PassthroughSink] = None,
+        previous: Optional[CacheEntry] = None,
+    ) -> Callable[[], Awaitable[bytes]]:
+        # با ورودی قبلی کش، درخواست شرطی (If-None-Match / If-Modified-Since) ارسال می‌شود
+        conditional = _conditional_headers(previous) if previous is not None else None
+        async def fetch() -> bytes:
+            try:
+                body, validators = await _send_with_retries(
+                    provider, url, method, params, headers, data, timeout, max_retries, deadline, sink, conditional,
+                    max_response_size,
+                )
+            except BaseException as e:
+                if sink is not None:
+                    sink.finish(e)
+                raise
+            if sink is not None:
+                sink.finish()
+            if body is None:
+                # 304: بدنه قبلی (و نسخه‌های فشرده آن) بدون دریافت دوباره استفاده می‌شود
+                logger.debug(f"Upstream 304 Not Modified: {method} {url}")
+                response_cache.not_modified += 1
+                body, validators = previous.body, {**previous.validators, **validators}
+            if cache_ttl > 0:
+                entry = CacheEntry(body, cache_ttl, warmed=warming, validators=validators)
+                if previous is not None and previous.body is body:
+                    entry.variants.update(previous.variants)
+                if sink is not None and sink.encoded is not None:
+                    # نسخه فشرده بالادستی همان نسخه‌ای است که در پاسخ‌های بعدی از کش ارسال می‌شود
+                    entry.variants[sink.encoded[0]] = sink.encoded[1]
+                await store_entry(request_key, entry, max_stale)
+            return body
+        return fetch
+    
+    # مهلت این فراخوانی: حداقل بودجه باقی‌مانده درخواست ورودی و حداکثر زمان تمام تلاش‌ها
+    # اجرای مشترک (single-flight) فقط به حداکثر زمان تمام تلاش‌ها محدود است و هر فراخواننده تا مهلت خود منتظر می‌ماند
+    own_deadline = time.monotonic() + timeout * max_retries
+    request_deadline = get_request_deadline()
+    deadline = min(own_deadline, request_deadline) if request_deadline is not None else own_deadline
+    entry = None
+    
+    # بررسی کش (محلی و سپس مشترک) پیش از ارسال درخواست به سرویس بالادستی
+    # گرم‌کننده کش همیشه پاسخ تازه دریافت می‌کند
+    if cache_ttl > 0 and not warming:
+        entry = await lookup_entry(request_key)
+        if entry is not None and entry.is_fresh():
+            logger.debug(f"Cache HIT: {method} {url}")
+            response_cache.record_lookup("HIT", request_key, entry)
+            record_cache_status("HIT")
+            return _respond(entry.body, passthrough, request_key, entry)
+        
+        # stale-while-revalidate: پاسخ قدیمی فوراً برگردانده و در پس‌زمینه به‌روز می‌شود
+        if entry is not None and entry.is_servable_stale(max_stale):
+            logger.debug(f"Cache STALE ({entry.age():.1f}s): {method} {url}")
+            response_cache.record_lookup("STALE", request_key, entry)
+            record_cache_status("STALE")
+            # به‌روزرسانی پس‌زمینه به مهلت درخواست فعلی وابسته نیست
+            _schedule_revalidation(request_key, fetcher(own_deadline, previous=entry))
+            return _respond(entry.body, passthrough, request_key, entry)
+        
+        response_cache.record_lookup("MISS", request_key, entry)
+        record_cache_status("MISS")
+    elif cache_ttl > 0:
+        # گرم‌کننده کش کش را نمی‌خواند ولی با ورودی قبلی درخواست شرطی می‌فرستد
+        entry = response_cache.get(request_key)
+    
+    # درخواست‌های خواندنی یکسان و هم‌زمان فقط یک بار به سرویس بالادستی ارسال می‌شوند
+    if method == "GET" or cache_ttl > 0:
+        # گرم‌کننده کش تا پایان دریافت و ثبت کلید کش منتظر می‌ماند
+        if passthrough and not warming and request_key not in upstream_flights.calls:
+            return await _stream_through(request_key, fetcher, own_deadline, request_deadline, entry)
+        body = await _wait_for_flight(upstream_flights.do(request_key, fetcher(own_deadline, previous=entry)), request_deadline)
+    else:
+        body = await fetcher(deadline, previous=entry)()
+    if cache_ttl > 0:
+        # ثبت در وضعیت همین فراخواننده، حتی اگر ورودی کش را اجرای در جریان فراخواننده دیگری نوشته باشد
+        record_warmed_key(request_key, cache_ttl, provider)
+    
+    # پاسخ تازه ذخیره‌شده در کش با ETag و نسخه‌های فشرده آن ارسال می‌شود
+    stored = response_cache.get(request_key) if passthrough and cache_ttl > 0 else None
+    return _respond(body, passthrough, request_key, stored if stored is not None and stored.body is body else None)
+
+def _conditional_headers(entry: CacheEntry) -> Optional[Dict[str, str]]:
+    """سربرگ‌های درخواست شرطی از validatorهای ذخیره‌شده پاسخ بالادستی (اگر سرویس آن‌ها را ارسال کرده باشد)"""
+    conditional = {}
+    if entry.validators.get("etag"):
+        conditional["If-None-Match"] = entry.validators["etag"]
+    if entry.validators.get("last-modified"):
+        conditional["If-Modified-Since"] = entry.validators["last-modified"]
+    return conditional or None
+
+def _respond(
+    body: bytes,
+    passthrough: bool,
+    request_key: Optional[str] = None,
+    entry: Optional[CacheEntry] = None,
+) -> Union[Dict[str, Any], Response]:
+    if not passthrough:
+        return parse_response_body(body)
+    if entry is None:
+        return Response(content=body, media_type=PASSTHROUGH_MEDIA_TYPE)
+    # پاسخ از کش: ETag از پیش محاسبه‌شده و نسخه فشرده ذخیره‌شده (بدون فشرده‌سازی دوباره در هر درخواست)
+    encoding = None
+    if len(body) >= COMPRESSION_MIN_SIZE:
+        accept_encoding = get_accept_encoding()
+        encoding = next((e for e in entry.variants if accepts_encoding(accept_encoding, e)), None) or negotiate_encoding(accept_encoding)
+    headers = {"ETag": encoded_etag(entry.etag, encoding), "Vary": "Accept-Encoding"}
+    if etag_matches(get_if_none_match(), entry.etag):
+        return Response(status_code=304, headers=headers)
+    if encoding is None:
+        return Response(content=body, media_type=PASSTHROUGH_MEDIA_TYPE, headers=headers)
+    headers["Content-Encoding"] = encoding
+    return Response(content=response_cache.variant(request_key, entry, encoding), media_type=PASSTHROUGH_MEDIA_TYPE, headers=headers)
+
+async def _shaped_request(
+    projections: List[Projection],
+    request_key: str,
+    cache_ttl: float,
+    load: Callable[[], Awaitable[Dict[str, Any]]],
+) -> Response:
+    """
+    پاسخ passthrough با شکل‌دهی‌های مسیر و درخواست (به ترتیب)؛ نسخه شکل‌داده‌شده تا پایان تازگی پاسخ کامل در کش محلی
+    نگه داشته می‌شود تا درخواست‌های تکراری بدون پارس و سریال‌سازی دوباره (با ETag و نسخه فشرده خودش) پاسخ داده شوند
+    """
+    shaped_key = "|".join([request_key] + [projection.key for projection in projections])
+    if cache_ttl > 0:
+        entry = response_cache.get(shaped_key)
+        if entry is not None and entry.is_fresh():
+            logger.debug(f"Cache HIT (shaped): {shaped_key}")
+            response_cache.record_lookup("HIT", shaped_key, entry)
+            record_cache_status("HIT")
+            return _respond(entry.body, True, shaped_key, entry)
+    
+    # وضعیت کش پاسخ کامل (HIT، STALE یا MISS) در همین فراخوانی ثبت می‌شود
+    shaped = await load()
+    for projection in projections:
+        shaped = projection.apply(shaped)
+    body = json.dumps(shaped, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    source = response_cache.get(request_key) if cache_ttl > 0 else None
+    ttl = source.ttl - source.age() if source is not None else 0
+    if ttl <= 0:
+        return _respond(body, True)
+    entry = CacheEntry(body, ttl)
+    response_cache.set(shaped_key, entry)
+    return _respond(body, True, shaped_key, entry)
+
+async def _wait_for_flight(flight: Awaitable[bytes], request_deadline: Optional[float]) -> bytes:
+    """
+    انتظار برای اجرای مشترک فقط تا مهلت درخواست همین فراخواننده
+    (اجرای مشترک با رفتن یک فراخواننده لغو نمی‌شود و پاسخ آن برای بقیه و کش می‌ماند)
+    """
+    if request_deadline is None:
+        return await flight
+    try:
+        return await asyncio.wait_for(flight, max(0.0, request_deadline - time.monotonic()))
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="مهلت درخواست به پایان رسید.")
+
+async def _stream_through(
+    request_key: str,
+    fetcher: Callable[..., Callable[[], Awaitable[bytes]]],
+    deadline: float,
+    request_deadline: Optional[float] = None,
+    previous: Optional[CacheEntry] = None,
+) -> Response:
+    """
+    اجرای درخواست بالادستی (در single-flight) و برگرداندن پاسخ جریانی به محض رسیدن سربرگ‌های پاسخ موفق
+    خطاهای پیش از اولین بایت مانند حالت عادی به صورت HTTPException برگردانده می‌شوند
+    اگر سربرگ‌ها تا مهلت درخواست نرسند 504 برگردانده می‌شود و دریافت برای فراخواننده‌های دیگر ادامه می‌یابد
+    """
+    sink = PassthroughSink(get_accept_encoding())
+    flight = asyncio.ensure_future(upstream_flights.do(request_key, fetcher(deadline, sink, previous)))
+    remaining = max(0.0, request_deadline - time.monotonic()) if request_deadline is not None else None
+    await asyncio.wait([sink.started, flight], timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+    if not flight.done() and not sink.started.done():
+        flight.cancel()
+        raise HTTPException(status_code=504, detail="مهلت درخواست به پایان رسید.")
+    if flight.done():
+        # پاسخ کامل دریافت شده (یا 304 بالادستی یا خطا پیش از شروع انتقال)
+        body = flight.result()
+        stored = response_cache.get(request_key)
+        return _respond(body, True, request_key, stored if stored is not None and stored.body is body else None)
+    # خطای دریافت پس از شروع انتقال از طریق sink به کلاینت می‌رسد
+    flight.add_done_callback(lambda task: task.cancelled() or task.exception())
+    media_type, encoding = sink.started.result()
+    headers = {"Content-Encoding": encoding, "Vary": "Accept-Encoding"} if encoding else None
+    return StreamingResponse(sink.body(), media_type=media_type, headers=headers)
+
+def _schedule_revalidation(request_key: str, fetch: Callable[[], Awaitable[bytes]]) -> None:
+    """
+    به‌روزرسانی پس‌زمینه یک ورودی کهنه کش؛ برای هر کلید فقط یک به‌روزرسانی هم‌زمان اجرا می‌شود
+    """
+    if request_key in upstream_flights.calls:
+        return
+    task = asyncio.ensure_future(upstream_flights.do(request_key, fetch))
+    _revalidations.add(task)
+    task.add_done_callback(_finish_revalidation)
+
+def _finish_revalidation(task: "asyncio.Task") -> None:
+    _revalidations.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning(f"به‌روزرسانی پس‌زمینه کش ناموفق بود: {task.exception()}")
+
+async def _send_with_retries(
+    provider: str,
+    url: str,
+    method: str,
+    params: Dict[str, Any],
+    headers: Dict[str, str],
+    data: Optional[Dict[str, Any]],
+    timeout: int,
+    max_retries: int,
+    deadline: Optional[float] = None,
+    sink: Optional[PassthroughSink] = None,
+    conditional: Optional[Dict[str, str]] = None,
+    max_response_size: Optional[int] = MAX_RESPONSE_SIZE,
+) -> Tuple[Optional[bytes], Dict[str, str]]:
+    """
+    ارسال درخواست به سرویس بالادستی با تلاش مجدد و برگرداندن بدنه خام پاسخ موفق و validatorهای آن (ETag، Last-Modified)
+    هر تلاش پیش از ارسال در صف سهمیه خروجی ارائه‌دهنده منتظر نوبت می‌ماند
+    با sink بدنه پاسخ موفق هم‌زمان با دریافت به آن نوشته می‌شود و پس از شروع انتقال تلاش مجدد انجام نمی‌شود
+    با conditional درخواست شرطی ارسال و در پاسخ 304 بدنه None برگردانده می‌شود
+    حافظه بدنه به max_response_size محدود است (بدنه بزرگ‌تر با فراداده *_total / *_truncated کوتاه می‌شود)
+    """
+    # کلاینت غیرهمزمان با استخر اتصال مخصوص همین ارائه‌دهنده
+    client = get_client(provider)
+    breaker = circuit_breakers.get(provider)
+    
     retry_count = 0
+    retry_after = None
     while retry_count < max_retries:
+        # اگر ارائه‌دهنده از دسترس خارج شده یا بودجه زمانی تمام شده باشد، بدون انتظار خطا برگردانده می‌شود
+        breaker.before_request()
+        _remaining_budget(deadline, timeout)
+        await upstream_throttle.acquire(provider, url, deadline)
+        
+        # مهلت هر تلاش از بودجه باقی‌مانده کم می‌شود (کل تلاش، نه فقط هر مرحله خواندن)
+        attempt_timeout = _remaining_budget(deadline, timeout)
         try:
-            if method == "GET":
-                response = requests.get(url, params=params, headers=headers, timeout=timeout)
-            elif method == "POST":
-                response = requests.post(url, params=params, headers=headers, json=data, timeout=timeout)
-            elif method == "PUT":
-                response = requests.put(url, params=params, headers=headers, json=data, timeout=timeout)
-            elif method == "DELETE":
-                response = requests.delete(url, params=params, headers=headers, timeout=timeout)
+            request = client.build_request(
+                method,
+                url,
+                params=params,
+                headers={**headers, **conditional} if conditional else headers,
+                json=data if method in ("POST", "PUT") else None,
+                timeout=attempt_timeout,
+            )
+            response, body = await asyncio.wait_for(_send_attempt(client, request, sink, max_response_size), timeout=attempt_timeout)
+            
+            # خطاهای سمت سرور در وضعیت قطع‌کننده مدار شمرده می‌شوند
+            if response.status_code >= 500:
+                breaker.record_failure()
             else:
-                raise ValueError(f"متد HTTP غیرمجاز: {method}")
+                breaker.record_success()
             
             # لاگ اطلاعات پاسخ
             logger.debug(f"Response Status: {response.status_code}")
             
-            # نمایش بخشی از پاسخ (برای جلوگیری از لاگ‌های خیلی بزرگ)
-            response_preview = response.text[:200] + "..." if len(response.text) > 200 else response.text
+            # نمایش بخشی از پاسخ (برای جلوگیری از لاگ‌های خیلی بزرگ)؛ فقط 200 بایت اول رمزگشایی می‌شود
+            response_preview = body[:200].decode("utf-8", errors="replace") + ("..." if len(body) > 200 else "")
             logger.debug(f"Response Body: {response_preview}")
             
+            validators = {name: response.headers[name] for name in ("etag", "last-modified") if name in response.headers}
+            if response.status_code == 304 and conditional:
+                return None, validators
             if response.status_code < 400:
-                try:
-                    return response.json()
-                except json.JSONDecodeError:
-                    logger.warning(f"پاسخ JSON نامعتبر: {response.text[:100]}...")
-                    return {"status": "success", "content": response.text}
+                return body, validators
             
             # اطلاعات بیشتر برای خطاهای رایج
             if response.status_code == 401:
@@ -75,22 +411,172 @@ def make_request(
             elif response.status_code == 429:  # حد مجاز درخواست (Rate Limit)
                 logger.warning(f"محدودیت نرخ درخواست (429): تلاش مجدد {retry_count + 1}/{max_retries}")
                 retry_count += 1
-                continue
+                retry_after = response.headers.get("retry-after")
+                if retry_count < max_retries and await _wait_before_retry(retry_count, retry_after, deadline):
+                    continue
+                break
             else:
                 logger.error(f"خطای API: {response.status_code} - {response_preview}")
             
-            error_message = f"خطای API: {response.status_code} - {response.text}"
+            error_message = f"خطای API: {response.status_code} - {body.decode('utf-8', errors='replace')}"
             raise HTTPException(status_code=response.status_code, detail=error_message)
         
-        except (requests.RequestException, requests.Timeout) as e:
-            logger.warning(f"خطای شبکه در درخواست: {str(e)} - تلاش مجدد {retry_count + 1}/{max_retries}")
+        except (httpx.HTTPError, asyncio.TimeoutError) as e:
+            breaker.record_failure()
+            if sink is not None and sink.started.done():
+                logger.error(f"اتصال به سرویس بالادستی حین انتقال پاسخ قطع شد: {str(e) or type(e).__name__}")
+                raise HTTPException(status_code=502, detail=f"انتقال پاسخ سرویس بالادستی ناقص ماند: {url}")
+            logger.warning(f"خطای شبکه در درخواست: {str(e) or type(e).__name__} - تلاش مجدد {retry_count + 1}/{max_retries}")
             retry_count += 1
-            if retry_count == max_retries:
-                logger.error(f"تمام تلاش‌های مجدد ناموفق بود: {str(e)}")
+            if retry_count == max_retries or not await _wait_before_retry(retry_count, None, deadline):
+                logger.error(f"تمام تلاش‌های مجدد ناموفق بود: {str(e) or type(e).__name__}")
+                if isinstance(e, (httpx.TimeoutException, asyncio.TimeoutError)) and deadline is not None and time.monotonic() >= deadline:
+                    raise HTTPException(status_code=504, detail=f"مهلت درخواست به سرویس بالادستی به پایان رسید: {url}")
                 raise HTTPException(status_code=503, detail=f"خطای اتصال به سرویس: {str(e)}")
     
     logger.error("تعداد درخواست‌ها بیش از حد مجاز است.")
-    raise HTTPException(status_code=429, detail="تعداد درخواست‌ها بیش از حد مجاز است. لطفاً بعداً تلاش کنید.")
+    raise HTTPException(
+        status_code=429,
+        detail="تعداد درخواست‌ها بیش از حد مجاز است. لطفاً بعداً تلاش کنید.",
+        headers={"Retry-After": str(math.ceil(parse_retry_after(retry_after) or RETRY_BACKOFF_MAX))},
+    )
+
+async def _send_attempt(
+    client: httpx.AsyncClient,
+    request: httpx.Request,
+    sink: Optional[PassthroughSink],
+    max_size: Optional[int] = MAX_RESPONSE_SIZE,
+):
+    """
+    ارسال یک تلاش و خواندن جریانی بدنه پاسخ با سقف حافظه max_size (بدنه بزرگ‌تر با پارسر جریانی کوتاه می‌شود)
+    بدنه پاسخ موفق در صورت وجود sink تکه‌تکه به آن هم نوشته می‌شود؛ اگر اندازه بدنه از پیش معلوم نباشد
+    تا max_size نگه داشته می‌شود و بدنه بزرگ‌تر اصلاً منتقل نمی‌شود (بدنه کوتاه‌شده پس از پایان دریافت
+    مانند پاسخ‌های بعدی از کش ارسال می‌شود تا پاسخ MISS و HIT یکسان باشد)
+    """
+    response = await client.send(request, stream=True)
+    try:
+        body = LimitedBody(max_size)
+        if sink is None or response.status_code >= 300:
+            async for chunk in response.aiter_bytes():
+                body.feed(chunk)
+            return response, body.finish()
+        encoding = response.headers.get("content-encoding", "").strip().lower()
+        media_type = response.headers.get("content-type")
+        passthrough_encoding = encoding if sink.accepts(encoding) else None
+        # بدون فشرده‌سازی، Content-Length اندازه بدنه را از پیش مشخص می‌کند
+        content_length = response.headers.get("content-length", "") if not encoding or encoding == "identity" else ""
+        streaming = not max_size or (content_length.isdigit() and int(content_length) <= max_size)
+        if streaming:
+            sink.start(media_type, passthrough_encoding)
+        # تکه‌های نگه‌داشته‌شده تا مشخص شدن اندازه بدنه (None = بدنه بزرگ‌تر از max_size و منتقل نمی‌شود)
+        held: Optional[List[bytes]] = []
+
+        def forward(chunk: bytes) -> None:
+            nonlocal held
+            if streaming:
+                sink.write(chunk)
+            elif held is not None:
+                held.append(chunk)
+                if body.exceeded:
+                    held = None
+
+        if passthrough_encoding is not None:
+            # بدنه فشرده بالادستی بدون بازگشایی و فشرده‌سازی دوباره به کلاینت می‌رسد
+            decoder = StreamDecompressor(encoding)
+            raw: Optional[List[bytes]] = []
+            raw_size = 0
+            async for chunk in response.aiter_raw():
+                body.feed(decoder.decompress(chunk))
+                forward(chunk)
+                if raw is not None:
+                    raw.append(chunk)
+                    raw_size += len(chunk)
+                    if max_size and raw_size > max_size:
+                        raw = None
+            body.feed(decoder.flush())
+            if raw is not None and not body.truncated:
+                # نسخه فشرده فقط اگر با بدنه ذخیره‌شده یکسان باشد نگه داشته می‌شود
+                sink.encoded = (encoding, b"".join(raw))
+        else:
+            async for chunk in response.aiter_bytes():
+                body.feed(chunk)
+                forward(chunk)
+        if not streaming and held is not None and not body.exceeded:
+            sink.start(media_type, passthrough_encoding)
+            for chunk in held:
+                sink.write(chunk)
+        return response, body.finish()
+    finally:
+        await response.aclose()
+
+def _remaining_budget(deadline: Optional[float], timeout: float) -> float:
+    """
+    مهلت تلاش بعدی: حداقل timeout و زمان باقی‌مانده تا deadline
+    اگر بودجه تمام شده باشد HTTPException 504 ایجاد می‌شود
+    """
+    if deadline is None:
+        return timeout
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        logger.warning("بودجه زمانی درخواست تمام شد")
+        raise HTTPException(status_code=504, detail="مهلت درخواست به پایان رسید.")
+    return min(timeout, remaining)
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    تبدیل سربرگ Retry-After (ثانیه یا تاریخ HTTP) به تعداد ثانیه انتظار
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at is None:
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+def compute_backoff(attempt: int, retry_after: Optional[str] = None) -> float:
+    """
+    زمان انتظار پیش از تلاش مجدد: مقدار Retry-After در صورت وجود،
+    وگرنه عقب‌نشینی نمایی با jitter کامل
+    """
+    delay = parse_retry_after(retry_after)
+    if delay is not None:
+        return delay
+    return random.uniform(0, min(RETRY_BACKOFF_MAX, RETRY_BACKOFF_BASE * 2 ** (attempt - 1)))
+
+async def _wait_before_retry(attempt: int, retry_after: Optional[str], deadline: Optional[float]) -> bool:
+    """
+    انتظار پیش از تلاش مجدد؛ اگر انتظار از سقف مجاز یا مهلت فراخواننده بیشتر شود False برمی‌گرداند
+    """
+    delay = compute_backoff(attempt, retry_after)
+    if delay > RETRY_BACKOFF_MAX:
+        logger.warning(f"Retry-After برابر {delay:.1f} ثانیه بیشتر از سقف مجاز است؛ تلاش مجدد انجام نمی‌شود")
+        return False
+    if deadline is not None and time.monotonic() + delay > deadline:
+        logger.warning("مهلت درخواست برای تلاش مجدد کافی نیست")
+        return False
+    logger.debug(f"انتظار {delay:.2f} ثانیه پیش از تلاش مجدد {attempt + 1}")
+    await asyncio.sleep(delay)
+    return True
+
+def parse_response_body(body: bytes) -> Dict[str, Any]:
+    """
+    تبدیل بدنه خام پاسخ به JSON؛ در صورت نامعتبر بودن، متن پاسخ برگردانده می‌شود
+    """
+    try:
+        return json.loads(body)
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        text = body.decode("utf-8", errors="replace")
+        logger.warning(f"پاسخ JSON نامعتبر: {text[:100]}...")
+        return {"status": "success", "content": text}
 
 def mask_sensitive_headers(headers: Dict[str, str]) -> Dict[str, str]:
     """
@@ -114,17 +600,7 @@ def filter_response(response: Dict[str, Any], max_items: int = 100) -> Dict[str,
     """
     محدود کردن تعداد آیتم‌ها در پاسخ برای جلوگیری از پاسخ‌های بسیار بزرگ
     """
-    # کپی پاسخ اصلی
-    filtered = response.copy()
-    
-    # بررسی و محدود کردن آرایه‌ها
-    for key, value in filtered.items():
-        if isinstance(value, list) and len(value) > max_items:
-            filtered[key] = value[:max_items]
-            filtered[f"{key}_total"] = len(value)
-            filtered[f"{key}_truncated"] = True
-    
-    return filtered
+    return Projection(limit=max_items).apply(response)
 
 def construct_error_response(status_code: int, message: str) -> Dict[str, Any]:
     """
@@ -0,0 +1,56 @@
+import logging
+from typing import Dict
+import httpx
+from app.config.settings import (
+    BASE_URLS,
+    HTTP_POOL_MAX_CONNECTIONS,
+    HTTP_POOL_MAX_KEEPALIVE,
+    HTTP_KEEPALIVE_EXPIRY,
+)
+
+# تنظیم لاگر
+logger = logging.getLogger(__name__)
+
+# نام ارائه‌دهنده برای آدرس‌هایی که در BASE_URLS تعریف نشده‌اند
+DEFAULT_PROVIDER = "DEFAULT"
+
+# ارائه‌دهنده -> کلاینت غیرهمزمان با استخر اتصال keep-alive اختصاصی
+_clients: Dict[str, httpx.AsyncClient] = {}
+
+def resolve_provider(url: str) -> str:
+    """
+    پیدا کردن نام ارائه‌دهنده (کلید BASE_URLS) بر اساس طولانی‌ترین پیشوند منطبق با آدرس
+    """
+    best_name = DEFAULT_PROVIDER
+    best_length = 0
+    for name, base_url in BASE_URLS.items():
+        if url.startswith(base_url) and len(base_url) > best_length:
+            best_name = name
+            best_length = len(base_url)
+    return best_name
+
+def get_client(provider: str) -> httpx.AsyncClient:
+    """
+    کلاینت HTTP غیرهمزمان مربوط به ارائه‌دهنده را برمی‌گرداند و در صورت نیاز آن را می‌سازد
+    هر ارائه‌دهنده استخر اتصال جداگانه دارد تا کندی یک سرویس اتصال‌های بقیه را اشغال نکند
+    """
+    client = _clients.get(provider)
+    if client is None or client.is_closed:
+        limits = httpx.Limits(
+            max_connections=HTTP_POOL_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_POOL_MAX_KEEPALIVE,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+        )
+        client = httpx.AsyncClient(limits=limits, follow_redirects=True)
+        _clients[provider] = client
+        logger.debug(f"ایجاد استخر اتصال برای {provider}")
+    return client
+
+async def close_clients() -> None:
+    """
+    بستن همه استخرهای اتصال (هنگام خاموش شدن برنامه)
+    """
+    for provider, client in list(_clients.items()):
+        await client.aclose()
+        logger.debug(f"استخر اتصال {provider} بسته شد")
+    _clients.clear()
@@ -0,0 +1,265 @@
+import re
+import logging
+from typing import List, Optional
+from fastapi import HTTPException
+from app.config.settings import MAX_RESPONSE_SIZE, MAX_ITEMS_PER_PAGE
+
+# تنظیم لاگر
+logger = logging.getLogger(__name__)
+
+# کاراکترهای ساختاری JSON (بقیه بایت‌ها یکجا کپی یا رد می‌شوند)
+_STRUCTURAL = re.compile(rb'["\[\]{},:]')
+_STRING_END = re.compile(rb'["\\]')
+# پیمایش سریع اعضای ردشده: رشته‌ها و شیء/لیست‌های بدون تودرتویی کامل یکجا رد می‌شوند
+# و فقط عمق و جداکننده‌ها شمرده می‌شوند
+_STRING = rb'"[^"\\]*(?:\\.[^"\\]*)*"'
+_FLAT = rb'[^{}\[\]"]*(?:' + _STRING + rb'[^{}\[\]"]*)*'
+_SKIP = re.compile(rb'\{' + _FLAT + rb'\}|\[' + _FLAT + rb'\]|' + _STRING + rb'|["\[\]{},]')
+# حداکثر طول کلیدی که برای افزودن <key>_total نگه داشته می‌شود
+_MAX_KEY_SIZE = 256
+
+class _Frame:
+    """یک شیء یا لیست باز در حین پیمایش"""
+
+    __slots__ = ("kind", "key", "expect_key", "last_key", "items", "kept", "has_item", "dropping")
+
+    def __init__(self, kind: int, key: Optional[bytes] = None):
+        self.kind = kind
+        # کلید این لیست در شیء والد (برای افزودن <key>_total و <key>_truncated)
+        self.key = key
+        self.expect_key = kind == ord("{")
+        self.last_key: Optional[bytes] = None
+        self.items = 0
+        self.kept = 0
+        self.has_item = False
+        self.dropping = False
+
+class TruncatingJSONScanner:
+    """
+    پارسر جریانی JSON که بدنه را تکه‌تکه می‌خواند و خروجی معتبر JSON با حافظه محدود می‌سازد:
+    از هر لیست حداکثر max_items عضو نگه داشته و پس از رسیدن خروجی به max_size اعضای بعدی لیست‌ها رد می‌شوند.
+    لیست کوتاه‌شده داخل یک شیء با کلیدهای <key>_total و <key>_truncated (مانند filter_response) مشخص می‌شود
+    """
+
+    def __init__(self, max_size: int = MAX_RESPONSE_SIZE, max_items: int = MAX_ITEMS_PER_PAGE):
+        self.max_size = max_size
+        self.max_items = max_items
+        self.out = bytearray()
+        self.stack: List[_Frame] = []
+        # عمق لیستی که اعضای آن در حال رد شدن‌اند (None = کپی خروجی) و عمق تودرتویی داخل عضو ردشده
+        self.drop_depth: Optional[int] = None
+        self.skip_depth = 0
+        self.in_string = False
+        self.escape = False
+        self.key_buffer: Optional[bytearray] = None
+        self.started = False
+        self.truncated = False
+        self.size = 0
+        # بایت‌های فراداده کوتاه‌سازی (در سقف سخت اندازه شمرده نمی‌شوند)
+        self.metadata_size = 0
+
+    def _emit(self, data) -> None:
+        if self.drop_depth is None:
+            self.out += data
+            if len(self.out) - self.metadata_size > 2 * self.max_size:
+                # مقدار بزرگی که داخل لیست نیست (مثلاً یک رشته یا شیء بسیار بزرگ) قابل کوتاه کردن نیست
+                raise HTTPException(status_code=502, detail="پاسخ سرویس بالادستی بیش از حد مجاز بزرگ است")
+
+    def _start_item(self, frame: _Frame) -> None:
+        # تصمیم برای نگه داشتن یا رد کردن عضو بعدی لیست، پیش از رسیدن اولین بایت آن
+        if self.drop_depth is not None:
+            return
+        if frame.kept >= self.max_items or len(self.out) >= self.max_size:
+            frame.dropping = True
+            self.drop_depth = len(self.stack)
+
+    def feed(self, chunk: bytes) -> None:
+        self.size += len(chunk)
+        position, end = 0, len(chunk)
+        while position < end:
+            if self.in_string:
+                position = self._scan_string(chunk, position, end)
+                continue
+            if self.drop_depth is not None:
+                position = self._skip(chunk, position, end)
+                continue
+            match = _STRUCTURAL.search(chunk, position)
+            stop = match.start() if match else end
+            if stop > position:
+                segment = chunk[position:stop]
+                if not self.started and segment.strip():
+                    # پاسخ غیر JSON (متن، HTML) قابل کوتاه کردن ساختاری نیست
+                    raise HTTPException(status_code=502, detail="پاسخ سرویس بالادستی بیش از حد مجاز بزرگ است")
+                if self.stack and self.stack[-1].kind == ord("[") and not self.stack[-1].has_item and segment.strip():
+                    self.stack[-1].has_item = True
+                self._emit(segment)
+            if match is None:
+                return
+            self._structural(chunk[stop])
+            position = stop + 1
+
+    def _skip(self, chunk: bytes, position: int, end: int) -> int:
+        # اعضای ردشده در خروجی نوشته نمی‌شوند؛ فقط پایان لیست و تعداد اعضای آن لازم است
+        frame = self.stack[-1]
+        for match in _SKIP.finditer(chunk, position):
+            token = match.group()
+            if not frame.has_item and self.skip_depth == 0 and (token != b"]" or chunk[position:match.start()].strip()):
+                frame.has_item = True
+            if len(token) > 1:
+                # رشته یا شیء/لیست کامل
+                continue
+            if token == b'"':
+                # رشته ناتمام در انتهای تکه
+                self.in_string = True
+                return match.end()
+            if token in (b"[", b"{"):
+                self.skip_depth += 1
+            elif token in (b"]", b"}"):
+                if self.skip_depth:
+                    self.skip_depth -= 1
+                    continue
+                self.stack.pop()
+                self._close_list(frame)
+                return match.end()
+            elif self.skip_depth == 0:
+                frame.items += 1
+        return end
+
+    def _scan_string(self, chunk: bytes, position: int, end: int) -> int:
+        start = position
+        while position < end:
+            if self.escape:
+                self.escape = False
+                position += 1
+                continue
+            match = _STRING_END.search(chunk, position)
+            if match is None:
+                position = end
+                break
+            position = match.end()
+            if chunk[match.start()] == ord("\\"):
+                self.escape = True
+                continue
+            self.in_string = False
+            break
+        segment = chunk[start:position]
+        if self.key_buffer is not None:
+            if len(self.key_buffer) <= _MAX_KEY_SIZE:
+                self.key_buffer += segment
+            if not self.in_string:
+                # کلید بدون گیومه پایانی
+                self.stack[-1].last_key = bytes(self.key_buffer[:-1]) if len(self.key_buffer) <= _MAX_KEY_SIZE else None
+                self.key_buffer = None
+        self._emit(segment)
+        return position
+
+    def _structural(self, char: int) -> None:
+        frame = self.stack[-1] if self.stack else None
+        if char == ord('"'):
+            self.in_string = True
+            self.started = True
+            if frame is not None and frame.kind == ord("{") and frame.expect_key:
+                self.key_buffer = bytearray()
+            elif frame is not None and frame.kind == ord("["):
+                frame.has_item = True
+            self._emit(b'"')
+        elif char in (ord("{"), ord("[")):
+            self.started = True
+            if frame is not None and frame.kind == ord("["):
+                frame.has_item = True
+            key = frame.last_key if frame is not None and frame.kind == ord("{") else None
+            self._emit(bytes((char,)))
+            self.stack.append(_Frame(char, key))
+            if char == ord("["):
+                self._start_item(self.stack[-1])
+        elif char in (ord("}"), ord("]")):
+            if frame is None:
+                return
+            self.stack.pop()
+            if char == ord("]"):
+                self._close_list(frame)
+            else:
+                self._emit(b"}")
+        elif char == ord(":"):
+            if frame is not None and frame.kind == ord("{"):
+                frame.expect_key = False
+            self._emit(b":")
+        elif char == ord(","):
+            if frame is None:
+                return
+            if frame.kind == ord("{"):
+                frame.expect_key = True
+                self._emit(b",")
+                return
+            frame.items += 1
+            if not frame.dropping:
+                frame.kept += 1
+            if self.drop_depth is not None:
+                return
+            self._start_item(frame)
+            if not frame.dropping:
+                self._emit(b",")
+
+    def _close_list(self, frame: _Frame) -> None:
+        total = frame.items + (1 if frame.has_item else 0)
+        if frame.dropping:
+            # فقط لیستی که رد کردن اعضا از آن شروع شده dropping دارد
+            self.drop_depth = None
+        elif self.drop_depth is not None:
+            # لیستی داخل یک عضو ردشده
+            return
+        elif frame.has_item:
+            frame.kept += 1
+        self._emit(b"]")
+        if total > frame.kept:
+            self.truncated = True
+            if frame.key is not None:
+                metadata = b',"' + frame.key + b'_total":' + str(total).encode("ascii") + b',"' + frame.key + b'_truncated":true'
+                self.metadata_size += len(metadata)
+                self._emit(metadata)
+
+    def finish(self) -> bytes:
+        if self.truncated:
+            logger.warning(f"پاسخ بزرگ سرویس بالادستی ({self.size} بایت) به {len(self.out)} بایت کوتاه شد")
+        return bytes(self.out)
+
+class LimitedBody:
+    """
+    جمع‌آوری بدنه پاسخ بالادستی با سقف حافظه: تا max_size بایت بدون پردازش نگه داشته می‌شود
+    و پس از آن بقیه بدنه از TruncatingJSONScanner عبور می‌کند (max_size خالی = نامحدود)
+    """
+
+    def __init__(self, max_size: Optional[int] = MAX_RESPONSE_SIZE, max_items: int = MAX_ITEMS_PER_PAGE):
+        self.max_size = max_size
+        self.max_items = max_items
+        self.chunks: List[bytes] = []
+        self.size = 0
+        self.scanner: Optional[TruncatingJSONScanner] = None
+
+    @property
+    def truncated(self) -> bool:
+        return self.scanner is not None and self.scanner.truncated
+
+    @property
+    def exceeded(self) -> bool:
+        """بدنه از max_size بزرگ‌تر شده و از پارسر جریانی عبور می‌کند"""
+        return self.scanner is not None
+
+    def feed(self, chunk: bytes) -> None:
+        if not chunk:
+            return
+        if self.scanner is not None:
+            self.scanner.feed(chunk)
+            return
+        self.chunks.append(chunk)
+        self.size += len(chunk)
+        if self.max_size and self.size > self.max_size:
+            self.scanner = TruncatingJSONScanner(self.max_size, self.max_items)
+            chunks, self.chunks = self.chunks, []
+            for buffered in chunks:
+                self.scanner.feed(buffered)
+
+    def finish(self) -> bytes:
+        if self.scanner is not None:
+            return self.scanner.finish()
+        return b"".join(self.chunks)
@@ -0,0 +1,150 @@
+import logging
+from typing import Dict, Any, Optional, List
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from app.config.settings import PROJECTION_MAX_PATHS, PROJECTION_MAX_DEPTH
+from app.utils.request_context import get_projection
+
+# تنظیم لاگر
+logger = logging.getLogger(__name__)
+
+class _Node:
+    """یک گره درخت شکل‌دهی: فیلدهای انتخاب‌شده زیر این کلید و سقف طول لیست آن"""
+
+    __slots__ = ("children", "select", "included", "limit")
+
+    def __init__(self):
+        self.children: Dict[str, "_Node"] = {}
+        # فقط فرزندان انتخاب‌شده نگه داشته شوند (وگرنه همه کلیدها و فقط فرزندان برای اعمال limit پیمایش می‌شوند)
+        self.select = False
+        # این کلید در fields آمده (مستقیم یا به عنوان پیشوند یک مسیر)
+        self.included = False
+        self.limit: Optional[int] = None
+
+    def child(self, key: str) -> "_Node":
+        return self.children.setdefault(key, _Node())
+
+class Projection:
+    """
+    شکل‌دهی پاسخ JSON پیش از سریال‌سازی:
+    fields مسیرهای نقطه‌دار فیلدهای مورد نیاز (مثلاً market_data.current_price.usd) و
+    limits سقف طول لیست‌ها بر اساس مسیر (مثلاً tickers:10)؛ limit بدون مسیر روی لیست‌های سطح اول اعمال می‌شود
+    لیست‌ها شفاف‌اند: مسیر روی تک‌تک اعضای لیست اعمال می‌شود. لیست‌های کوتاه‌شده با کلیدهای
+    <key>_total و <key>_truncated در همان شیء مشخص می‌شوند
+    """
+
+    def __init__(
+        self,
+        fields: Optional[List[str]] = None,
+        limits: Optional[Dict[str, int]] = None,
+        limit: Optional[int] = None,
+    ):
+        self.fields = sorted(set(fields or []))
+        self.limits = dict(sorted((limits or {}).items()))
+        self.limit = limit
+        self.root = _Node()
+        for path in self.fields:
+            node = self.root
+            for segment in path.split("."):
+                if node.included and not node.select:
+                    # مسیر کوتاه‌تر (کل مقدار) قبلاً انتخاب شده است
+                    break
+                node.select = True
+                node = node.child(segment)
+                if not node.included:
+                    node.included = node.select = True
+            else:
+                # کل مقدار این مسیر (حتی اگر مسیرهای طولانی‌تری زیر آن آمده باشند)
+                node.select = False
+        for path, count in self.limits.items():
+            node = self.root
+            for segment in path.split("."):
+                node = node.child(segment)
+            node.limit = count
+
+    @property
+    def key(self) -> str:
+        """نمایش یکتای شکل‌دهی برای ساخت کلید کش پاسخ شکل‌داده‌شده"""
+        key = "fields=" + ",".join(self.fields) + "&limits=" + ",".join(f"{path}:{count}" for path, count in self.limits.items())
+        if self.limit is not None:
+            key += f",{self.limit}"
+        return key
+
+    def apply(self, value: Any) -> Any:
+        """نسخه شکل‌داده‌شده پاسخ (ورودی تغییر نمی‌کند)"""
+        if isinstance(value, list) and self.limit is not None:
+            value = value[:self.limit]
+        return _shape(value, self.root, self.limit)
+
+def _shape(value: Any, node: _Node, default_limit: Optional[int] = None) -> Any:
+    if isinstance(value, list):
+        return [_shape(item, node) for item in value]
+    if not isinstance(value, dict):
+        return value
+    if node.select:
+        shaped = {key: value[key] for key, child in node.children.items() if child.included and key in value}
+    elif node.children or default_limit is not None:
+        shaped = dict(value)
+    else:
+        return value
+
+    for key in list(shaped):
+        child = node.children.get(key)
+        limit = child.limit if child is not None and child.limit is not None else default_limit
+        item = shaped[key]
+        if limit is not None and isinstance(item, list) and len(item) > limit:
+            item = item[:limit]
+            # اگر لیست پیش‌تر (مثلاً با سقف پیش‌فرض مسیر) کوتاه شده باشد، تعداد اصلی حفظ می‌شود
+            shaped[f"{key}_total"] = value.get(f"{key}_total", len(shaped[key]))
+            shaped[f"{key}_truncated"] = True
+        shaped[key] = _shape(item, child) if child is not None else item
+    return shaped
+
+def _parse_path(path: str) -> str:
+    segments = path.split(".")
+    if not all(segments) or len(segments) > PROJECTION_MAX_DEPTH:
+        raise HTTPException(status_code=400, detail=f"مسیر نامعتبر در شکل‌دهی پاسخ: {path}")
+    return path
+
+def _parse_count(value: str) -> int:
+    try:
+        count = int(value)
+    except ValueError:
+        count = -1
+    if count < 0:
+        raise HTTPException(status_code=400, detail=f"تعداد نامعتبر در limits: {value}")
+    return count
+
+def parse_projection(fields: Optional[str], limits: Optional[str]) -> Optional[Projection]:
+    """
+    تبدیل پارامترهای کوئری fields (مثلاً id,symbol,market_data.current_price.usd) و
+    limits (مثلاً tickers:10,data.pools:5 یا فقط 20) به شکل‌دهی پاسخ؛ بدون هر دو None برگردانده می‌شود
+    """
+    field_paths = [part.strip() for part in (fields or "").split(",") if part.strip()]
+    limit_parts = [part.strip() for part in (limits or "").split(",") if part.strip()]
+    if not field_paths and not limit_parts:
+        return None
+    if len(field_paths) + len(limit_parts) > PROJECTION_MAX_PATHS:
+        raise HTTPException(status_code=400, detail=f"حداکثر {PROJECTION_MAX_PATHS} مسیر برای شکل‌دهی پاسخ مجاز است")
+
+    limit = None
+    path_limits: Dict[str, int] = {}
+    for part in limit_parts:
+        path, separator, count = part.rpartition(":")
+        if not separator:
+            limit = _parse_count(count)
+        else:
+            path_limits[_parse_path(path.strip())] = _parse_count(count.strip())
+    return Projection([_parse_path(path) for path in field_paths], path_limits, limit)
+
+class ShapedJSONResponse(JSONResponse):
+    """
+    پاسخ JSON پیش‌فرض مسیرها: شکل‌دهی درخواست جاری (fields / limits) پیش از سریال‌سازی اعمال می‌شود
+    (پاسخ‌های passthrough در make_request شکل داده و در همان شکل کش می‌شوند)
+    """
+
+    def render(self, content: Any) -> bytes:
+        projection = get_projection()
+        if projection is not None and self.status_code < 300:
+            content = projection.apply(content)
+        return super().render(content)
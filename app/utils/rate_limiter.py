@@ -1,49 +1,144 @@
+import math
 import time
-from typing import Dict, DefaultDict
-from collections import defaultdict, deque
-from fastapi import HTTPException
+import logging
+import threading
+import ipaddress
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple, List, Union
+from fastapi import HTTPException, Request
+from app.config.settings import RATE_LIMIT_PER_CLIENT, RATE_LIMIT_MAX_KEYS, TRUSTED_PROXIES
+
+# تنظیم لاگر
+logger = logging.getLogger(__name__)
+
+def _parse_networks(raw: str) -> List[Union[ipaddress.IPv4Network, ipaddress.IPv6Network]]:
+    networks = []
+    for part in raw.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        try:
+            networks.append(ipaddress.ip_network(part, strict=False))
+        except ValueError:
+            logger.error(f"آدرس نامعتبر در TRUSTED_PROXIES: {part}")
+    return networks
+
+_trusted_proxies = _parse_networks(TRUSTED_PROXIES)
+
+def _is_trusted_proxy(host: str) -> bool:
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return any(address in network for network in _trusted_proxies)
+
+def get_client_ip(request: Request) -> str:
+    """
+    آدرس IP کلاینت (شناسه محدودیت نرخ)
+    X-Forwarded-For فقط وقتی اتصال از یک پروکسی مورد اعتماد باشد خوانده می‌شود و از راست به چپ
+    اولین آدرسی که خود پروکسی مورد اعتماد نیست برگردانده می‌شود (آدرس‌های سمت چپ را کلاینت می‌تواند جعل کند)
+    """
+    peer = request.client.host if request.client else "unknown"
+    if not _is_trusted_proxy(peer):
+        return peer
+    forwarded_for = request.headers.get("x-forwarded-for")
+    if not forwarded_for:
+        return peer
+    hops = [hop.strip() for hop in forwarded_for.split(",") if hop.strip()]
+    for hop in reversed(hops):
+        if not _is_trusted_proxy(hop):
+            return hop
+    return hops[0] if hops else peer
+
+class RateLimitStatus:
+    """
+    وضعیت محدودیت نرخ پس از یک بررسی موفق (برای سربرگ‌های X-RateLimit-*)
+    """
+
+    __slots__ = ("limit", "remaining", "reset")
+
+    def __init__(self, limit: int, remaining: int, reset: float):
+        self.limit = limit
+        self.remaining = remaining
+        # ثانیه تا پر شدن کامل سهمیه
+        self.reset = reset
+
+    def headers(self) -> Dict[str, str]:
+        return {
+            "X-RateLimit-Limit": str(self.limit),
+            "X-RateLimit-Remaining": str(self.remaining),
+            "X-RateLimit-Reset": str(math.ceil(self.reset)),
+        }
 
 class RateLimiter:
     """
-    محدودکننده نرخ درخواست برای API‌ها
+    محدودکننده نرخ درخواست برای API‌ها با الگوریتم GCRA (معادل سطل توکن)
+    برای هر کلید فقط یک عدد (زمان ورود نظری بعدی) نگه داشته می‌شود
     """
-    
-    def __init__(self):
-        # مسیر -> زمان درخواست‌ها
-        self.request_times: DefaultDict[str, deque] = defaultdict(lambda: deque(maxlen=1000))
-        # مسیر -> حد مجاز در دقیقه
+
+    def __init__(self, per_client: bool = RATE_LIMIT_PER_CLIENT, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        # پیشوند مسیر -> حد مجاز در دقیقه
         self.limits: Dict[str, int] = {}
-    
+        # (پیشوند مسیر، شناسه کلاینت) -> زمان ورود نظری (TAT)
+        self.arrivals: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+        self.per_client = per_client
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+
     def set_limit(self, path: str, limit_per_minute: int) -> None:
         """
-        تنظیم محدودیت نرخ برای مسیر مشخص شده
+        تنظیم محدودیت نرخ برای مسیر مشخص شده (و همه زیرمسیرهای آن)
+        """
+        self.limits[path.rstrip("/") or "/"] = limit_per_minute
+
+    def match_limit(self, path: str) -> Optional[str]:
+        """
+        پیدا کردن طولانی‌ترین پیشوند ثبت‌شده منطبق با مسیر (در مرز بخش‌های مسیر)
         """
-        self.limits[path] = limit_per_minute
-    
-    def check_rate_limit(self, path: str) -> None:
+        best = None
+        for prefix in self.limits:
+            if path == prefix or path.startswith(prefix + "/") or prefix == "/":
+                if best is None or len(prefix) > len(best):
+                    best = prefix
+        return best
+
+    def check_rate_limit(self, path: str, client_id: Optional[str] = None) -> Optional[RateLimitStatus]:
         """
         بررسی محدودیت نرخ برای مسیر معین
-        اگر محدودیت نرخ تجاوز شود، استثنا ایجاد می‌شود
+        اگر محدودیت نرخ تجاوز شود، استثنا با سربرگ Retry-After ایجاد می‌شود
         """
-        if path not in self.limits:
-            return  # اگر محدودیتی تنظیم نشده باشد، محدودیتی اعمال نمی‌شود
-        
-        current_time = time.time()
-        one_minute_ago = current_time - 60
-        
-        # حذف درخواست‌های قدیمی‌تر از یک دقیقه
-        while self.request_times[path] and self.request_times[path][0] < one_minute_ago:
-            self.request_times[path].popleft()
-        
-        # بررسی تعداد درخواست‌ها در دقیقه اخیر
-        if len(self.request_times[path]) >= self.limits[path]:
-            raise HTTPException(
-                status_code=429,
-                detail=f"حد مجاز درخواست تجاوز شده. محدودیت: {self.limits[path]} درخواست در دقیقه."
-            )
-        
-        # اضافه کردن زمان درخواست جدید
-        self.request_times[path].append(current_time)
+        prefix = self.match_limit(path)
+        if prefix is None:
+            return None  # اگر محدودیتی تنظیم نشده باشد، محدودیتی اعمال نمی‌شود
+
+        limit = self.limits[prefix]
+        key = (prefix, client_id if self.per_client and client_id else "*")
+        # فاصله یکنواخت بین درخواست‌ها و حداکثر انباشت مجاز (ظرفیت کامل یک دقیقه)
+        interval = 60.0 / limit
+        capacity = limit * interval
+
+        with self._lock:
+            now = time.time()
+            arrival = max(self.arrivals.get(key, now), now)
+            new_arrival = arrival + interval
+
+            if new_arrival - now > capacity + 1e-9:
+                retry_after = new_arrival - now - capacity
+                status = RateLimitStatus(limit, 0, arrival - now)
+                raise HTTPException(
+                    status_code=429,
+                    detail=f"حد مجاز درخواست تجاوز شده. محدودیت: {limit} درخواست در دقیقه.",
+                    headers={"Retry-After": str(math.ceil(retry_after)), **status.headers()},
+                )
+
+            self.arrivals[key] = new_arrival
+            self.arrivals.move_to_end(key)
+            # حذف کلیدهای قدیمی؛ حذف یک کلید معادل پر بودن سهمیه آن است
+            while len(self.arrivals) > self.max_keys:
+                self.arrivals.popitem(last=False)
+
+        remaining = int((capacity - (new_arrival - now)) / interval + 1e-6)
+        return RateLimitStatus(limit, remaining, new_arrival - now)
 
 # نمونه سینگلتون از محدودکننده نرخ
 rate_limiter = RateLimiter()
@@ -0,0 +1,133 @@
+import time
+from contextvars import ContextVar
+from typing import List, Optional, Tuple
+from app.config.settings import REQUEST_DEADLINES, REQUEST_DEADLINE_MAX
+
+class RequestState:
+    """
+    وضعیت یک درخواست ورودی که در طول اجرای سرویس‌ها پر می‌شود
+    (مثلاً وضعیت کش تمام درخواست‌های بالادستی برای ساخت سربرگ‌های پاسخ)
+    """
+
+    def __init__(self, deadline: Optional[float] = None, warming: bool = False):
+        # وضعیت کش هر درخواست بالادستی: HIT، STALE، MISS یا PARTIAL (فقط بخشی از یک پاسخ ترکیبی از کش)
+        self.cache_statuses: List[str] = []
+        # پایان مهلت کل درخواست (زمان مطلق time.monotonic)
+        self.deadline = deadline
+        # اجرای گرم‌کننده کش: کش خوانده نمی‌شود و کلیدهای کش‌شونده (کلید، TTL، ارائه‌دهنده) ثبت می‌شوند
+        self.warming = warming
+        self.warmed_keys: List[Tuple[str, float, str]] = []
+        # سربرگ Accept-Encoding کلاینت (برای ارسال نسخه فشرده ذخیره‌شده پاسخ‌ها)
+        self.accept_encoding: Optional[str] = None
+        # سربرگ If-None-Match درخواست‌های GET کلاینت (برای پاسخ 304 بدون ساخت بدنه)
+        self.if_none_match: Optional[str] = None
+        # شکل‌دهی درخواست‌شده برای پاسخ (پارامترهای fields و limits) یا None
+        self.projection = None
+
+    def remaining(self) -> Optional[float]:
+        """
+        زمان باقی‌مانده از مهلت درخواست (ثانیه) یا None اگر مهلتی تعیین نشده باشد
+        """
+        if self.deadline is None:
+            return None
+        return self.deadline - time.monotonic()
+
+    def cache_header(self) -> Optional[str]:
+        """
+        خلاصه وضعیت کش برای سربرگ X-Cache
+        اگر حتی یکی از درخواست‌ها از کش پاسخ داده نشده باشد MISS، اگر یکی فقط بخشی از پاسخ را از کش داشته باشد PARTIAL
+        و اگر یکی کهنه باشد STALE برگردانده می‌شود
+        """
+        if not self.cache_statuses:
+            return None
+        if "MISS" in self.cache_statuses:
+            return "MISS"
+        if "PARTIAL" in self.cache_statuses:
+            return "PARTIAL"
+        if "STALE" in self.cache_statuses:
+            return "STALE"
+        return "HIT"
+
+# وضعیت درخواست جاری؛ میان‌افزار آن را در ابتدای هر درخواست مقداردهی می‌کند
+_request_state: ContextVar[Optional[RequestState]] = ContextVar("request_state", default=None)
+
+def start_request_state(timeout: Optional[float] = None, warming: bool = False) -> RequestState:
+    """
+    ایجاد وضعیت جدید برای درخواست جاری با مهلت timeout ثانیه (اختیاری)
+    """
+    state = RequestState(time.monotonic() + timeout if timeout is not None else None, warming)
+    _request_state.set(state)
+    return state
+
+def get_request_state() -> Optional[RequestState]:
+    """
+    وضعیت درخواست جاری (خارج از یک درخواست HTTP مقدار None است)
+    """
+    return _request_state.get()
+
+def record_cache_status(status: str) -> None:
+    """
+    ثبت وضعیت کش یک درخواست بالادستی برای درخواست جاری
+    """
+    state = _request_state.get()
+    if state is not None:
+        state.cache_statuses.append(status)
+
+def is_warming() -> bool:
+    """
+    آیا درخواست جاری توسط گرم‌کننده کش اجرا می‌شود
+    """
+    state = _request_state.get()
+    return state is not None and state.warming
+
+def record_warmed_key(key: str, ttl: float, provider: str) -> None:
+    """
+    ثبت کلید کش نوشته‌شده در اجرای گرم‌کننده کش
+    """
+    state = _request_state.get()
+    if state is not None and state.warming:
+        state.warmed_keys.append((key, ttl, provider))
+
+def get_accept_encoding() -> Optional[str]:
+    """
+    سربرگ Accept-Encoding درخواست جاری یا None
+    """
+    state = _request_state.get()
+    return state.accept_encoding if state is not None else None
+
+def get_if_none_match() -> Optional[str]:
+    """
+    سربرگ If-None-Match درخواست جاری یا None
+    """
+    state = _request_state.get()
+    return state.if_none_match if state is not None else None
+
+def get_projection():
+    """
+    شکل‌دهی پاسخ درخواست جاری (Projection) یا None
+    """
+    state = _request_state.get()
+    return state.projection if state is not None else None
+
+def get_request_deadline() -> Optional[float]:
+    """
+    پایان مهلت درخواست جاری (زمان مطلق time.monotonic) یا None
+    """
+    state = _request_state.get()
+    return state.deadline if state is not None else None
+
+def resolve_request_timeout(path: str, header_value: Optional[str] = None) -> float:
+    """
+    مهلت کل درخواست: مقدار سربرگ کلاینت (محدود به REQUEST_DEADLINE_MAX)
+    یا مقدار پیش‌فرض طولانی‌ترین پیشوند منطبق در REQUEST_DEADLINES
+    """
+    if header_value:
+        try:
+            return min(max(0.1, float(header_value)), REQUEST_DEADLINE_MAX)
+        except ValueError:
+            pass
+    best = ""
+    for prefix in REQUEST_DEADLINES:
+        if (path == prefix or path.startswith(prefix + "/") or prefix == "") and len(prefix) >= len(best):
+            best = prefix
+    return REQUEST_DEADLINES[best]
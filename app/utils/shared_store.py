@@ -0,0 +1,101 @@
+import logging
+from typing import Any, Dict, Optional
+from app.config.settings import REDIS_URL, SHARED_STORE_PREFIX
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # وابستگی اختیاری؛ بدون آن فقط کش درون‌پردازه‌ای فعال است
+    aioredis = None
+
+# تنظیم لاگر
+logger = logging.getLogger(__name__)
+
+class SharedStore:
+    """
+    ذخیره‌ساز مشترک بین پردازه‌ها (worker ها) روی پروتکل Redis
+    برای پاسخ‌های کش‌شده و شمارنده‌ها؛ خطاهای ذخیره‌ساز هیچ‌گاه درخواست را از کار نمی‌اندازند
+    """
+
+    def __init__(self, client: Any, prefix: str = SHARED_STORE_PREFIX):
+        # هر کلاینت سازگار با redis.asyncio (مثلاً fakeredis برای اجرای محلی) قابل استفاده است
+        self.client = client
+        self.prefix = prefix
+        self.errors = 0
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}{key}"
+
+    def _on_error(self, operation: str, error: Exception) -> None:
+        self.errors += 1
+        logger.warning(f"خطای ذخیره‌ساز مشترک در {operation}: {error}")
+
+    async def get(self, key: str) -> Optional[bytes]:
+        try:
+            return await self.client.get(self._key(key))
+        except Exception as e:
+            self._on_error("get", e)
+            return None
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        try:
+            await self.client.set(self._key(key), value, px=max(1, int(ttl * 1000)))
+        except Exception as e:
+            self._on_error("set", e)
+
+    async def delete(self, key: str) -> None:
+        try:
+            await self.client.delete(self._key(key))
+        except Exception as e:
+            self._on_error("delete", e)
+
+    async def incr(self, key: str, amount: int = 1, ttl: Optional[float] = None) -> Optional[int]:
+        """
+        افزایش اتمیک شمارنده مشترک؛ در صورت تعیین ttl، انقضا فقط هنگام ایجاد شمارنده تنظیم می‌شود
+        در صورت خطا None برگردانده می‌شود تا فراخواننده به حالت محلی برگردد
+        """
+        full_key = self._key(key)
+        try:
+            value = await self.client.incrby(full_key, amount)
+            if ttl is not None and value == amount:
+                await self.client.pexpire(full_key, max(1, int(ttl * 1000)))
+            return int(value)
+        except Exception as e:
+            self._on_error("incr", e)
+            return None
+
+    async def close(self) -> None:
+        try:
+            await self.client.aclose()
+        except Exception as e:
+            self._on_error("close", e)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": type(self.client).__name__, "errors": self.errors}
+
+_shared_store: Optional[SharedStore] = None
+
+def get_shared_store() -> Optional[SharedStore]:
+    """
+    ذخیره‌ساز مشترک پیکربندی‌شده یا None اگر REDIS_URL تنظیم نشده باشد
+    """
+    global _shared_store
+    if _shared_store is None and REDIS_URL:
+        if aioredis is None:
+            logger.error("REDIS_URL تنظیم شده اما بسته redis نصب نیست؛ فقط کش درون‌پردازه‌ای استفاده می‌شود")
+            return None
+        _shared_store = SharedStore(aioredis.from_url(REDIS_URL))
+        logger.info("ذخیره‌ساز مشترک Redis فعال شد")
+    return _shared_store
+
+def set_shared_store(store: Optional[SharedStore]) -> None:
+    """
+    جایگزینی ذخیره‌ساز مشترک (مثلاً با نمونه‌ای روی fakeredis برای اجرای محلی)
+    """
+    global _shared_store
+    _shared_store = store
+
+async def close_shared_store() -> None:
+    global _shared_store
+    if _shared_store is not None:
+        await _shared_store.close()
+        _shared_store = None
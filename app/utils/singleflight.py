@@ -0,0 +1,51 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict
+
+# تنظیم لاگر
+logger = logging.getLogger(__name__)
+
+class SingleFlight:
+    """
+    ادغام درخواست‌های هم‌زمان یکسان: فقط یک فراخوانی واقعی اجرا می‌شود
+    و نتیجه یا خطای آن به همه منتظرها برگردانده می‌شود
+    """
+
+    def __init__(self):
+        # کلید -> تسک در حال اجرا
+        self.calls: Dict[str, asyncio.Task] = {}
+        self.executed = 0
+        self.shared = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        اجرای fn برای کلید داده شده یا پیوستن به اجرای در جریان همان کلید
+        """
+        task = self.calls.get(key)
+        if task is None:
+            # اجرا در تسک جداگانه تا لغو شدن اولین فراخواننده بقیه منتظرها را لغو نکند
+            task = asyncio.ensure_future(fn())
+            self.calls[key] = task
+            self.executed += 1
+            task.add_done_callback(lambda t: self._finish(key, t))
+        else:
+            self.shared += 1
+            logger.debug(f"پیوستن به درخواست در جریان: {key[:12]}")
+        return await asyncio.shield(task)
+
+    def _finish(self, key: str, task: asyncio.Task) -> None:
+        if self.calls.get(key) is task:
+            del self.calls[key]
+        # خواندن خطا تا اگر همه منتظرها لغو شده باشند هشدار خطای بازیابی‌نشده ثبت نشود
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "in_flight": len(self.calls),
+            "executed": self.executed,
+            "shared": self.shared,
+        }
+
+# نمونه سینگلتون برای درخواست‌های بالادستی
+upstream_flights = SingleFlight()
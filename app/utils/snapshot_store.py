@@ -0,0 +1,137 @@
+import os
+import json
+import time
+import asyncio
+import sqlite3
+import logging
+import threading
+from typing import Dict, Any, Optional, List, Tuple
+from app.config.settings import SNAPSHOT_STORE_PATH, SNAPSHOT_STORE_LOCK_STRIPES
+
+# تنظیم لاگر
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS points (
+    series TEXT NOT NULL,
+    time_frame TEXT NOT NULL,
+    ts INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (series, time_frame, ts)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS coverage (
+    series TEXT NOT NULL,
+    time_frame TEXT NOT NULL,
+    covered_from INTEGER NOT NULL,
+    covered_to INTEGER NOT NULL,
+    refreshed_at REAL NOT NULL,
+    PRIMARY KEY (series, time_frame)
+);
+"""
+
+class Coverage:
+    """بازه پیوسته‌ای (ثانیه) که نقاط یک سری در آن کامل دریافت و ذخیره شده‌اند"""
+
+    __slots__ = ("covered_from", "covered_to", "refreshed_at", "last_point")
+
+    def __init__(self, covered_from: int, covered_to: int, refreshed_at: float, last_point: Optional[int]):
+        self.covered_from = covered_from
+        self.covered_to = covered_to
+        self.refreshed_at = refreshed_at
+        self.last_point = last_point
+
+class SnapshotStore:
+    """
+    ذخیره‌ساز SQLite برای نقاط تاریخی (سری، بازه زمانی، زمان) همراه با بازه پوشش هر سری
+    تا فقط بخش‌های جاافتاده از سرویس دریافت شود. فایل در حالت WAL بین workerها مشترک است
+    """
+
+    def __init__(self, path: str = SNAPSHOT_STORE_PATH, lock_stripes: int = SNAPSHOT_STORE_LOCK_STRIPES):
+        self.path = path
+        self.conn: Optional[sqlite3.Connection] = None
+        # اتصال بین threadهای asyncio.to_thread مشترک است و عملیات پشت سر هم اجرا می‌شوند
+        self.db_lock = threading.Lock()
+        # قفل‌های به‌روزرسانی با تعداد ثابت (در هر worker فقط یک دریافت هم‌زمان برای هر سری)؛
+        # هر سری به یکی از قفل‌ها نگاشت می‌شود تا حافظه با تعداد آدرس‌های درخواست‌شده رشد نکند
+        self.locks: List[asyncio.Lock] = [asyncio.Lock() for _ in range(max(1, lock_stripes))]
+        self.fetches = 0
+
+    def lock(self, series: str, time_frame: str) -> asyncio.Lock:
+        return self.locks[hash((series, time_frame)) % len(self.locks)]
+
+    def _connect(self) -> sqlite3.Connection:
+        if self.conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self.conn = conn
+        return self.conn
+
+    def _coverage(self, series: str, time_frame: str) -> Optional[Coverage]:
+        with self.db_lock:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT covered_from, covered_to, refreshed_at FROM coverage WHERE series = ? AND time_frame = ?",
+                (series, time_frame),
+            ).fetchone()
+            if row is None:
+                return None
+            last = conn.execute(
+                "SELECT MAX(ts) FROM points WHERE series = ? AND time_frame = ?",
+                (series, time_frame),
+            ).fetchone()[0]
+        return Coverage(row[0], row[1], row[2], last)
+
+    def _save(self, series: str, time_frame: str, points: List[Tuple[int, Dict[str, Any]]], covered_from: int, covered_to: int) -> None:
+        rows = [(series, time_frame, ts, json.dumps(point, ensure_ascii=False)) for ts, point in points]
+        with self.db_lock:
+            conn = self._connect()
+            with conn:
+                # نقطه بازه جاری در هر دریافت با مقدار تازه‌تر جایگزین می‌شود
+                conn.executemany("INSERT OR REPLACE INTO points (series, time_frame, ts, data) VALUES (?, ?, ?, ?)", rows)
+                # بازه پوشش فقط گسترش می‌یابد (worker دیگری ممکن است هم‌زمان بخش دیگری را افزوده باشد)
+                conn.execute(
+                    """
+                    INSERT INTO coverage (series, time_frame, covered_from, covered_to, refreshed_at) VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT (series, time_frame) DO UPDATE SET
+                        covered_from = MIN(covered_from, excluded.covered_from),
+                        covered_to = MAX(covered_to, excluded.covered_to),
+                        refreshed_at = MAX(refreshed_at, excluded.refreshed_at)
+                    """,
+                    (series, time_frame, covered_from, covered_to, time.time()),
+                )
+
+    def _range(self, series: str, time_frame: str, start: int, end: int) -> List[Dict[str, Any]]:
+        with self.db_lock:
+            rows = self._connect().execute(
+                "SELECT data FROM points WHERE series = ? AND time_frame = ? AND ts BETWEEN ? AND ? ORDER BY ts DESC",
+                (series, time_frame, start, end),
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    async def coverage(self, series: str, time_frame: str) -> Optional[Coverage]:
+        return await asyncio.to_thread(self._coverage, series, time_frame)
+
+    async def save(self, series: str, time_frame: str, points: List[Tuple[int, Dict[str, Any]]], covered_from: int, covered_to: int) -> None:
+        self.fetches += 1
+        await asyncio.to_thread(self._save, series, time_frame, points, covered_from, covered_to)
+
+    async def range(self, series: str, time_frame: str, start: int, end: int) -> List[Dict[str, Any]]:
+        """نقاط ذخیره‌شده در بازه [start, end] از جدیدترین به قدیمی‌ترین (ترتیب پاسخ Moralis)"""
+        return await asyncio.to_thread(self._range, series, time_frame, start, end)
+
+    def close(self) -> None:
+        with self.db_lock:
+            if self.conn is not None:
+                self.conn.close()
+                self.conn = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {"lock_stripes": len(self.locks), "busy_locks": sum(1 for lock in self.locks if lock.locked()), "fetches": self.fetches}
+
+# نمونه سینگلتون برای آمار تاریخی دارندگان توکن
+holders_store = SnapshotStore()
@@ -0,0 +1,237 @@
+import os
+import time
+import asyncio
+import hashlib
+import logging
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple, Callable, Awaitable
+import numpy as np
+from fastapi import HTTPException
+from app.config.settings import MARKET_CHART_STORE_DIR, MARKET_CHART_TIERS, MARKET_CHART_REFRESH_INTERVAL, MARKET_CHART_MAX_OPEN_SERIES
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - فقط سیستم‌های غیر یونیکسی
+    fcntl = None
+
+# تنظیم لاگر
+logger = logging.getLogger(__name__)
+
+# ستون‌های هر سطر: زمان (میلی‌ثانیه)، قیمت، ارزش بازار، حجم معاملات
+ROW_WIDTH = 4
+SERIES_KEYS = ("prices", "market_caps", "total_volumes")
+
+RangeFetcher = Callable[[int, int], Awaitable[Dict[str, Any]]]
+
+def select_tier(days: Optional[float]) -> str:
+    """
+    انتخاب دقت داده مطابق قواعد خودکار CoinGecko:
+    تا 1 روز 5 دقیقه‌ای، تا 90 روز ساعتی و بیشتر از آن روزانه
+    """
+    if days is not None and days <= 1:
+        return "5m"
+    if days is not None and days <= 90:
+        return "1h"
+    return "1d"
+
+def chart_to_rows(chart: Dict[str, Any]) -> np.ndarray:
+    """تبدیل پاسخ market_chart (سه لیست [زمان، مقدار]) به آرایه سطری مرتب بر اساس زمان"""
+    prices = chart.get("prices") or []
+    rows = np.full((len(prices), ROW_WIDTH), np.nan, dtype=np.float64)
+    if not prices:
+        return rows
+    rows[:, :2] = np.asarray(prices, dtype=np.float64)
+    for column, key in enumerate(SERIES_KEYS[1:], start=2):
+        values = {int(t): v for t, v in chart.get(key) or []}
+        rows[:, column] = [values.get(int(t), np.nan) for t in rows[:, 0]]
+    return rows[np.argsort(rows[:, 0], kind="stable")]
+
+def downsample(rows: np.ndarray, step_ms: int) -> np.ndarray:
+    """نگه داشتن اولین نقطه هر بازه step_ms (ادغام داده ریزتر در دقت لایه)"""
+    if len(rows) == 0:
+        return rows
+    _, first = np.unique(rows[:, 0] // step_ms, return_index=True)
+    return rows[first]
+
+def rows_to_chart(rows: np.ndarray) -> Dict[str, Any]:
+    timestamps = rows[:, 0].astype(np.int64).tolist()
+    chart = {}
+    for column, key in enumerate(SERIES_KEYS, start=1):
+        values = rows[:, column]
+        chart[key] = [[t, None if np.isnan(v) else float(v)] for t, v in zip(timestamps, values.tolist())]
+    return chart
+
+class Series:
+    """
+    سری زمانی یک کلید در یک لایه دقت: فایل فقط-افزودنی از سطرهای float64 که با memmap خوانده می‌شود
+    آخرین نقطه (بازه جاری که هنوز بسته نشده) فقط در حافظه نگه داشته می‌شود
+    """
+
+    def __init__(self, path: str, step: int, retention: Optional[int]):
+        self.path = path
+        self.step_ms = step * 1000
+        self.retention_ms = retention * 1000 if retention else None
+        self.lock = asyncio.Lock()
+        self.refreshed_at = 0.0
+        self.provisional: Optional[np.ndarray] = None
+        # ابتدای بازه‌ای که آخرین دریافت کامل پوشش داده (توکن‌های جدید ممکن است داده‌ای از آن زمان نداشته باشند)
+        self.covered_from_ms: Optional[int] = None
+        self.fetches = 0
+        # memmap باز فایل تا وقتی اندازه فایل تغییر نکرده (worker دیگری ممکن است سطر افزوده باشد)
+        self.mapped: Optional[np.memmap] = None
+
+    def read(self) -> np.ndarray:
+        size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        rows = size // (ROW_WIDTH * 8)
+        if rows == 0:
+            self.close()
+            return np.empty((0, ROW_WIDTH), dtype=np.float64)
+        if self.mapped is None or len(self.mapped) != rows:
+            self.mapped = np.memmap(self.path, dtype=np.float64, mode="r", shape=(rows, ROW_WIDTH))
+        return self.mapped
+
+    def close(self) -> None:
+        """رها کردن memmap (نگاشت با آزاد شدن آخرین ارجاع به آرایه بسته می‌شود)"""
+        self.mapped = None
+
+    def _write(self, rows: np.ndarray, append: bool) -> None:
+        # بازنویسی فایل با همان تعداد سطر نباید از نگاشت قبلی خوانده شود
+        self.close()
+        with open(self.path, "ab" if append else "wb") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                if append:
+                    # worker دیگری ممکن است همین بازه را زودتر افزوده باشد
+                    stored = self.read()
+                    if len(stored):
+                        rows = rows[rows[:, 0] // self.step_ms > stored[-1, 0] // self.step_ms]
+                f.write(np.ascontiguousarray(rows, dtype=np.float64).tobytes())
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def covers(self, window_start_ms: Optional[int], now_ms: int) -> bool:
+        """
+        آیا داده ذخیره‌شده پنجره را پوشش می‌دهد و فقط دنباله آن باید دریافت شود
+        (اگر فاصله آخرین نقطه تا اکنون از مدت نگهداری بیشتر باشد دریافت دنباله دقت لایه را حفظ نمی‌کند)
+        """
+        stored = self.read()
+        if len(stored) == 0:
+            return False
+        if self.retention_ms is not None and now_ms - stored[-1, 0] > self.retention_ms:
+            return False
+        covered_from = self.covered_from_ms if self.covered_from_ms is not None else stored[0, 0]
+        return covered_from <= (window_start_ms or 0) + self.step_ms
+
+    async def update(self, window_start_ms: Optional[int], now_ms: int, fetch_range: RangeFetcher) -> None:
+        """
+        دریافت فقط دنباله جاافتاده از آخرین نقطه ذخیره‌شده؛ اگر داده پنجره را پوشش ندهد
+        کل پنجره (یا کل مدت نگهداری لایه) دوباره دریافت و فایل بازنویسی می‌شود
+        """
+        full = not self.covers(window_start_ms, now_ms)
+        if full:
+            start_ms = now_ms - self.retention_ms if self.retention_ms is not None else (window_start_ms or 0)
+        else:
+            start_ms = int(self.read()[-1, 0]) + 1000
+        rows = downsample(chart_to_rows(await fetch_range(start_ms // 1000, now_ms // 1000)), self.step_ms)
+        self.fetches += 1
+
+        # نقطه بازه جاری تا بسته شدن بازه فقط در حافظه می‌ماند
+        current_bucket = now_ms // self.step_ms
+        closed = rows[rows[:, 0] // self.step_ms < current_bucket]
+        self.provisional = rows[-1:] if len(rows) and rows[-1, 0] // self.step_ms >= current_bucket else None
+
+        if full:
+            self._write(closed, append=False)
+            self.covered_from_ms = start_ms
+        elif len(closed):
+            self._write(closed, append=True)
+            self._compact(now_ms)
+
+    def _compact(self, now_ms: int) -> None:
+        """حذف نقاط قدیمی‌تر از دو برابر مدت نگهداری لایه"""
+        if self.retention_ms is None:
+            return
+        stored = self.read()
+        if len(stored) and now_ms - stored[0, 0] > 2 * self.retention_ms:
+            kept = np.array(stored[stored[:, 0] >= now_ms - self.retention_ms])
+            self._write(kept, append=False)
+            self.covered_from_ms = None
+
+    def window(self, window_start_ms: Optional[int]) -> np.ndarray:
+        stored = self.read()
+        start = np.searchsorted(stored[:, 0], window_start_ms, side="left") if window_start_ms is not None and len(stored) else 0
+        rows = np.array(stored[start:])
+        if self.provisional is not None:
+            rows = np.concatenate([rows, self.provisional])
+        return rows
+
+class TimeSeriesStore:
+    """
+    ذخیره‌ساز محلی سری‌های زمانی (یک فایل برای هر کلید و لایه دقت) که فقط دنباله جدید را از سرویس دریافت می‌کند
+    """
+
+    def __init__(self, directory: str = MARKET_CHART_STORE_DIR, max_open: int = MARKET_CHART_MAX_OPEN_SERIES):
+        self.directory = directory
+        self.max_open = max(1, max_open)
+        # سری‌های باز به ترتیب آخرین استفاده (LRU)
+        self.series: "OrderedDict[Tuple[Tuple[str, ...], str], Series]" = OrderedDict()
+        self.evictions = 0
+        self.evicted_fetches = 0
+
+    def _series(self, key: Tuple[str, ...], tier: str) -> Series:
+        series = self.series.get((key, tier))
+        if series is not None:
+            self.series.move_to_end((key, tier))
+            return series
+        os.makedirs(self.directory, exist_ok=True)
+        digest = hashlib.sha256("|".join(key).lower().encode("utf-8")).hexdigest()[:32]
+        step, retention = MARKET_CHART_TIERS[tier]
+        series = Series(os.path.join(self.directory, f"{digest}.{tier}.f64"), step, retention)
+        self.series[(key, tier)] = series
+        self._evict()
+        return series
+
+    def _evict(self) -> None:
+        """بستن قدیمی‌ترین سری‌های بیش از سقف (سری در حال به‌روزرسانی بسته نمی‌شود تا دو نمونه هم‌زمان فایل را ننویسند)"""
+        for cache_key in list(self.series):
+            if len(self.series) <= self.max_open:
+                return
+            series = self.series[cache_key]
+            if series.lock.locked():
+                continue
+            del self.series[cache_key]
+            series.close()
+            self.evictions += 1
+            self.evicted_fetches += series.fetches
+
+    async def get(self, key: Tuple[str, ...], days: str, fetch_range: RangeFetcher) -> Dict[str, Any]:
+        """
+        داده پنجره days روز اخیر (یا 'max') با به‌روزرسانی افزایشی در صورت گذشت MARKET_CHART_REFRESH_INTERVAL
+        """
+        try:
+            span = None if str(days).lower() == "max" else float(days)
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"مقدار نامعتبر برای days: {days}")
+        if span is not None and span <= 0:
+            raise HTTPException(status_code=400, detail=f"مقدار نامعتبر برای days: {days}")
+
+        series = self._series(key, select_tier(span))
+        now_ms = int(time.time() * 1000)
+        window_start_ms = now_ms - int(span * 86400 * 1000) if span is not None else None
+        async with series.lock:
+            if time.monotonic() - series.refreshed_at >= MARKET_CHART_REFRESH_INTERVAL or not series.covers(window_start_ms, now_ms):
+                await series.update(window_start_ms, now_ms, fetch_range)
+                series.refreshed_at = time.monotonic()
+        return rows_to_chart(series.window(window_start_ms))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "series": len(self.series),
+            "evictions": self.evictions,
+            "fetches": self.evicted_fetches + sum(series.fetches for series in self.series.values()),
+        }
+
+# نمونه سینگلتون برای نمودارهای تاریخی CoinGecko
+market_chart_store = TimeSeriesStore()
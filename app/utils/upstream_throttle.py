@@ -0,0 +1,154 @@
+import asyncio
+import math
+import time
+import logging
+from typing import Any, Dict, Optional
+from urllib.parse import urlparse
+from fastapi import HTTPException
+from app.config.settings import (
+    BASE_URLS,
+    RATE_LIMITS,
+    UPSTREAM_QUOTAS,
+    UPSTREAM_BURST,
+    UPSTREAM_MAX_QUEUE_WAIT,
+    UPSTREAM_WORKERS,
+)
+from app.utils.shared_store import get_shared_store
+
+# تنظیم لاگر
+logger = logging.getLogger(__name__)
+
+class ProviderThrottle:
+    """
+    زمان‌بند خروجی برای یک سهمیه ارائه‌دهنده: درخواست‌ها با فاصله یکنواخت (GCRA) زمان‌بندی می‌شوند
+    و هر فراخواننده تا نوبت خود صبر می‌کند؛ اگر انتظار از حد مجاز یا مهلت فراخواننده بیشتر باشد فوراً رد می‌شود
+    """
+
+    def __init__(self, name: str, limit_per_minute: int, burst: int = UPSTREAM_BURST):
+        self.name = name
+        self.limit = limit_per_minute
+        # سهم هر worker از سهمیه (در صورت نبودن ذخیره‌ساز مشترک برای هماهنگی)
+        self.interval = 60.0 / max(1.0, limit_per_minute / UPSTREAM_WORKERS)
+        self.tolerance = self.interval * max(0, burst - 1)
+        # زمان ورود نظری بعدی
+        self.arrival = 0.0
+        self.waiting = 0
+        self.granted = 0
+        self.rejected = 0
+
+    def reserve(self, max_wait: float) -> float:
+        """
+        رزرو یک نوبت و برگرداندن زمان انتظار تا آن نوبت
+        اگر انتظار بیشتر از max_wait باشد HTTPException 429 ایجاد می‌شود و نوبتی رزرو نمی‌شود
+        """
+        now = time.monotonic()
+        arrival = max(self.arrival, now)
+        wait = max(0.0, arrival - now - self.tolerance)
+        if wait > max_wait:
+            self.rejected += 1
+            logger.warning(f"سهمیه خروجی {self.name} پر است؛ انتظار تخمینی {wait:.1f} ثانیه")
+            raise HTTPException(
+                status_code=429,
+                detail=f"سهمیه درخواست به سرویس بالادستی ({self.name}) پر است. لطفاً بعداً تلاش کنید.",
+                headers={"Retry-After": str(math.ceil(wait))},
+            )
+        self.arrival = arrival + self.interval
+        self.granted += 1
+        return wait
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "limit_per_minute": self.limit,
+            "waiting": self.waiting,
+            "granted": self.granted,
+            "rejected": self.rejected,
+            "backlog_seconds": round(max(0.0, self.arrival - time.monotonic()), 2),
+        }
+
+class UpstreamThrottle:
+    """
+    مجموعه زمان‌بندهای خروجی؛ هر درخواست بالادستی بر اساس ارائه‌دهنده و مسیر به یک سهمیه نگاشت می‌شود
+    """
+
+    def __init__(self):
+        # کلید RATE_LIMITS -> زمان‌بند
+        self.throttles: Dict[str, ProviderThrottle] = {}
+
+    def resolve_quota(self, provider: str, url: str) -> Optional[str]:
+        """
+        پیدا کردن کلید سهمیه (در RATE_LIMITS) با طولانی‌ترین پیشوند مسیر منطبق در UPSTREAM_QUOTAS
+        """
+        quotas = UPSTREAM_QUOTAS.get(provider)
+        if not quotas:
+            return None
+        base_path = urlparse(BASE_URLS.get(provider, "")).path.rstrip("/")
+        path = urlparse(url).path[len(base_path):]
+        best = None
+        for prefix, quota in quotas.items():
+            if path.startswith(prefix) and (best is None or len(prefix) > len(best[0])):
+                best = (prefix, quota)
+        return best[1] if best else None
+
+    def get_throttle(self, quota: str) -> ProviderThrottle:
+        throttle = self.throttles.get(quota)
+        if throttle is None:
+            throttle = ProviderThrottle(quota, RATE_LIMITS[quota])
+            self.throttles[quota] = throttle
+        return throttle
+
+    async def acquire(self, provider: str, url: str, deadline: Optional[float] = None) -> None:
+        """
+        انتظار تا نوبت ارسال درخواست بالادستی
+        deadline زمان مطلق (time.monotonic) پایان مهلت فراخواننده است
+        """
+        quota = self.resolve_quota(provider, url)
+        if quota is None:
+            return
+        throttle = self.get_throttle(quota)
+
+        max_wait = UPSTREAM_MAX_QUEUE_WAIT
+        if deadline is not None:
+            max_wait = min(max_wait, deadline - time.monotonic())
+
+        wait = throttle.reserve(max_wait)
+        if wait > 0:
+            logger.debug(f"انتظار {wait:.2f} ثانیه برای سهمیه خروجی {quota}")
+            throttle.waiting += 1
+            try:
+                await asyncio.sleep(wait)
+            finally:
+                throttle.waiting -= 1
+
+        await self._check_shared_window(throttle, deadline)
+
+    async def _check_shared_window(self, throttle: ProviderThrottle, deadline: Optional[float]) -> None:
+        """
+        در صورت وجود ذخیره‌ساز مشترک، سهمیه هر دقیقه بین همه worker ها با یک شمارنده مشترک کنترل می‌شود
+        """
+        store = get_shared_store()
+        if store is None:
+            return
+        while True:
+            now = time.time()
+            window = int(now // 60)
+            count = await store.incr(f"upstream-quota:{throttle.name}:{window}", ttl=60)
+            if count is None or count <= throttle.limit:
+                return
+            wait = (window + 1) * 60 - now
+            max_wait = UPSTREAM_MAX_QUEUE_WAIT
+            if deadline is not None:
+                max_wait = min(max_wait, deadline - time.monotonic())
+            if wait > max_wait:
+                throttle.rejected += 1
+                raise HTTPException(
+                    status_code=429,
+                    detail=f"سهمیه درخواست به سرویس بالادستی ({throttle.name}) پر است. لطفاً بعداً تلاش کنید.",
+                    headers={"Retry-After": str(math.ceil(wait))},
+                )
+            await asyncio.sleep(wait)
+
+    def stats(self) -> Dict[str, Any]:
+        return {name: throttle.stats() for name, throttle in self.throttles.items()}
+
+# نمونه سینگلتون از زمان‌بند خروجی
+upstream_throttle = UpstreamThrottle()
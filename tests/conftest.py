@@ -0,0 +1,52 @@
+import os
+import sys
+import pytest
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils import helpers
+from app.utils.cache import response_cache
+from app.utils.singleflight import upstream_flights
+
+class FakeUpstream:
+    """سرویس بالادستی ساختگی: handler هر درخواست خروجی را پاسخ می‌دهد و درخواست‌ها ثبت می‌شوند"""
+
+    def __init__(self):
+        self.handler = lambda request: httpx.Response(404)
+        self.requests = []
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        response = self.handler(request)
+        if hasattr(response, "__await__"):
+            response = await response
+        return response
+
+@pytest.fixture
+def upstream(monkeypatch):
+    fake = FakeUpstream()
+    clients = {}
+
+    def get_client(provider):
+        if provider not in clients:
+            clients[provider] = httpx.AsyncClient(transport=httpx.MockTransport(fake.handle))
+        return clients[provider]
+
+    monkeypatch.setattr(helpers, "get_client", get_client)
+    response_cache.clear()
+    yield fake
+    response_cache.clear()
+    upstream_flights.calls.clear()
+
+@pytest.fixture
+def client(upstream):
+    from fastapi.testclient import TestClient
+    from app.main import app
+    with TestClient(app) as test_client:
+        yield test_client
+
+async def chunked(body: bytes, size: int = 32768):
+    """بدنه پاسخ ساختگی به صورت جریانی (مانند پاسخ واقعی تکه‌تکه)"""
+    for start in range(0, len(body), size):
+        yield body[start:start + size]
@@ -0,0 +1,22 @@
+from app.main import app
+from app.services.cache_warmer import cache_warmer
+
+def test_root_lists_only_mounted_apis(client):
+    apis = client.get("/").json()["apis_supported"]
+
+    assert "SolSniffer" not in apis and "CryptoPanic" not in apis
+    for api in apis:
+        assert any(route.path.startswith(f"/api/{api.lower()}") for route in app.routes)
+
+def test_lifespan_starts_and_stops_background_tasks(monkeypatch):
+    from fastapi.testclient import TestClient
+    calls = []
+    monkeypatch.setattr(cache_warmer, "start", lambda: calls.append("start"))
+
+    async def stop():
+        calls.append("stop")
+    monkeypatch.setattr(cache_warmer, "stop", stop)
+
+    with TestClient(app):
+        assert calls == ["start"]
+    assert calls == ["start", "stop"]
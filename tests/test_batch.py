@@ -0,0 +1,37 @@
+import json
+import httpx
+from app.utils import compression
+
+BODY = json.dumps({"result": [{"id": i, "name": "coin" * 10} for i in range(200)]}).encode()
+
+def test_sub_requests_are_not_compressed(client, upstream, monkeypatch):
+    upstream.handler = lambda request: httpx.Response(200, headers={"content-type": "application/json"}, content=BODY)
+    negotiated = []
+    original = compression.negotiate_encoding
+
+    def record(header):
+        encoding = original(header)
+        negotiated.append(encoding)
+        return encoding
+    monkeypatch.setattr(compression, "negotiate_encoding", record)
+
+    response = client.post(
+        "/api/batch",
+        headers={"accept-encoding": "gzip"},
+        json={"requests": [{"path": "/api/coinstats/coins"}, {"path": "/api/coinstats/coins"}]},
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert [item["body"] for item in response.json()["results"]] == [json.loads(BODY)] * 2
+    # فقط پاسخ گروهی فشرده شد
+    assert negotiated == ["gzip", None, None]
+
+def test_streaming_routes_are_rejected(client, upstream):
+    response = client.post("/api/batch", json={"requests": [
+        {"path": "/api/stream/sse"},
+        {"path": "/api/moralis/token/mainnet/pairs/PAIR/swaps/stream"},
+    ]})
+
+    assert [item["status"] for item in response.json()["results"]] == [400, 400]
+    assert upstream.requests == []
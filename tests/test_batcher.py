@@ -0,0 +1,50 @@
+import asyncio
+from app.utils.batcher import MicroBatcher
+from app.utils.request_context import start_request_state, get_request_state, get_request_deadline, record_cache_status
+
+def test_flush_runs_in_its_own_state_with_latest_deadline():
+    seen = {}
+
+    async def fetch(group, items):
+        seen["state"] = get_request_state()
+        seen["deadline"] = get_request_deadline()
+        record_cache_status("MISS")
+        return {item: item.upper() for item in items}
+
+    batcher = MicroBatcher(fetch, window=0.01, max_batch=10)
+
+    async def submit(timeout, items):
+        state = start_request_state(timeout)
+        result = await batcher.submit("group", items)
+        return state, result
+
+    async def run():
+        return await asyncio.gather(submit(1.0, ["a"]), submit(5.0, ["b"]))
+
+    (short, short_result), (long, long_result) = asyncio.run(run())
+
+    assert short_result == long_result == [{"a": "A", "b": "B"}]
+    assert seen["state"] is not short and seen["state"] is not long
+    assert seen["deadline"] == long.deadline
+    # هر منتظر وضعیت کش دسته را یک بار در درخواست خودش ثبت می‌کند
+    assert short.cache_statuses == long.cache_statuses == ["MISS"]
+
+def test_flush_without_deadline_when_a_submitter_has_none():
+    seen = {}
+
+    async def fetch(group, items):
+        seen["deadline"] = get_request_deadline()
+        return list(items)
+
+    batcher = MicroBatcher(fetch, window=0.01, max_batch=2)
+
+    async def submit(timeout, items):
+        start_request_state(timeout)
+        return await batcher.submit("group", items)
+
+    async def run():
+        return await asyncio.gather(submit(1.0, ["a"]), submit(None, ["b"]))
+
+    asyncio.run(run())
+
+    assert seen["deadline"] is None
@@ -0,0 +1,39 @@
+import json
+import httpx
+import pytest
+from app.utils.projection import Projection
+
+TOKENS = json.dumps({"tokens": [{"id": i, "name": f"token-{i}"} for i in range(50)], "meta": {"page": 1}}).encode()
+NEWS = json.dumps({"Data": [{"id": i, "title": f"news {i}"} for i in range(30)]}).encode()
+
+@pytest.mark.parametrize("path, body", [
+    ("/api/geckoterminal/tokens/info_recently_updated", TOKENS),
+    ("/api/cryptocompare/v2/news", NEWS),
+], ids=["geckoterminal", "cryptocompare"])
+def test_unchanged_poll_is_answered_from_stored_etag(client, upstream, monkeypatch, path, body):
+    upstream.handler = lambda request: httpx.Response(200, headers={"content-type": "application/json"}, content=body)
+
+    first = client.get(path, headers={"accept-encoding": "identity"})
+    cached = client.get(path, headers={"accept-encoding": "identity"})
+    assert first.status_code == cached.status_code == 200
+    assert first.content == cached.content
+
+    # پاسخ 304 از ETag ذخیره‌شده ساخته می‌شود، بدون پارس، شکل‌دهی یا سریال‌سازی دوباره
+    def fail(*args, **kwargs):
+        raise AssertionError("پاسخ دوباره ساخته شد")
+    monkeypatch.setattr(Projection, "apply", fail)
+    monkeypatch.setattr(json, "loads", fail)
+    revalidated = client.get(path, headers={"accept-encoding": "identity", "if-none-match": cached.headers["etag"]})
+
+    assert revalidated.status_code == 304
+    assert revalidated.headers["etag"] == cached.headers["etag"]
+    assert len(upstream.requests) == 1
+
+def test_route_limit_is_applied_before_client_projection(client, upstream):
+    upstream.handler = lambda request: httpx.Response(200, headers={"content-type": "application/json"}, content=TOKENS)
+
+    response = client.get("/api/geckoterminal/tokens/info_recently_updated?fields=tokens.id")
+    data = response.json()
+
+    assert [token["id"] for token in data["tokens"]] == list(range(20))
+    assert data["tokens"][0] == {"id": 0}
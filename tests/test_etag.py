@@ -0,0 +1,83 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from fastapi.testclient import TestClient
+from app.utils.etag import ConditionalMiddleware, compute_etag, encoded_etag, etag_matches
+
+def test_etag_is_strong_and_content_based():
+    assert compute_etag(b"body") == compute_etag(b"body")
+    assert compute_etag(b"body") != compute_etag(b"other")
+    assert compute_etag(b"body").startswith('"') and not compute_etag(b"body").startswith("W/")
+
+def test_encoded_etag_marks_the_encoding():
+    assert encoded_etag('"abc"', "gzip") == '"abc-gzip"'
+    assert encoded_etag('"abc"', None) == '"abc"'
+
+@pytest.mark.parametrize("if_none_match, expected", [
+    ('"abc"', True),
+    ('W/"abc"', True),
+    ('"other", "abc"', True),
+    ('"abc-gzip"', True),
+    ("*", True),
+    ('"other"', False),
+    ("", False),
+    (None, False),
+])
+def test_if_none_match_comparison(if_none_match, expected):
+    assert etag_matches(if_none_match, '"abc-br"') is expected
+
+@pytest.fixture
+def conditional_client():
+    app = FastAPI()
+    app.add_middleware(ConditionalMiddleware)
+
+    @app.get("/full")
+    async def full():
+        return JSONResponse({"value": 1}, headers={"X-Cache": "HIT", "Cache-Control": "max-age=5"})
+
+    @app.get("/tagged")
+    async def tagged():
+        return Response(b"cached", headers={"ETag": '"stored"'})
+
+    @app.get("/stream")
+    async def stream():
+        async def body():
+            yield b"a"
+            yield b"b"
+        return StreamingResponse(body())
+
+    @app.get("/missing")
+    async def missing():
+        return JSONResponse({"detail": "x"}, status_code=404)
+
+    @app.post("/full")
+    async def post():
+        return {"value": 1}
+
+    with TestClient(app) as client:
+        yield client
+
+def test_full_response_gets_etag_and_304(conditional_client):
+    first = conditional_client.get("/full")
+    revalidated = conditional_client.get("/full", headers={"if-none-match": first.headers["etag"]})
+
+    assert first.headers["etag"] == compute_etag(first.content)
+    assert revalidated.status_code == 304
+    assert revalidated.content == b""
+    assert revalidated.headers["etag"] == first.headers["etag"]
+    assert revalidated.headers["x-cache"] == "HIT"
+    assert revalidated.headers["cache-control"] == "max-age=5"
+    assert "content-type" not in revalidated.headers
+
+def test_existing_etag_is_kept(conditional_client):
+    response = conditional_client.get("/tagged", headers={"if-none-match": '"stored"'})
+
+    assert response.status_code == 304
+    assert response.headers["etag"] == '"stored"'
+
+@pytest.mark.parametrize("method, path", [("GET", "/stream"), ("GET", "/missing"), ("POST", "/full")])
+def test_streams_errors_and_unsafe_methods_have_no_etag(conditional_client, method, path):
+    response = conditional_client.request(method, path, headers={"if-none-match": "*"})
+
+    assert response.status_code != 304
+    assert "etag" not in response.headers
@@ -0,0 +1,42 @@
+import httpx
+import pytest
+from app.services import moralis
+from app.utils.snapshot_store import SnapshotStore
+
+POINTS = [
+    {"timestamp": "2026-01-03T00:00:00Z", "totalHolders": 30},
+    {"timestamp": "2026-01-02T00:00:00Z", "totalHolders": 20},
+    {"timestamp": "2026-01-01T00:00:00Z", "totalHolders": 10},
+]
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    snapshot_store = SnapshotStore(str(tmp_path / "snapshots.sqlite3"), lock_stripes=4)
+    monkeypatch.setattr(moralis, "holders_store", snapshot_store)
+    yield snapshot_store
+    snapshot_store.close()
+
+def test_response_keeps_moralis_shape(client, upstream, store):
+    upstream.handler = lambda request: httpx.Response(200, json={"result": POINTS, "cursor": None})
+
+    response = client.get(
+        "/api/moralis/token/mainnet/holders/TOKEN/historical",
+        params={"time_frame": "1d", "from_date": "2025-12-31T00:00:00Z", "to_date": "2026-01-04T00:00:00Z"},
+    )
+    data = response.json()
+
+    assert response.status_code == 200
+    assert data["result"] == POINTS
+    assert data["cursor"] is None
+    assert data["timeFrame"] == "1d"
+    assert data["total"] == len(POINTS)
+
+def test_locks_are_a_fixed_pool():
+    store = SnapshotStore(":memory:", lock_stripes=4)
+
+    locks = {id(store.lock(f"address-{i}", "1d")) for i in range(1000)}
+
+    assert len(store.locks) == 4
+    assert len(locks) <= 4
+    assert store.lock("address-1", "1d") is store.lock("address-1", "1d")
+    assert store.stats()["lock_stripes"] == 4
@@ -0,0 +1,65 @@
+import json
+import pytest
+from fastapi import HTTPException
+from app.utils.json_stream import LimitedBody, TruncatingJSONScanner
+
+def _scan(body: bytes, chunk_size: int, max_size: int = 200, max_items: int = 1000) -> bytes:
+    scanner = TruncatingJSONScanner(max_size, max_items)
+    for start in range(0, len(body), chunk_size):
+        scanner.feed(body[start:start + chunk_size])
+    return scanner.finish()
+
+BODY = json.dumps({
+    "meta": {"page": 1, "note": "has \"quotes\" and [brackets] {braces}"},
+    "data": [{"id": i, "name": f"item \\ {i}", "tags": ["a", "b"]} for i in range(100)],
+}).encode()
+
+def test_small_body_is_kept_unchanged():
+    body = LimitedBody(max_size=len(BODY))
+    body.feed(BODY)
+
+    assert body.finish() == BODY
+    assert not body.exceeded and not body.truncated
+
+def test_oversized_list_is_truncated_to_valid_json():
+    body = LimitedBody(max_size=200)
+    for start in range(0, len(BODY), 64):
+        body.feed(BODY[start:start + 64])
+    data = json.loads(body.finish())
+
+    assert body.exceeded and body.truncated
+    assert data["meta"] == json.loads(BODY)["meta"]
+    assert 0 < len(data["data"]) < 100
+    kept = len(data["data"])
+    assert data["data"][:-1] == json.loads(BODY)["data"][:kept - 1]
+    # پس از رسیدن به سقف، اعضای لیست‌های تودرتوی آخرین عضو هم رد و شمرده می‌شوند
+    assert data["data"][-1]["id"] == kept - 1
+    assert data["data"][-1]["tags"] == [] and data["data"][-1]["tags_total"] == 2
+    assert data["data_total"] == 100
+    assert data["data_truncated"] is True
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 64, len(BODY)])
+def test_output_does_not_depend_on_chunk_boundaries(chunk_size):
+    assert _scan(BODY, chunk_size) == _scan(BODY, len(BODY))
+
+def test_lists_are_capped_at_max_items():
+    data = json.loads(_scan(BODY, 128, max_size=len(BODY) * 2, max_items=5))
+
+    assert [item["id"] for item in data["data"]] == [0, 1, 2, 3, 4]
+    assert data["data_total"] == 100
+    assert data["data"][0]["tags"] == ["a", "b"]
+
+def test_empty_and_nested_lists_are_counted():
+    body = json.dumps({"empty": [], "rows": [[1, 2], [3], []] * 10}).encode()
+    data = json.loads(_scan(body, 5, max_size=10 ** 6, max_items=4))
+
+    assert data["empty"] == []
+    assert data["rows"] == [[1, 2], [3], [], [1, 2]]
+    assert data["rows_total"] == 30
+
+def test_oversized_non_json_body_is_rejected():
+    body = LimitedBody(max_size=10)
+
+    with pytest.raises(HTTPException) as error:
+        body.feed(b"<html>" + b"x" * 100 + b"</html>")
+    assert error.value.status_code == 502
@@ -0,0 +1,69 @@
+import gzip
+import json
+import httpx
+import pytest
+from app.config.settings import MAX_RESPONSE_SIZE
+from tests.conftest import chunked
+
+SMALL = json.dumps({"result": [{"id": i} for i in range(100)]}).encode()
+# بزرگ‌تر از MAX_RESPONSE_SIZE تا با پارسر جریانی کوتاه شود
+LARGE = json.dumps({"result": [{"id": i, "name": "coin" * 30} for i in range(MAX_RESPONSE_SIZE // 100)], "meta": {"page": 1}}).encode()
+
+def _fetch_twice(client, accept_encoding="identity"):
+    headers = {"accept-encoding": accept_encoding}
+    first = client.get("/api/coinstats/coins", headers=headers)
+    second = client.get("/api/coinstats/coins", headers=headers)
+    return first, second
+
+@pytest.mark.parametrize("body", [SMALL, LARGE], ids=["small", "oversized"])
+@pytest.mark.parametrize("with_length", [True, False], ids=["content-length", "chunked"])
+def test_miss_and_hit_are_identical(client, upstream, body, with_length):
+    headers = {"content-type": "application/json"}
+    if with_length:
+        upstream.handler = lambda request: httpx.Response(200, headers=headers, content=body)
+    else:
+        upstream.handler = lambda request: httpx.Response(200, headers=headers, content=chunked(body))
+
+    first, second = _fetch_twice(client)
+
+    assert first.status_code == second.status_code == 200
+    assert first.headers["x-cache"] == "MISS"
+    assert second.headers["x-cache"] == "HIT"
+    assert first.content == second.content
+    # پاسخ جریانی MISS پیش از پایان بدنه ETag ندارد ولی هرگز ETag متفاوتی ندارد
+    assert first.headers.get("etag") in (None, second.headers["etag"])
+    assert len(upstream.requests) == 1
+
+def test_oversized_body_is_truncated_on_miss(client, upstream):
+    upstream.handler = lambda request: httpx.Response(200, headers={"content-type": "application/json"}, content=chunked(LARGE))
+
+    first, second = _fetch_twice(client)
+    data = first.json()
+
+    assert len(first.content) < len(LARGE)
+    assert data["result_truncated"] is True
+    assert data["result_total"] == len(json.loads(LARGE)["result"])
+    assert data["meta"] == {"page": 1}
+    assert second.json() == data
+
+@pytest.mark.parametrize("body", [SMALL, LARGE], ids=["small", "oversized"])
+def test_gzip_upstream_miss_and_hit_are_identical(client, upstream, body):
+    compressed = gzip.compress(body)
+    upstream.handler = lambda request: httpx.Response(
+        200, headers={"content-type": "application/json", "content-encoding": "gzip"}, content=chunked(compressed),
+    )
+
+    first, second = _fetch_twice(client, "gzip")
+
+    assert first.content == second.content
+    assert first.headers.get("etag") in (None, second.headers["etag"])
+    assert first.headers.get("content-encoding") == second.headers.get("content-encoding")
+
+def test_if_none_match_on_cached_body_returns_304(client, upstream):
+    upstream.handler = lambda request: httpx.Response(200, headers={"content-type": "application/json"}, content=SMALL)
+
+    _, cached = _fetch_twice(client)
+    revalidated = client.get("/api/coinstats/coins", headers={"accept-encoding": "identity", "if-none-match": cached.headers["etag"]})
+
+    assert revalidated.status_code == 304
+    assert revalidated.content == b""
@@ -0,0 +1,74 @@
+import pytest
+from fastapi import HTTPException
+from app.utils.projection import Projection, parse_projection
+
+COIN = {
+    "id": "bitcoin",
+    "symbol": "btc",
+    "market_data": {"current_price": {"usd": 1.0, "eur": 0.9}, "market_cap": {"usd": 10.0}},
+    "tickers": [{"base": f"B{i}", "target": "USD", "volume": i} for i in range(5)],
+}
+
+def test_fields_select_nested_paths():
+    shaped = Projection(["id", "market_data.current_price.usd"]).apply(COIN)
+
+    assert shaped == {"id": "bitcoin", "market_data": {"current_price": {"usd": 1.0}}}
+
+def test_fields_apply_to_each_list_item():
+    shaped = Projection(["tickers.base"]).apply(COIN)
+
+    assert shaped == {"tickers": [{"base": f"B{i}"} for i in range(5)]}
+
+def test_shorter_path_keeps_whole_value():
+    shaped = Projection(["market_data", "market_data.current_price.usd"]).apply(COIN)
+
+    assert shaped == {"market_data": COIN["market_data"]}
+
+def test_path_limit_marks_truncated_lists():
+    shaped = Projection(["tickers"], {"tickers": 2}).apply(COIN)
+
+    assert [t["base"] for t in shaped["tickers"]] == ["B0", "B1"]
+    assert shaped["tickers_total"] == 5
+    assert shaped["tickers_truncated"] is True
+
+def test_bare_limit_applies_to_top_level_lists():
+    assert Projection(limit=2).apply([1, 2, 3]) == [1, 2]
+    shaped = Projection(limit=3).apply(COIN)
+    assert len(shaped["tickers"]) == 3 and shaped["tickers_total"] == 5
+
+def test_input_is_not_modified():
+    original = {"tickers": list(COIN["tickers"])}
+    Projection(["tickers.base"], {"tickers": 1}).apply(original)
+
+    assert original == {"tickers": COIN["tickers"]}
+
+def test_earlier_total_is_preserved():
+    shaped = Projection(limits={"data": 1}).apply({"data": [1, 2], "data_total": 50, "data_truncated": True})
+
+    assert shaped == {"data": [1], "data_total": 50, "data_truncated": True}
+
+def test_key_is_independent_of_parameter_order():
+    first = parse_projection("symbol,id", "tickers:2,5")
+    second = parse_projection(" id , symbol ", "5,tickers:2")
+
+    assert first.key == second.key
+
+def test_no_parameters_means_no_projection():
+    assert parse_projection(None, None) is None
+    assert parse_projection(" , ", "") is None
+
+@pytest.mark.parametrize("fields, limits", [
+    ("a..b", None),
+    (None, "tickers:-1"),
+    (None, "tickers:many"),
+    (".".join(["a"] * 100), None),
+])
+def test_invalid_parameters_are_rejected(fields, limits):
+    with pytest.raises(HTTPException) as error:
+        parse_projection(fields, limits)
+    assert error.value.status_code == 400
+
+def test_route_response_is_shaped_before_serialization(client, upstream):
+    response = client.get("/", params={"fields": "version"})
+
+    assert response.json() == {"version": "1.0.0"}
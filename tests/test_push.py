@@ -0,0 +1,48 @@
+import pytest
+from app.services.push import merge_patch, _keyed, _price_snapshot
+
+def _apply(target, patch):
+    """اعمال JSON Merge Patch طبق RFC 7396 (برای بررسی رفت و برگشت)"""
+    if not isinstance(patch, dict):
+        return patch
+    result = dict(target) if isinstance(target, dict) else {}
+    for key, value in patch.items():
+        if value is None:
+            result.pop(key, None)
+        else:
+            result[key] = _apply(result.get(key), value)
+    return result
+
+def test_unchanged_state_has_no_patch():
+    state = {"a": {"price": 1, "tags": [1, 2]}}
+
+    assert merge_patch(state, {"a": {"price": 1, "tags": [1, 2]}}) is None
+
+def test_patch_contains_only_changes():
+    old = {"a": {"price": 1, "volume": 5}, "b": {"price": 2}}
+    new = {"a": {"price": 1, "volume": 6}, "c": {"price": 3}}
+
+    assert merge_patch(old, new) == {"a": {"volume": 6}, "b": None, "c": {"price": 3}}
+
+@pytest.mark.parametrize("old, new", [
+    ({"a": 1}, {"a": {"nested": True}}),
+    ({"a": {"nested": True}}, {"a": [1, 2]}),
+    ({"a": [1, 2, 3]}, {"a": [1, 2]}),
+    ({"x": {"y": {"z": 1, "w": 2}}}, {"x": {"y": {"z": 1}}}),
+    ({}, {"a": {"b": {"c": 1}}}),
+])
+def test_patch_round_trips(old, new):
+    assert _apply(old, merge_patch(old, new)) == new
+
+def test_keyed_lists_patch_per_item():
+    old = _keyed({"data": [{"id": "p1", "v": 1}, {"id": "p2", "v": 2}]}, lambda p: p["id"])
+    new = _keyed({"data": [{"id": "p2", "v": 2}, {"id": "p1", "v": 1}]}, lambda p: p["id"])
+
+    # فقط رتبه‌ها جابه‌جا شده‌اند
+    assert merge_patch(old, new) == {"p1": {"rank": 1}, "p2": {"rank": 0}}
+
+def test_price_snapshot_ignores_latency():
+    first = {"price": 1.0, "sources": {"dexscreener": {"price": 1.0, "latency_ms": 12}}}
+    second = {"price": 1.0, "sources": {"dexscreener": {"price": 1.0, "latency_ms": 40}}}
+
+    assert merge_patch(_price_snapshot(first), _price_snapshot(second)) is None
@@ -0,0 +1,82 @@
+import pytest
+from types import SimpleNamespace
+from fastapi import HTTPException
+from starlette.requests import Request
+from app.utils import rate_limiter as rate_limiter_module
+from app.utils.rate_limiter import RateLimiter, get_client_ip
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(rate_limiter_module, "time", SimpleNamespace(time=lambda: now[0]))
+    return now
+
+def test_burst_up_to_limit_then_429(clock):
+    limiter = RateLimiter(per_client=False)
+    limiter.set_limit("/api/test", 60)
+
+    statuses = [limiter.check_rate_limit("/api/test/items") for _ in range(60)]
+    with pytest.raises(HTTPException) as error:
+        limiter.check_rate_limit("/api/test/items")
+
+    assert [s.remaining for s in statuses[:2]] == [59, 58]
+    assert statuses[-1].remaining == 0
+    assert error.value.status_code == 429
+    assert error.value.headers["Retry-After"] == "1"
+    assert error.value.headers["X-RateLimit-Remaining"] == "0"
+
+def test_quota_refills_at_the_limit_rate(clock):
+    limiter = RateLimiter(per_client=False)
+    limiter.set_limit("/api/test", 60)
+    for _ in range(60):
+        limiter.check_rate_limit("/api/test")
+
+    clock[0] += 1.0
+    assert limiter.check_rate_limit("/api/test").remaining == 0
+    with pytest.raises(HTTPException):
+        limiter.check_rate_limit("/api/test")
+
+def test_longest_prefix_on_segment_boundaries():
+    limiter = RateLimiter()
+    limiter.set_limit("/api", 100)
+    limiter.set_limit("/api/moralis/", 10)
+
+    assert limiter.match_limit("/api/moralis/token") == "/api/moralis"
+    assert limiter.match_limit("/api/moralisx") == "/api"
+    assert limiter.match_limit("/other") is None
+    assert limiter.check_rate_limit("/other") is None
+
+def test_clients_have_separate_quotas(clock):
+    limiter = RateLimiter(per_client=True)
+    limiter.set_limit("/api", 1)
+
+    limiter.check_rate_limit("/api", "1.1.1.1")
+    limiter.check_rate_limit("/api", "2.2.2.2")
+    with pytest.raises(HTTPException):
+        limiter.check_rate_limit("/api", "1.1.1.1")
+
+def test_tracked_keys_are_bounded(clock):
+    limiter = RateLimiter(per_client=True, max_keys=3)
+    limiter.set_limit("/api", 10)
+
+    for i in range(10):
+        limiter.check_rate_limit("/api", f"10.0.0.{i}")
+
+    assert list(limiter.arrivals) == [("/api", "10.0.0.7"), ("/api", "10.0.0.8"), ("/api", "10.0.0.9")]
+
+def _request(peer: str, forwarded_for: str = None) -> Request:
+    headers = [(b"x-forwarded-for", forwarded_for.encode())] if forwarded_for else []
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers, "client": (peer, 1234)})
+
+def test_forwarded_for_is_ignored_from_untrusted_peers(monkeypatch):
+    monkeypatch.setattr(rate_limiter_module, "_trusted_proxies", [])
+
+    assert get_client_ip(_request("203.0.113.5", "1.2.3.4")) == "203.0.113.5"
+
+def test_forwarded_for_is_read_right_to_left_through_trusted_proxies(monkeypatch):
+    monkeypatch.setattr(rate_limiter_module, "_trusted_proxies", rate_limiter_module._parse_networks("10.0.0.0/8, 192.168.1.1"))
+
+    # آدرس سمت چپ را کلاینت جعل کرده است
+    assert get_client_ip(_request("10.0.0.2", "6.6.6.6, 198.51.100.7, 192.168.1.1")) == "198.51.100.7"
+    assert get_client_ip(_request("10.0.0.2", "10.1.1.1")) == "10.1.1.1"
+    assert get_client_ip(_request("10.0.0.2")) == "10.0.0.2"
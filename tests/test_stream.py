@@ -0,0 +1,40 @@
+import asyncio
+import httpx
+from app.api.routes.stream import stream_sse
+from app.services.push import push_hub
+
+TOPIC = "trending_pools/solana"
+
+def test_unstarted_sse_response_does_not_subscribe(upstream):
+    upstream.handler = lambda request: httpx.Response(200, json={"data": []})
+
+    async def run():
+        response = await stream_sse(topic=[TOPIC])
+        # کلاینت پیش از شروع پاسخ قطع شد و بدنه هرگز خوانده نشد
+        await response.body_iterator.aclose()
+        return dict(push_hub.topics)
+
+    assert asyncio.run(run()) == {}
+
+def test_disconnect_after_first_event_unsubscribes(upstream):
+    upstream.handler = lambda request: httpx.Response(200, json={"data": []})
+
+    async def run():
+        response = await stream_sse(topic=[TOPIC])
+        first = await response.body_iterator.__anext__()
+        subscribed = list(push_hub.topics)
+        await response.body_iterator.aclose()
+        await asyncio.sleep(0)
+        return first, subscribed, dict(push_hub.topics)
+
+    first, subscribed, remaining = asyncio.run(run())
+
+    assert first == "retry: 3000\n\n"
+    assert subscribed == [TOPIC]
+    assert remaining == {}
+
+def test_invalid_topic_is_rejected_before_streaming(client):
+    response = client.get("/api/stream/sse", params={"topic": "unknown/topic"})
+
+    assert response.status_code == 404
+    assert push_hub.topics == {}
@@ -0,0 +1,45 @@
+import asyncio
+import time
+from app.utils.timeseries_store import TimeSeriesStore
+
+def _chart(start: int, end: int):
+    points = list(range(start * 1000, end * 1000, 3600 * 1000))
+    return {
+        "prices": [[t, 1.0] for t in points],
+        "market_caps": [[t, 2.0] for t in points],
+        "total_volumes": [[t, 3.0] for t in points],
+    }
+
+def test_open_series_are_bounded_and_evicted_maps_released(tmp_path):
+    store = TimeSeriesStore(str(tmp_path), max_open=2)
+
+    async def fetch_range(start: int, end: int):
+        return _chart(start, end)
+
+    async def run():
+        for coin in ("a", "b", "c"):
+            await store.get((coin, "usd"), "7", fetch_range)
+
+    asyncio.run(run())
+
+    assert list(key for key, _ in store.series) == [("b", "usd"), ("c", "usd")]
+    assert store.stats() == {"series": 2, "evictions": 1, "fetches": 3}
+
+def test_evicted_series_is_reopened_from_disk(tmp_path):
+    store = TimeSeriesStore(str(tmp_path), max_open=1)
+    calls = []
+
+    async def fetch_range(start: int, end: int):
+        calls.append((start, end))
+        return _chart(start, end)
+
+    async def run():
+        first = await store.get(("a", "usd"), "7", fetch_range)
+        await store.get(("b", "usd"), "7", fetch_range)
+        return first, await store.get(("a", "usd"), "7", fetch_range)
+
+    first, again = asyncio.run(run())
+
+    # سری بسته‌شده از فایل خوانده می‌شود و فقط دنباله آن (نه کل پنجره) دوباره دریافت می‌شود
+    assert again["prices"][:-1] == first["prices"][:-1]
+    assert calls[2][0] > int(time.time()) - 2 * 3600